@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+from game import *
+
+SPECTATOR_QUEUE_SIZE = 256 #game loops a spectator queue holds, the oldest ones are dropped for a slow spectator
+
+class AsyncGameSession:
+    """A game session running as asyncio tasks on a shared clock
+
+    The keyboard of the curses window is read by a reader of the event loop
+    on the input file descriptor of the session that feeds a queue, the game
+    loops and the rendering run as separate coroutines, so that one event
+    loop can host several sessions or other tasks, e.g. spectator sockets
+    reading the spectator queues. Sessions sharing an event loop must read
+    their keys from different file descriptors, e.g. one pseudo terminal
+    each. The player may quit at any time, the pauses included. A spectator
+    that does not keep up loses the oldest loops of its queue rather than
+    holding them all in memory.
+
+    Arguments:
+        window {object} - window object of curses library
+        level {Level} - a Level object
+        scene {Scene} - a Scene object rendering the level
+
+    Keyword Arguments:
+        logic_rate {float} - game loops per second (default: {LOGIC_RATE})
+        render_rate {float} - frames per second (default: {RENDER_RATE})
+        input_fd {int} - file descriptor the window reads its keys from (default: {None} for sys.stdin)
+
+    Raises:
+        TypeError: raise if 'level' is not a Level object
+        TypeError: raise if 'scene' is not a Scene object
+        ValueError: raise if 'logic_rate' or 'render_rate' is not a positive number
+
+    Attributes:
+        __window - store the window object
+        __scene - store the Scene object
+        __simulator - store the Simulator of the game
+        __input_fd - store the file descriptor the keys are read from
+        __keys - queue of the actions read from the keyboard
+        __quit - event set when the player quits
+        __spectators - queues receiving (loop, points, life, events) after each game loop
+        __start - store the event loop time the session has been started
+    """
+
+    def __init__(self, window, level, scene, logic_rate=LOGIC_RATE, render_rate=RENDER_RATE, input_fd=None):
+        if not isinstance(level, Level):
+            raise TypeError("\'level\' must be a Level object")
+        if not isinstance(scene, Scene):
+            raise TypeError("\'scene\' must be a Scene object")
+        if logic_rate <= 0 or render_rate <= 0:
+            raise ValueError("\'logic_rate\' and \'render_rate\' must be positive numbers")
+
+        self.__window = window
+        self.__scene = scene
+        self.__simulator = Simulator(level)
+        self.__logic_step = 1/logic_rate
+        self.__render_step = 1/render_rate
+        self.__input_fd = sys.stdin.fileno() if input_fd is None else input_fd
+        self.__keys = None
+        self.__quit = None
+        self.__spectators = []
+        self.__start = 0
+
+    @property
+    def state(self):
+        return self.__simulator.state
+
+    def add_spectator(self, maxsize=SPECTATOR_QUEUE_SIZE):
+        """Return a queue receiving (loop, points, life, events) after each game loop
+
+        Keyword Arguments:
+            maxsize {int} -- game loops the queue holds before dropping the oldest one (default: {SPECTATOR_QUEUE_SIZE})
+
+        Raises:
+            ValueError: raise if 'maxsize' is not a positive integer
+        """
+        if maxsize <= 0:
+            raise ValueError("\'maxsize\' must be a positive integer")
+        queue = asyncio.Queue(maxsize)
+        self.__spectators.append(queue)
+        return queue
+
+    def __clock(self):
+        """Return the seconds since the session has been started"""
+        return asyncio.get_running_loop().time() - self.__start
+
+    def __read_keys(self):
+        """Put the pressed keys into the queue, called when the terminal is readable"""
+        button = self.__window.getch()
+        while button != -1:
+            if button == ord('q'):
+                self.__quit.set()
+            elif button in KEYS:
+                self.__keys.put_nowait(KEYS[button])
+            button = self.__window.getch()
+
+    async def __pause(self, seconds):
+        """Wait for a number of seconds, return True if the player quits meanwhile"""
+        try:
+            await asyncio.wait_for(self.__quit.wait(), seconds)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def __standing_start(self):
+        """Display the standing start announcement, return True if the player quits meanwhile"""
+        self.__scene.standing_start_announcement = True
+        quit_ = await self.__pause(STANDING_START_TIME)
+        self.__scene.standing_start_announcement = False
+        return quit_
+
+    async def __death_scene(self):
+        """Display the death scene, skull and explosion in turn, return True if the player quits meanwhile"""
+        self.__scene.death = True
+        quit_ = await self.__pause(DEATH_TIME)
+        self.__scene.death = False
+        return quit_
+
+    async def __play(self):
+        """Run the game loops at the logic rate until the game is over or the player quits"""
+        if await self.__standing_start():
+            return
+        next_loop = self.__clock()
+
+        while not self.__quit.is_set():
+            #take the last direction pressed since the last loop
+            action = None
+            while not self.__keys.empty():
+                action = self.__keys.get_nowait()
+
+            events = self.__simulator.step(action)
+            PacmanGameEngine._update_scene(self.__scene, self.state)
+            for spectator in self.__spectators:
+                if spectator.full():
+                    spectator.get_nowait()
+                spectator.put_nowait((self.state.loop, self.state.points, self.state.life, events))
+
+            if PACMAN_DEATH in events:
+                if await self.__death_scene():
+                    return
+                next_loop = self.__clock()
+
+            #end game if no points left or drain out of life
+            if self.state.over:
+                return
+
+            #wait for the next loop on the shared clock, skip the loops of an overrun
+            next_loop += self.__logic_step
+            if next_loop < self.__clock():
+                next_loop = self.__clock()
+            await self.__pause(next_loop - self.__clock())
+
+    async def __render(self):
+        """Render the scene at the render rate"""
+        while True:
+            self.__scene.time = self.__clock()
+            self.__scene.render()
+            await asyncio.sleep(self.__render_step)
+
+    async def run(self):
+        """Play the game until it is over or the player quits"""
+        loop = asyncio.get_running_loop()
+        self.__start = loop.time()
+        self.__keys = asyncio.Queue()
+        self.__quit = asyncio.Event()
+
+        loop.add_reader(self.__input_fd, self.__read_keys)
+        render = asyncio.create_task(self.__render())
+        try:
+            await self.__play()
+        finally:
+            render.cancel()
+            loop.remove_reader(self.__input_fd)
+            try:
+                await render
+            except asyncio.CancelledError:
+                pass
+
+
+class AsyncPacmanGameEngine(PacmanGameEngine):
+    """The class handles game flow with asyncio instead of a blocking game loop
+    """
+
+    def start(self, level_number, logic_rate=LOGIC_RATE, render_rate=RENDER_RATE):
+        """Function to beginning the game
+        
+        Arguments:
+            level_number {int} -- level of the game
+
+        Keyword Arguments:
+            logic_rate {float} -- game loops per second, the speed of the game (default: {LOGIC_RATE})
+            render_rate {float} -- frames per second (default: {RENDER_RATE})
+        """
+        #setting up curses library
+        window, level, scene = self._set_up(level_number)
+
+        #start the game
+        asyncio.run(AsyncGameSession(window, level, scene, logic_rate, render_rate).run())
+
+        #end game
+        self._tear_down(window)
+
+
+def main():
+    game = AsyncPacmanGameEngine()
+    game.start(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from distance_table import *
+
+#action codes of the batch simulator, the index of the direction in ACTIONS
+ACTIONS = [None, UP, DOWN, LEFT, RIGHT]
+NO_PELLET = 0
+DOT_PELLET = 1
+POWER_CAPSULE_PELLET = 2
+REVERSE_ACTIONS = [0, 2, 1, 4, 3] #action code of the way back of each action code, 0 for none
+#kinds of chase target of the batch ghosts, see CHASE_TARGETS
+PACMAN_TARGET = 0
+PINKY_TARGET = 1
+INKY_TARGET = 2
+CLYDE_TARGET = 3
+TARGET_KINDS = {
+    Blinky: PACMAN_TARGET,
+    Pinky: PINKY_TARGET,
+    Inky: INKY_TARGET,
+    Clyde: CLYDE_TARGET
+}
+
+
+class BatchSimulator:
+    """Run N independent games of the same level in lockstep
+
+    Every game is stored as a row of struct-of-arrays, cells are addressed by
+    their id (y*width + x), so that one call to step applies the rules of
+    Simulator.step to all the games with vectorized array operations. The
+    ghosts follow the GhostAI rules, the distances to Pacman are read from
+    a DistanceTable of the level instead of a DistanceField. Their moves
+    are the same as in Simulator but for the frightened ghosts, which read
+    the exact distances instead of a FleeField repaired within a budget,
+    and whose ties are broken by the generator of the batch.
+
+    Arguments:
+        level {Level} - a Level object the games are played on
+        n {int} - number of games
+
+    Keyword Arguments:
+        seed {int} - seed of the random generator breaking the ties of the frightened ghosts (default: {None})
+        distance_table {DistanceTable} - distance table of the level, e.g. read from a level cache,
+            built if None (default: {None})
+
+    Raises:
+        TypeError: raise if 'level' is not a Level object
+        TypeError: raise if 'n' is not an integer
+        ValueError: raise if 'n' is not a positive integer
+        ValueError: raise if the level has too many walkable cells for a DistanceTable
+
+    Attributes:
+        walkable - (cells,) True if the cell can be walked on
+        pellets - (n, cells) pellet grid tensor of the games
+        pellets_left - (n,) number of dots and power capsules left
+        pacman - (n,) cell id of Pacman
+        direction - (n,) action code of the direction Pacman is moving to
+        ghosts - (n, ghosts) cell id of the ghosts
+        occupancy - (n, cells) number of ghosts on each cell
+        last_ghosts - (n, ghosts) cell id the ghosts came from
+        heading - (n, ghosts) action code of the last move of the ghosts, 0 if they may turn back
+        scatter - (n,) True if the ghosts scatter to their corner, False if they chase Pacman
+        ghosts_eaten - (n, ghosts) True if the ghost has been eaten
+        bonus_points - (n, bonuses) points of the bonuses left, 0 once eaten
+        points - (n,) points gained by the players
+        life - (n,) amount of life left
+        loop - (n,) number of game loops gone
+        done - (n,) True if the game is over
+    """
+
+    def __init__(self, level, n, seed=None, distance_table=None):
+        #validate input
+        if not isinstance(level, Level):
+            raise TypeError("\'level\' must be a Level object")
+        if not isinstance(n, int):
+            raise TypeError("\'n\' must be an integer")
+        if n <= 0:
+            raise ValueError("\'n\' must be a positive integer")
+
+        pmap = level.pmap
+        self.__n = n
+        self.__width = pmap.width
+        self.__random = np.random.default_rng(seed)
+
+        #static level data shared by all the games
+        symbols = np.array(pmap.symbols)[np.frombuffer(bytes(pmap.tiles), dtype=np.uint8)]
+        self.walkable = ~np.isin(symbols, NOT_WALKABLE)
+        self.__start_pellets = np.where(symbols == DOT, DOT_PELLET, np.where(symbols == POWER_CAPSULE, POWER_CAPSULE_PELLET, NO_PELLET)).astype(np.uint8)
+        self.__moves = self.__build_moves(pmap)
+        self.__std_pacman = self.__id(level.pacman.x, level.pacman.y)
+        self.__std_ghosts = np.array([self.__id(ghost.x, ghost.y) for ghost in level.ghosts])
+        self.__bonuses = np.array([self.__id(bonus.x, bonus.y) for bonus in level.bonuses], dtype=np.int64)
+        self.__bonus_points = np.array([bonus.points for bonus in level.bonuses], dtype=np.int64)
+        #only the ghosts spawned in the cage follow the moves out of it, the ghosts after the fourth one
+        #follow them again, the other ghosts stay out of the script
+        self.__caged = np.array([pmap.symbol(ghost.x, ghost.y) == GHOST_HOUSE_SYMBOL for ghost in level.ghosts], dtype=bool)
+        order = np.cumsum(self.__caged) - 1
+        self.__start_moves = np.array([[ACTIONS.index(self.__action(moves[order[i] % len(moves)])) if caged else 0
+            for i, caged in enumerate(self.__caged)] for moves in GHOST_START_MOVES], dtype=np.int64).reshape(len(GHOST_START_MOVES), -1)
+
+        #ghost behavior, see GhostAI
+        ai = GhostAI(level)
+        exits = np.frombuffer(bytes(pmap.exits), dtype=np.uint8)
+        self.__exits = (exits[:, None] >> np.arange(len(EXITS)) & 1).astype(bool)
+        self.__steps = np.array([(0, 0)] + [DIRECTIONS[action] for action in ACTIONS[1:]]).T # (dy, dx) of each action code
+        scatter = [ai.mode_at(loop) == SCATTER for loop in range(sum(loops or 0 for _, loops in MODE_SCHEDULE) + 1)]
+        self.__scatter_at = np.array(scatter, dtype=bool)
+        self.__corners = np.array([ai.corner(ghost) for ghost in level.ghosts], dtype=np.int64).reshape(-1, 2)
+        self.__targets = [TARGET_KINDS.get(type(ghost), PACMAN_TARGET) for ghost in level.ghosts]
+        self.__blinky = next((i for i, ghost in enumerate(level.ghosts) if ghost is ai.blinky), None)
+
+        #distances between the walkable cells, indexed by their index in the table
+        if distance_table is None:
+            distance_table = DistanceTable(level)
+        cells = len(distance_table.cells)
+        self.__cell_index = np.full(pmap.width*pmap.height, -1, dtype=np.int64)
+        self.__cell_index[[y*pmap.width + x for x, y in distance_table.cells]] = np.arange(cells)
+        self.__distance = np.frombuffer(distance_table.tables[0], dtype=np.uint16).reshape(cells, cells)
+
+        self.reset()
+
+    @property
+    def n(self):
+        return self.__n
+
+    def __id(self, x, y):
+        return y*self.__width + x
+
+    @staticmethod
+    def __action(move):
+        """Return the action of a (dy, dx) move"""
+        for action, direction in DIRECTIONS.items():
+            if direction == move:
+                return action
+
+    @staticmethod
+    def __build_moves(pmap):
+        """Return the (actions, cells) table of the cell reached from each cell
+
+        Pacman and the ghosts go through the portals of the map, see
+        Map.neighbor. Moves out of the grid are -1, the first row is staying
+        in place.
+        """
+        cells = pmap.height*pmap.width
+        moves = np.full((len(ACTIONS), cells), -1, dtype=np.int64)
+        moves[0] = np.arange(cells)
+        ids = np.arange(cells).reshape(pmap.height, pmap.width)
+
+        for action_code, action in enumerate(ACTIONS[1:], 1):
+            dy, dx = DIRECTIONS[action]
+            #adjacent cells first, then the few portals
+            rows = moves[action_code].reshape(pmap.height, pmap.width)
+            rows[max(-dy, 0):pmap.height - max(dy, 0), max(-dx, 0):pmap.width - max(dx, 0)] = \
+                ids[max(dy, 0):pmap.height + min(dy, 0), max(dx, 0):pmap.width + min(dx, 0)]
+            for (x, y, dy_, dx_), (x_, y_) in pmap.portals.items():
+                if (dy_, dx_) == (dy, dx):
+                    moves[action_code, y*pmap.width + x] = y_*pmap.width + x_
+
+        return moves
+
+    def __is_walkable(self, cells):
+        """Return True where the cell id is on the grid and walkable"""
+        return (cells >= 0) & self.walkable[np.maximum(cells, 0)]
+
+    def reset(self, mask=None):
+        """Start new games
+
+        Keyword Arguments:
+            mask {ndarray} -- (n,) boolean array of the games to reset, all of them if None (default: {None})
+        """
+        if mask is None:
+            n = self.__n
+            ghosts = len(self.__std_ghosts)
+            self.pellets = np.empty((n, len(self.__start_pellets)), dtype=np.uint8)
+            self.pellets_left = np.empty(n, dtype=np.int64)
+            self.pacman = np.empty(n, dtype=np.int64)
+            self.direction = np.empty(n, dtype=np.int64)
+            self.ghosts = np.empty((n, ghosts), dtype=np.int64)
+            self.occupancy = np.empty((n, len(self.__start_pellets)), dtype=np.uint16)
+            self.last_ghosts = np.empty((n, ghosts), dtype=np.int64)
+            self.heading = np.empty((n, ghosts), dtype=np.int64)
+            self.scatter = np.empty(n, dtype=bool)
+            self.ghosts_eaten = np.empty((n, ghosts), dtype=bool)
+            self.eaten_ghost = np.empty(n, dtype=np.int64)
+            self.bonus_points = np.empty((n, len(self.__bonuses)), dtype=np.int64)
+            self.points = np.empty(n, dtype=np.int64)
+            self.life = np.empty(n, dtype=np.int64)
+            self.loop = np.empty(n, dtype=np.int64)
+            self.last_loop = np.empty(n, dtype=np.int64)
+            self.death = np.empty(n, dtype=bool)
+            self.power_capsule = np.empty(n, dtype=bool)
+            self.flash = np.empty(n, dtype=bool)
+            self.done = np.empty(n, dtype=bool)
+            mask = np.ones(n, dtype=bool)
+
+        self.pellets[mask] = self.__start_pellets
+        self.pellets_left[mask] = np.count_nonzero(self.__start_pellets)
+        self.pacman[mask] = self.__std_pacman
+        self.direction[mask] = 0
+        self.ghosts[mask] = self.__std_ghosts
+        self.occupancy[mask] = 0
+        games = np.flatnonzero(mask)
+        np.add.at(self.occupancy, (games[:, None], self.ghosts[games]), 1)
+        self.last_ghosts[mask] = 0
+        self.heading[mask] = 0
+        self.scatter[mask] = self.__scatter_at[0]
+        self.ghosts_eaten[mask] = False
+        self.eaten_ghost[mask] = 0
+        self.bonus_points[mask] = self.__bonus_points
+        self.points[mask] = 0
+        self.life[mask] = PACMAN_LIFE
+        self.loop[mask] = 0
+        self.last_loop[mask] = 0
+        self.death[mask] = False
+        self.power_capsule[mask] = False
+        self.flash[mask] = False
+        self.done[mask] = False
+
+    def __reset_power_capsule(self, mask):
+        """Stop the pacman ate power capsule event of the masked games"""
+        self.power_capsule[mask] = False
+        self.flash[mask] = False
+        self.eaten_ghost[mask] = 0
+        self.last_loop[mask] = 0
+        self.ghosts_eaten[mask] = False
+
+    def __move_pacman(self, live, actions):
+        """Update Pacman directions from the actions and move them one step"""
+        #implement the player direction
+        wanted = self.__moves[actions, self.pacman]
+        turn = live & (actions != 0) & self.__is_walkable(wanted)
+        self.direction[turn] = actions[turn]
+
+        #auto move
+        moving = live & (self.direction != 0)
+        self.pacman[moving] = self.__moves[self.direction[moving], self.pacman[moving]]
+
+        #stop if hit wall
+        ahead = self.__moves[self.direction, self.pacman]
+        self.direction[moving & ~self.__is_walkable(ahead)] = 0
+
+    def __eat(self, live):
+        """Implement point gains of the cells Pacman stand on"""
+        games = np.arange(self.__n)
+        pellet = np.where(live, self.pellets[games, self.pacman], NO_PELLET)
+        eaten = pellet != NO_PELLET
+        capsule = pellet == POWER_CAPSULE_PELLET
+
+        self.pellets[games[eaten], self.pacman[eaten]] = NO_PELLET
+        self.pellets_left -= eaten
+        self.points += np.where(pellet == DOT_PELLET, DOT_POINTS, 0) + np.where(capsule, POWER_CAPSULE_POINTS, 0)
+        self.power_capsule |= capsule
+
+        # pacman eats bonus event
+        bonus = live[:, None] & (self.pacman[:, None] == self.__bonuses)
+        self.points += (self.bonus_points*bonus).sum(axis=1)
+        self.bonus_points[bonus] = 0
+
+    def __meet_ghosts(self, live):
+        """Implement Pacman die or eat the ghosts they meet"""
+        meet = live[:, None] & (self.ghosts == self.pacman[:, None])
+
+        #pacman death
+        death = meet.any(axis=1) & ~self.power_capsule & ~self.death
+        self.death |= death
+        self.life -= death
+
+        #pacman eats ghosts, the k-th ghost eaten is worth k*GHOST_POINTS
+        eaten = meet & self.power_capsule[:, None] & ~self.ghosts_eaten
+        count = eaten.sum(axis=1)
+        self.points += GHOST_POINTS*(count*self.eaten_ghost + count*(count + 1)//2)
+        self.eaten_ghost += count
+        self.ghosts_eaten |= eaten
+
+        #if eaten all ghosts
+        self.__reset_power_capsule(self.power_capsule & self.ghosts_eaten.all(axis=1))
+
+    def __update_power_capsule(self, live):
+        """Handle the timing of the pacman ate power capsule event"""
+        powered = live & self.power_capsule
+        start = powered & (self.last_loop == 0)
+        self.last_loop[start] = self.loop[start]
+        elapsed = self.loop - self.last_loop
+
+        # change to ghosts flashing scene
+        flash = powered & ~self.flash & (elapsed > POWER_CAPSULE_LOOPS)
+        #stop pacman ate capsule event
+        end = powered & self.flash & (elapsed > FLASH_LOOPS)
+
+        self.flash |= flash
+        self.last_loop[flash] = self.loop[flash]
+        self.__reset_power_capsule(end)
+
+    def __distances(self, cells):
+        """Return the (n, ...) distances from Pacman to the cell ids of each game"""
+        pacman = self.__cell_index[self.pacman].reshape((-1,) + (1,)*(cells.ndim - 1))
+        return self.__distance[pacman, self.__cell_index[cells]].astype(np.int64)
+
+    def __chase_target(self, i, ghost):
+        """Return the (n, 2) chase target (x, y) of the i-th ghost on the cell ids 'ghost', and the (n,) games it follows the distances to Pacman in"""
+        width = self.__width
+        x, y = self.pacman % width, self.pacman//width
+        dy, dx = self.__steps[:, self.direction]
+        kind = self.__targets[i]
+
+        if kind == PINKY_TARGET:
+            return np.stack([x + PINKY_AHEAD*dx, y + PINKY_AHEAD*dy], axis=1), self.direction == 0
+        if kind == INKY_TARGET:
+            x, y = x + INKY_AHEAD*dx, y + INKY_AHEAD*dy
+            if self.__blinky is not None:
+                blinky = self.ghosts[:, self.__blinky]
+                x, y = 2*x - blinky % width, 2*y - blinky//width
+            return np.stack([x, y], axis=1), np.zeros(self.__n, dtype=bool)
+        if kind == CLYDE_TARGET:
+            return np.broadcast_to(self.__corners[i], (self.__n, 2)), self.__distances(ghost) > CLYDE_SHYNESS
+        return np.stack([x, y], axis=1), np.ones(self.__n, dtype=bool)
+
+    def __move_ghosts(self, live):
+        """Move the ghosts out of the cage, then after their target or away from Pacman while frightened
+
+        The ghosts spawned out of the cage follow their target from the first
+        loop. Each ghost takes one of the exits of its cell that is neither
+        the way back nor occupied by another ghost, or goes back if there is
+        none and stays in place if it can not, as Ghost.choices says. The
+        ghosts scatter to their corner or chase their target of
+        CHASE_TARGETS in turn as MODE_SCHEDULE says, and may turn back when
+        the mode changes. Frightened ghosts may turn back and take the exit
+        of the lowest flee potential, see FleeField.potential.
+        The ghosts move one after the other, each one vectorized over games.
+        The cells taken are read from the occupancy grid, kept up to date
+        move by move, so that a move costs the same whatever the number of
+        ghosts.
+        """
+        games = np.arange(self.__n)
+        width = self.__width
+
+        #ghost move out the cage
+        starting = live & (self.loop <= GHOST_START_LOOPS)
+        if starting.any():
+            actions = self.__start_moves[self.loop[starting] - 1]
+            started = games[starting, None]
+            np.subtract.at(self.occupancy, (started, self.ghosts[starting]), 1)
+            self.ghosts[starting] = self.__moves[actions, self.ghosts[starting]]
+            np.add.at(self.occupancy, (started, self.ghosts[starting]), 1)
+
+        #the way back is open when the mode changes
+        started = live & (self.loop > GHOST_START_LOOPS)
+        frightened = self.power_capsule
+        loop = np.clip(self.loop - GHOST_START_LOOPS, 0, len(self.__scatter_at) - 1)
+        scatter = self.__scatter_at[loop]
+        chasing = (started | (live & ~self.__caged.all())) & ~frightened
+        changed = chasing & (scatter != self.scatter)
+        self.scatter[chasing] = scatter[chasing]
+
+        for i in range(self.ghosts.shape[1]):
+            moving = started | (live & ~self.__caged[i])
+            if not moving.any():
+                continue
+            self.heading[changed & moving, i] = 0
+            heading = np.where(frightened, 0, self.heading[:, i])
+
+            #exits other than the way back and the cells of the other ghosts, or the way back if none
+            ghost = self.ghosts[:, i].copy()
+            exits = self.__moves[1:, ghost].T # (n, 4)
+            open_ = self.__exits[ghost]
+            back = open_ & (np.arange(1, len(ACTIONS)) == np.array(REVERSE_ACTIONS)[heading][:, None])
+            legal = open_ & ~back & (self.occupancy[games[:, None], np.maximum(exits, 0)] == 0)
+            legal = np.where(legal.any(axis=1)[:, None], legal, back)
+            distances = self.__distances(exits)
+
+            #the frightened ghosts run away down the flee potential, the ties are broken at random
+            flee = frightened & moving
+            if flee.any():
+                ahead = np.maximum(exits, 0)
+                around = self.__exits[ahead] # (n, 4, 4)
+                counts = around.sum(axis=2)
+                sums = (self.__distances(self.__moves[1:, ahead].transpose(1, 2, 0))*around).sum(axis=2)
+                potential = -(FLEE_SMOOTHING*distances + FLEE_SMOOTHING//np.maximum(counts, 1)*sums)
+                potential = potential + self.__random.random(exits.shape)
+                flee_choice = np.argmin(np.where(legal, potential, np.inf), axis=1)
+
+            #the other ones go toward their target, in a straight line or along a shortest walk to Pacman
+            target, follow = self.__chase_target(i, ghost)
+            target = np.where(scatter[:, None], self.__corners[i], target)
+            score = (target[:, :1] - exits % width)**2 + (target[:, 1:] - exits//width)**2
+            score = np.where((follow & ~scatter)[:, None], distances, score)
+            choice = np.argmin(np.where(legal, score, np.iinfo(np.int64).max), axis=1)
+            if flee.any():
+                choice = np.where(flee, flee_choice, choice)
+
+            moved = moving & legal.any(axis=1)
+            target = exits[games, choice]
+            self.last_ghosts[moved, i] = ghost[moved]
+            self.heading[moved, i] = choice[moved] + 1
+            self.ghosts[:, i] = np.where(moved, target, ghost)
+            self.occupancy[games, ghost] -= 1
+            self.occupancy[games, self.ghosts[:, i]] += 1
+
+    def step(self, actions=None):
+        """Advance every running game by one loop
+
+        Keyword Arguments:
+            actions {ndarray} -- (n,) action codes, index of the direction in ACTIONS (default: {None})
+
+        Raises:
+            ValueError: raise if 'actions' is not a (n,) array of action codes
+
+        Returns:
+            tuple -- (n,) points gained during the loop and (n,) games over
+        """
+        #validate input
+        if actions is None:
+            actions = np.zeros(self.__n, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self.__n,):
+            raise ValueError("\'actions\' must be an array of n action codes")
+        if ((actions < 0) | (actions >= len(ACTIONS))).any():
+            raise ValueError("\'actions\' must be index of a direction in ACTIONS")
+
+        live = ~self.done
+        points = self.points.copy()
+
+        #return pacman to standard position after its death
+        respawn = live & self.death
+        self.pacman[respawn] = self.__std_pacman
+        self.direction[respawn] = 0
+        self.death[respawn] = False
+
+        #loop counter
+        self.loop += live
+
+        self.__move_pacman(live, actions)
+        self.__eat(live)
+
+        #check if game is end
+        cleared = live & (self.pellets_left == 0) & (self.bonus_points == 0).all(axis=1)
+        self.done |= cleared
+        live &= ~cleared
+
+        self.__meet_ghosts(live)
+
+        #if drain out of life, end game
+        dead = live & (self.life == 0)
+        self.done |= dead
+        live &= ~dead
+
+        self.__update_power_capsule(live)
+        self.__move_ghosts(live)
+
+        return self.points - points, self.done.copy()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import array
+import collections
+from simulator import *
+
+UNREACHABLE = 0xFFFF #distance between two cells that are not connected
+NO_MOVE = 0xFF #next hop of a cell toward itself or toward a cell it can not reach
+
+#direction codes of the next hop table, the index of the direction in MOVES
+MOVES = list(DIRECTIONS)
+
+
+class DistanceTable:
+    """All pairs distances and next hops between the walkable cells of a level
+
+    Every walkable cell gets an index, the distance and the first move of a
+    shortest walk from each cell to each other cell are stored in flat uint16
+    and uint8 arrays, so that a query is a single array lookup. Walks follow
+    the moves of Pacman, wrap-around tunnel included, so that a distance
+    from a cell to another may differ from the way back. The tables take
+    3 bytes per pair of cells, a few hundred kilobytes for a classic maze.
+
+    Arguments:
+        level {Level} - a Level object the tables are built for
+
+    Keyword Arguments:
+        tables {tuple} - distance and next hop tables already built for the level, e.g.
+            read from a level cache, built if None (default: {None})
+
+    Raises:
+        TypeError: raise if 'level' is not a Level object
+        ValueError: raise if the level has more than UNREACHABLE walkable cells
+        ValueError: raise if 'tables' do not fit the walkable cells of the level
+
+    Attributes:
+        __width - store the width of the map
+        __index - store the index of the cell of each cell id, -1 if it can not be walked on
+        __cells - store the (x, y) position of the cell of each index
+        __distance - store the distance from the cell i to the cell j at i*len(cells) + j
+        __next_hop - store the direction code of the first move from the cell i to the cell j at i*len(cells) + j
+    """
+
+    def __init__(self, level, tables=None):
+        #validate input
+        if not isinstance(level, Level):
+            raise TypeError("\'level\' must be a Level object")
+
+        pmap = level.pmap
+        self.__width = pmap.width
+        self.__cells = [(x, y) for y in range(pmap.height) for x in range(pmap.width) if pmap.is_walkable(x, y)]
+        if len(self.__cells) >= UNREACHABLE:
+            raise ValueError("the level has too many walkable cells")
+
+        self.__index = array.array("l", [-1])*(pmap.width*pmap.height)
+        for i, (x, y) in enumerate(self.__cells):
+            self.__index[y*pmap.width + x] = i
+
+        if tables is None:
+            self.__build(self.__build_moves(pmap))
+        else:
+            self.__distance, self.__next_hop = tables
+            if len(self.__distance) != len(self.__cells)**2 or len(self.__next_hop) != len(self.__cells)**2:
+                raise ValueError("\'tables\' must hold a value per pair of walkable cells")
+
+    def __build_moves(self, pmap):
+        """Return the (direction code, index) pairs of the cells reached from each cell
+
+        The moves are the exits of the cells in Map.exits, through the
+        portals of the map as Pacman goes, see Map.neighbor.
+        """
+        exits = pmap.exits
+        moves = []
+
+        for x, y in self.__cells:
+            moves_ = []
+            for code, action in enumerate(MOVES):
+                dy, dx = DIRECTIONS[action]
+                if exits[y*pmap.width + x] & EXIT_BIT[(dy, dx)]:
+                    x_, y_ = pmap.neighbor(x, y, dy, dx)
+                    moves_.append((code, self.__index[y_*pmap.width + x_]))
+            moves.append(moves_)
+
+        return moves
+
+    def __build(self, moves):
+        """Fill the tables with a breadth first search from each cell"""
+        n = len(self.__cells)
+        self.__distance = array.array("H", [UNREACHABLE])*(n*n)
+        self.__next_hop = array.array("B", [NO_MOVE])*(n*n)
+        distance = self.__distance
+        next_hop = self.__next_hop
+
+        for source in range(n):
+            row = source*n
+            distance[row + source] = 0
+
+            #the first move of the walk is handed down to every cell reached through it
+            queue = collections.deque()
+            for code, cell in moves[source]:
+                if distance[row + cell] == UNREACHABLE:
+                    distance[row + cell] = 1
+                    next_hop[row + cell] = code
+                    queue.append(cell)
+
+            while queue:
+                cell = queue.popleft()
+                distance_ = distance[row + cell] + 1
+                code = next_hop[row + cell]
+                for _, neighbor in moves[cell]:
+                    if distance[row + neighbor] == UNREACHABLE:
+                        distance[row + neighbor] = distance_
+                        next_hop[row + neighbor] = code
+                        queue.append(neighbor)
+
+    @property
+    def cells(self):
+        return self.__cells
+
+    @property
+    def tables(self):
+        """Distance and next hop tables, flat arrays indexed by i*len(cells) + j"""
+        return self.__distance, self.__next_hop
+
+    def index(self, x, y):
+        """Return the index of the cell (x, y), -1 if it can not be walked on"""
+        if x < 0 or y < 0 or x >= self.__width:
+            return -1
+        id_ = y*self.__width + x
+        if id_ >= len(self.__index):
+            return -1
+        return self.__index[id_]
+
+    def distance(self, x, y, x_, y_):
+        """Return the number of moves from the cell (x, y) to the cell (x_, y_)
+
+        Returns:
+            int -- number of moves, UNREACHABLE if there is no walk between the cells
+        """
+        i = self.index(x, y)
+        j = self.index(x_, y_)
+        if i == -1 or j == -1:
+            return UNREACHABLE
+        return self.__distance[i*len(self.__cells) + j]
+
+    def next_move(self, x, y, x_, y_):
+        """Return the first direction of a shortest walk from the cell (x, y) to the cell (x_, y_)
+
+        Returns:
+            str -- one of UP, DOWN, LEFT, RIGHT, None if the cells are the same or not connected
+        """
+        i = self.index(x, y)
+        j = self.index(x_, y_)
+        if i == -1 or j == -1:
+            return None
+        code = self.__next_hop[i*len(self.__cells) + j]
+        if code == NO_MOVE:
+            return None
+        return MOVES[code]
+
+
+class TableField:
+    """Distances of the cells of a level to a source cell read from a DistanceTable
+
+    It answers as DistanceField does, with a lookup in the row of the
+    source instead of a search, so that a ghost costs the same whatever its
+    distance to Pacman.
+
+    Arguments:
+        table {DistanceTable} - distance table of the level
+
+    Attributes:
+        __row - store the offset of the row of the source in the distance table, -1 if it can not be walked on
+    """
+
+    def __init__(self, table):
+        self.__table = table
+        self.__distance = table.tables[0]
+        self.__row = -1
+        self.__source = None
+
+    @property
+    def source(self):
+        return self.__source
+
+    def set_source(self, x, y):
+        """Measure the distances from the cell (x, y) from now on"""
+        if self.__source == (x, y):
+            return
+        self.__source = (x, y)
+        i = self.__table.index(x, y)
+        self.__row = i*len(self.__table.cells) if i != -1 else -1
+
+    def distance(self, x, y):
+        """Return the number of moves between the source and the cell (x, y), UNREACHED if none"""
+        i = self.__table.index(x, y)
+        if i == -1 or self.__row == -1:
+            return UNREACHED
+        distance = self.__distance[self.__row + i]
+        return UNREACHED if distance == UNREACHABLE else distance
@@ -3,9 +3,24 @@
 import pathlib
 import curses
 from model import *
+from scene import *
+from simulator import *
+from scheduler import *
 
 BORDER_SYMBOL = ["═", "║", "╔", "╗", "╚", "╝", "*", 'x' '-']
 BORDERS = ['═', '║', '╔', '╗', '╚', '╝', 'x' '-']
+STANDING_START_TIME = 2.4 #seconds the standing start announcement lasts
+DEATH_TIME = 4 #seconds the death scene lasts
+KEYS = {
+    ord('w'): UP,
+    curses.KEY_UP: UP,
+    ord('s'): DOWN,
+    curses.KEY_DOWN: DOWN,
+    ord('a'): LEFT,
+    curses.KEY_LEFT: LEFT,
+    ord('d'): RIGHT,
+    curses.KEY_RIGHT: RIGHT
+}
 
 class PacmanGameEngine:
     """The class handles game flow
@@ -14,7 +29,7 @@ class PacmanGameEngine:
         pass
 
     @staticmethod
-    def __set_up(level_number):
+    def _set_up(level_number):
         """Function to generate required object
         
         Arguments:
@@ -39,11 +54,15 @@ class PacmanGameEngine:
         
         #setting up cursor
         curses.curs_set(0)
+        curses.noecho()
         window.nodelay(1)
         curses.cbreak(1)
         window.keypad(1)
 
-        return window, level, Scene(window, level)
+        #register the colors of the session
+        colors = ColorRegistry()
+
+        return window, level, Scene(window, level, colors)
 
     @staticmethod
     def _tear_down(window):
@@ -63,18 +82,39 @@ class PacmanGameEngine:
         window.refresh()
 
     @staticmethod
-    def __run(window, level, scene):
+    def _update_scene(scene, state):
+        """Function to copy the game state into the scene
+        
+        Arguments:
+            scene {Scene} -- a Scene instance
+            state {GameState} -- a GameState instance
+        """
+        scene.points = state.points
+        scene.life = state.life
+        scene.power_capsule = state.power_capsule
+        scene.flash = state.flash
+        scene.ghosts_eaten = list(state.ghosts_eaten)
+
+    @staticmethod
+    def __run(window, level, scene, scheduler):
         """Function to handle game loop
+
+        The game loops run at the logic rate of the scheduler and the scene
+        is rendered at its render rate, the keys pressed in between are read
+        on every pass so that the input latency stays bounded. Animations
+        are driven by timers and the scheduler clock instead of sleeping.
         
         Arguments:
             window {object} -- window object of curses library
             level {Level} -- a Level instance
             scene {Scene} -- a Scene instance
+            scheduler {Scheduler} -- a Scheduler instance
         
         Raises:
             TypeError: raise if window is not an object
             TypeError: raise if Level is not an Level instance
             TypeError: raise if Scene it not an Scene instance
+            TypeError: raise if scheduler is not a Scheduler instance
         """
         #validate input
         if not isinstance(window, object):
@@ -83,309 +123,83 @@ class PacmanGameEngine:
             raise TypeError("\'level\' must be a Level object")
         if not isinstance(scene, Scene):
             raise TypeError("\'scene\' must be a Scene object")
+        if not isinstance(scheduler, Scheduler):
+            raise TypeError("\'scheduler\' must be a Scheduler object")
 
         #initialize object
-        pacman = level.pacman
-        pmap = level.pmap
-        ghosts = level.ghosts
-        bonuses = level.bonuses 
-        point = 0 # point gains by player
-        std_x = pacman.x #default pacman x ordinate
-        std_y = pacman.y #default pacman y ordinate
-        main_loop = 0 # count number of main loop gone
-        last_loop = 0 # store last point that an event trigger
-        eaten_ghost = 0 #number of ghosts pacman has eaten after eating powercapsule
-        up = False # pacman move up direction
-        down = False # pacman move down direction
-        left = False # pacman move left direction
-        right = False # pacman move right direction
+        simulator = Simulator(level)
+        state = simulator.state
+        action = None # last direction pressed by the player
 
         #display standing start anouncement
-        loop = 0 #loop counter
         scene.standing_start_announcement = True
-        
-        while True:
-            #display the scene
-            scene.render()
-
-            #loop controller
-            if loop == 5:
-                scene.standing_start_announcement = False
-                break
-
-            loop += 1 # standing start announcement loop counter
+        animation = Timer(STANDING_START_TIME, scheduler.clock)
 
         #game loop
         while True:
             
-            #loop counter 
-            main_loop += 1
-            
             #implement the player direction
-            button = 0
             button = window.getch()
-            
-            #implement quit button
-            if button == ord('q'):
-                break
-            
-            #implement move button
-            if button == ord('w') or button == curses.KEY_UP:
-                try:
-                    if pacman.y - 1 < 0:
-                        raise Exception
-                    if pmap.grid[pacman.y-1][pacman.x] in BORDERS:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    up = True
-                    down = False
-                    left = False
-                    right = False
-
-            if button == ord('s') or button == curses.KEY_DOWN:
-                try:
-                    if pmap.grid[pacman.y+1][pacman.x] in BORDERS:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    up = False
-                    down = True
-                    left = False
-                    right = False
-
-            if button == ord('d') or button == curses.KEY_RIGHT:
-                try:
-                    if pmap.grid[pacman.y][pacman.x+1] in BORDERS:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    up = False
-                    down = False
-                    left = True
-                    right = False
-
-            if button == ord('a') or button == curses.KEY_LEFT:
-                try:
-                    if pacman.x - 1 < 0:
-                        raise Exception
-                    if pmap.grid[pacman.y][pacman.x-1] in BORDERS:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    up = False
-                    down = False
-                    left = False
-                    right = True
-
-            #auto move
-            if up == True:
-                pacman.set_direction(-1, 0)
-            if down == True:
-                pacman.set_direction(1, 0)
-            if left == True:
-                pacman.set_direction(0, 1)
-            if right == True:
-                pacman.set_direction(0, -1)
-
-            #stop if hit wall
-            if up == True and pmap.grid[pacman.y-1][pacman.x] in BORDERS:
-                up = False
-            if down == True and pmap.grid[pacman.y+1][pacman.x] in BORDERS:
-                down = False
-            if left == True and pmap.grid[pacman.y][pacman.x+1] in BORDERS:
-                left = False
-            if right == True and pmap.grid[pacman.y][pacman.x-1] in BORDERS:
-                right = False
-            
-            #implement point gains
-            #gain 10 points per dot
-            if pmap.grid[pacman.y][pacman.x] == '·':
-                pmap.grid[pacman.y][pacman.x] = ' '
-                point += 10
-
-            #gain 20 points per power capsule
-            if pmap.grid[pacman.y][pacman.x] == '•':
-                pmap.grid[pacman.y][pacman.x] = ' '
-                point += 20
-                scene.power_capsule = True
-
-            # pacman eats bonus event
-            if pacman.x == bonuses.x and pacman.y == bonuses.y:
-                point += bonuses.points
-                bonuses.points = 0
-
-            #update points
-            scene.points = point
-
-            #check if game is end
-            present_capsule = False
-            for y in range(pmap.height):
-                for x in range(pmap.width):
-                    if pmap.grid[y][x] == '·': #if there are some dot
-                        present_capsule = True
-                    if pmap.grid[y][x] == '•': #if there are some power capsule
-                        present_capsule = True
-
-            if not present_capsule and bonuses.points == 0: #end game if no points left
-                break
-            
-            #implememt pacman ate power capsule event
-            if not scene.power_capsule: # if not eat power capsule yet
-                #pacman death
-                if pacman.x == ghosts[0].x and pacman.y == ghosts[0].y:
-                    scene.death = True
-                if pacman.x == ghosts[1].x and pacman.y == ghosts[1].y:
-                    scene.death = True
-                if pacman.x == ghosts[2].x and pacman.y == ghosts[2].y:
-                    scene.death = True
-                if pacman.x == ghosts[3].x and pacman.y == ghosts[3].y:
-                    scene.death = True
-
-            else: #if eat power capsule
-                #pacman eats ghosts
-                if pacman.x == ghosts[0].x and pacman.y == ghosts[0].y and not scene.blinky_ate:
-                    eaten_ghost += 1 
-                    scene.blinky_ate = True 
-
-                if pacman.x == ghosts[1].x and pacman.y == ghosts[1].y and not scene.pinky_ate:
-                    eaten_ghost += 1 
-                    scene.pinky_ate = True   
-
-                if pacman.x == ghosts[2].x and pacman.y == ghosts[2].y and not scene.inky_ate:
-                    eaten_ghost += 1
-                    scene.inky_ate = True 
-
-                if pacman.x == ghosts[3].x and pacman.y == ghosts[3].y and not scene.clyde_ate:
-                    eaten_ghost += 1
-                    scene.clyde_ate = True
-
-
-                #gain points
-                if eaten_ghost > 0:
-                    #if ate ghost, gain points
-                    scene.points += eaten_ghost*200 
-
-                    #if eaten all ghosts 
-                    if eaten_ghost == 4:
-                        eaten_ghost = 0
-                        last_loop = main_loop
-                        scene.power_capsule = False
-                        scene.flash = False
-                        scene.blinky_ate = False
-                        scene.pinky_ate = False
-                        scene.inky_ate = False
-                        scene.clyde_ate = False
-
-            #break death scene
-            if scene.death == True:
-                loop = 0 #loop counter
-                while True:
-
-                    scene.render()
-                    loop += 1 # loop counter
-                    
-                    # if 20 loops have gone, break
-                    if loop == 20:
-                        break
-                
-                #return pacman to standard position
+            while button != -1:
+                #implement quit button
+                if button == ord('q'):
+                    return
+                action = KEYS.get(button, action)
+                button = window.getch()
+
+            #end standing start announcement or death scene
+            if animation is not None and animation.done:
+                animation = None
+                scene.standing_start_announcement = False
                 scene.death = False
-                scene.life -= 1 # lost 1 life
-                pacman._x = std_x # back to default position
-                pacman._y = std_y # back to default position
 
-            #if drain out of life, end game
-            if scene.life == 0:
-                break
+                #end game if drain out of life
+                if state.over:
+                    break
 
             #play ##############################
-            pacman.play(scene)
+            for _ in range(scheduler.logic_steps()):
+                if animation is not None:
+                    continue
 
-            
-            #start AI ############################
+                events = simulator.step(action)
+                action = None
+                PacmanGameEngine._update_scene(scene, state)
 
-            #handle pacman eat power capsule event
-            if scene.power_capsule:
-                if last_loop == 0:
-                    last_loop = main_loop
-                
-                # change to ghosts flashing scene
-                if main_loop - last_loop > 40:
-                    scene.flash = True
-                    last_loop = 0
+                #start death scene
+                if PACMAN_DEATH in events:
+                    scene.death = True
+                    animation = Timer(DEATH_TIME, scheduler.clock)
 
-            #ghosts flashing scene
-            if scene.power_capsule and scene.flash:
-                if last_loop == 0:
-                    last_loop = main_loop
+                #the steps left to catch up are dropped once the game is over
+                if state.over:
+                    break
 
-                #stop pacman ate capsule event
-                if main_loop - last_loop > 7:
-                    last_loop = 0
-                    #reset event status
-                    scene.power_capsule = False
-                    scene.flash = False
-                    scene.blinky_ate = False
-                    scene.pinky_ate = False
-                    scene.inky_ate = False
-                    scene.clyde_ate = False
+            #end game if no points left
+            if state.over and animation is None:
+                break
 
-            #implement ghosts are eaten envent
-            if main_loop > 5:
-                ghosts[0].play(scene, level)
-                ghosts[1].play(scene, level)
-                ghosts[2].play(scene, level)
-                ghosts[3].play(scene, level)
-            
-            else:# start ghost
-                #ghost move out the cage
-                if main_loop == 1:
-                    ghosts[0].set_direction(0, -1)
-                    ghosts[1].set_direction(0, 1)
-                    ghosts[2].set_direction(0, 1)
-                    ghosts[3].set_direction(0, -1)
-                if main_loop == 2:
-                    ghosts[0].set_direction(-1, 0)
-                    ghosts[1].set_direction(-1, 0)
-                    ghosts[2].set_direction(-1, 0)
-                    ghosts[3].set_direction(-1, 0)
-                if main_loop == 3:
-                    ghosts[0].set_direction(-1, 0)
-                    ghosts[1].set_direction(-1, 0)
-                    ghosts[2].set_direction(-1, 0)
-                    ghosts[3].set_direction(-1, 0)
-                if main_loop == 4:
-                    ghosts[0].set_direction(-1, 0)
-                    ghosts[1].set_direction(-1, 0)
-                    ghosts[2].set_direction(0, -1)
-                    ghosts[3].set_direction(0, 1)
-                if main_loop == 5:
-                    ghosts[0].set_direction(0, 1)
-                    ghosts[1].set_direction(0, -1)
-                    ghosts[2].set_direction(0, -1)
-                    ghosts[3].set_direction(0, 1)
+            if scheduler.render_due():
+                scene.time = scheduler.time
+                scene.render()
 
-            #clean up scene
-            curses.napms(200)
-            window.clear()
-            window.refresh()
+            scheduler.wait()
 
-    def start(self, level_number):
+    def start(self, level_number, logic_rate=LOGIC_RATE, render_rate=RENDER_RATE):
         """Function to beginning the game
         
         Arguments:
             level_number {int} -- level of the game
+
+        Keyword Arguments:
+            logic_rate {float} -- game loops per second, the speed of the game (default: {LOGIC_RATE})
+            render_rate {float} -- frames per second (default: {RENDER_RATE})
         """
         #setting up curses library
-        window, level, scene = self.__set_up(level_number)
+        window, level, scene = self._set_up(level_number)
 
         #start the game
-        self.__run(window, level, scene)
+        self.__run(window, level, scene, Scheduler(logic_rate, render_rate))
 
         #end game
         self._tear_down(window)
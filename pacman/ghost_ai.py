@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+
+import array
+import collections
+import heapq
+from model import *
+
+CHASE = "chase"
+SCATTER = "scatter"
+#modes of the ghosts and the number of loops they last, the last mode lasts until the end of the level
+MODE_SCHEDULE = [(SCATTER, 35), (CHASE, 100), (SCATTER, 35), (CHASE, 100), (SCATTER, 25), (CHASE, 100),
+    (SCATTER, 25), (CHASE, None)]
+UNREACHED = 0xFFFFFFFF #distance of a cell the field does not reach, longer than any walk on a map of less than 2**32 cells
+PINKY_AHEAD = 4 #cells ahead of Pacman Pinky aims at
+INKY_AHEAD = 2 #cells ahead of Pacman Inky mirrors Blinky around
+CLYDE_SHYNESS = 8 #distance to Pacman under which Clyde goes back to its corner
+FLEE_BUDGET = 1024 #cells the flee field may repair per loop
+FLEE_SMOOTHING = 12 #multiple of every number of exits of a cell, keeps the flee potential an integer
+#(right, bottom) corner of the map each kind of ghost scatters to
+SCATTER_CORNERS = {
+    Blinky: (True, False),
+    Pinky: (False, False),
+    Inky: (True, True),
+    Clyde: (False, True)
+}
+
+
+class DistanceField:
+    """Distances of the cells of a map to a source cell, grown on demand
+
+    The field is a breadth first search over Map.steps that only goes as far
+    as the farthest cell asked for, so that it costs as much as the area the
+    ghosts are spread over, whatever the size of the map. The cells are
+    stamped with the generation of the field, so that moving the source
+    does not clear the whole map.
+
+    Arguments:
+        pmap {Map} - map the distances are measured on
+
+    Attributes:
+        __distance - store the distance of each cell id, valid if its stamp is the generation
+        __stamp - store the generation that reached each cell id
+        __generation - store the number of times the source has been set
+        __queue - store the cell ids reached whose neighbors are not yet
+    """
+
+    def __init__(self, pmap):
+        self.__pmap = pmap
+        size = pmap.width*pmap.height
+        self.__distance = array.array("I", [UNREACHED])*size
+        self.__stamp = array.array("I", [0])*size
+        self.__generation = 0
+        self.__queue = collections.deque()
+        self.__source = None
+
+    @property
+    def source(self):
+        return self.__source
+
+    def set_source(self, x, y):
+        """Measure the distances from the cell (x, y) from now on"""
+        if self.__source == (x, y):
+            return
+        self.__source = (x, y)
+        self.__generation += 1
+        id_ = y*self.__pmap.width + x
+        self.__stamp[id_] = self.__generation
+        self.__distance[id_] = 0
+        self.__queue.clear()
+        self.__queue.append(id_)
+
+    def distance(self, x, y):
+        """Return the number of moves between the source and the cell (x, y), UNREACHED if none"""
+        width = self.__pmap.width
+        if x < 0 or y < 0 or x >= width or y >= self.__pmap.height:
+            return UNREACHED
+        target = y*width + x
+        stamp, distance, generation = self.__stamp, self.__distance, self.__generation
+        exits, queue = self.__pmap.exits, self.__queue
+        steps, portal_steps = self.__pmap.steps
+
+        #grow the search until the cell is reached
+        while stamp[target] != generation and queue:
+            id_ = queue.popleft()
+            distance_ = distance[id_] + 1
+            mask = exits[id_]
+            for step in (portal_steps[id_] if mask & PORTAL_EXITS else steps[mask]):
+                if stamp[id_ + step] != generation:
+                    stamp[id_ + step] = generation
+                    distance[id_ + step] = distance_
+                    queue.append(id_ + step)
+
+        return distance[target] if stamp[target] == generation else UNREACHED
+
+
+class FleeField:
+    """Distances of the cells of a map to Pacman, repaired around its moves within a budget per loop
+
+    The field is kept from loop to loop. When Pacman moves, its new cell
+    gets the distance 0 and the cells around the cells it left or entered
+    are marked dirty. Each update repairs at most 'budget' dirty cells, the
+    nearest to Pacman first: a cell takes one more than the least distance
+    of its neighbors, and its neighbors are marked dirty if it changes. A
+    move of Pacman changes a distance by one at most, so the cells the
+    budget has not reached yet are off by the number of moves behind, and
+    the ones near Pacman, those the ghosts flee from, are repaired first.
+    The cells no repair has reached yet are taken as far away.
+
+    Frightened ghosts descend the potential of a cell, its distance and the
+    mean distance of its neighbors inverted, so that a cell leading away
+    from Pacman through several ways is better than a dead end as far.
+
+    Arguments:
+        pmap {Map} - map the distances are measured on
+
+    Keyword Arguments:
+        budget {int} - number of dirty cells repaired per update (default: {FLEE_BUDGET})
+
+    Attributes:
+        __distance - store the distance of each cell id, UNREACHED until a repair reaches it
+        __dirty - store the heap of (distance, cell id) of the cells to repair
+        __queued - store the least key each cell id is in the heap with, UNREACHED if none
+        __source - store the cell id of Pacman
+    """
+
+    def __init__(self, pmap, budget=FLEE_BUDGET):
+        self.__pmap = pmap
+        self.__budget = budget
+        self.__size = pmap.width*pmap.height
+        self.__distance = array.array("I", [UNREACHED])*self.__size
+        self.__dirty = []
+        self.__queued = array.array("I", [UNREACHED])*self.__size
+        self.__source = None
+
+    def reset(self):
+        """Forget the distances, for a new game on the map"""
+        self.__distance = array.array("I", [UNREACHED])*self.__size
+        self.__dirty.clear()
+        self.__queued = array.array("I", [UNREACHED])*self.__size
+        self.__source = None
+
+    def __mark(self, key, id_):
+        """Mark the cell id dirty, to be repaired in the order of the key, the least one if marked again"""
+        if key < self.__queued[id_]:
+            self.__queued[id_] = key
+            heapq.heappush(self.__dirty, (key, id_))
+
+    def __neighbors(self, id_):
+        """Return the cell ids the exits of the cell id lead to"""
+        steps, portal_steps = self.__pmap.steps
+        mask = self.__pmap.exits[id_]
+        return [id_ + step for step in (portal_steps[id_] if mask & PORTAL_EXITS else steps[mask])]
+
+    def update(self, x, y):
+        """Follow Pacman on the cell (x, y) and spend the budget of the loop on the dirty cells"""
+        distance, dirty, queued = self.__distance, self.__dirty, self.__queued
+        id_ = y*self.__pmap.width + x
+        if id_ != self.__source:
+            #the cell left takes its distance from its neighbors again, the cell entered is the new source
+            if self.__source is not None:
+                self.__mark(0, self.__source)
+            self.__source = id_
+            distance[id_] = 0
+            for neighbor in self.__neighbors(id_):
+                if distance[neighbor] > 1:
+                    self.__mark(1, neighbor)
+
+        #repair the dirty cells nearest to Pacman first, within the budget
+        exits, size, source = self.__pmap.exits, self.__size, self.__source
+        steps, portal_steps = self.__pmap.steps
+        budget = self.__budget
+        while dirty and budget:
+            budget -= 1
+            key, id_ = heapq.heappop(dirty)
+            if key != queued[id_] or id_ == source: #marked again with a lesser key, or Pacman
+                continue
+            queued[id_] = UNREACHED
+            mask = exits[id_]
+            neighbors = portal_steps[id_] if mask & PORTAL_EXITS else steps[mask]
+            distance_ = UNREACHED
+            for step in neighbors:
+                if distance[id_ + step] < distance_:
+                    distance_ = distance[id_ + step]
+            distance_ += 1
+            if distance_ >= size: #no walk is that long, the cell is cut off from Pacman
+                distance_ = UNREACHED
+            if distance_ != distance[id_]:
+                #a decrease may lower the neighbors farther than one more, an increase may raise
+                #the neighbors that were one more
+                last, distance[id_] = distance[id_], distance_
+                key = min(distance_, last) + 1
+                for step in neighbors:
+                    if (distance[id_ + step] > key if distance_ < last else distance[id_ + step] == key) \
+                            and key < queued[id_ + step]:
+                        queued[id_ + step] = key
+                        heapq.heappush(dirty, (key, id_ + step))
+
+    def distance(self, x, y):
+        """Return the number of moves between Pacman and the cell (x, y) as repaired so far, UNREACHED if unknown"""
+        width = self.__pmap.width
+        if x < 0 or y < 0 or x >= width or y >= self.__pmap.height:
+            return UNREACHED
+        return self.__distance[y*width + x]
+
+    def potential(self, x, y):
+        """Return the flee potential of the cell (x, y), the lower the farther from Pacman
+
+        The potential is the distance of the cell plus the mean distance of
+        its neighbors, inverted and scaled by FLEE_SMOOTHING to stay an
+        integer.
+        """
+        distance = self.__distance
+        id_ = y*self.__pmap.width + x
+        neighbors = self.__neighbors(id_)
+        around = FLEE_SMOOTHING//len(neighbors)*sum(distance[neighbor] for neighbor in neighbors) if neighbors else 0
+        return -(FLEE_SMOOTHING*distance[id_] + around)
+
+
+def _pacman_target(ai, ghost, level, direction):
+    return None
+
+def _pinky_target(ai, ghost, level, direction):
+    dy, dx = direction
+    if (dy, dx) == (0, 0):
+        return None
+    return level.pacman.x + PINKY_AHEAD*dx, level.pacman.y + PINKY_AHEAD*dy
+
+def _inky_target(ai, ghost, level, direction):
+    dy, dx = direction
+    x, y = level.pacman.x + INKY_AHEAD*dx, level.pacman.y + INKY_AHEAD*dy
+    blinky = ai.blinky
+    if blinky is None:
+        return x, y
+    return 2*x - blinky.x, 2*y - blinky.y
+
+def _clyde_target(ai, ghost, level, direction):
+    if ai.field.distance(ghost.x, ghost.y) > CLYDE_SHYNESS:
+        return None
+    return ai.corner(ghost)
+
+#chase target of each kind of ghost, None to follow the distance field to Pacman
+CHASE_TARGETS = {
+    Blinky: _pacman_target,
+    Pinky: _pinky_target,
+    Inky: _inky_target,
+    Clyde: _clyde_target
+}
+
+
+class GhostAI:
+    """Chase and scatter behavior of the ghosts of a level
+
+    The ghosts scatter to their corner or chase Pacman in turn as
+    MODE_SCHEDULE says, and may turn back when the mode changes. In chase
+    mode each kind of ghost aims at its own target of CHASE_TARGETS. Blinky
+    follows a shortest walk to Pacman read from a field of the distances to
+    Pacman, shared by all the ghosts of the loop. The other targets are
+    aimed at in a straight line, as in the arcade game. Frightened ghosts
+    run away from Pacman down the potential of a FleeField, which follows
+    Pacman every loop they flee.
+
+    Arguments:
+        level {Level} - a Level object the ghosts play on
+
+    Keyword Arguments:
+        schedule {list} - (mode, loops) of the modes in turn (default: {MODE_SCHEDULE})
+        field {DistanceField} - field of the distances from Pacman, e.g. a TableField of the
+            DistanceTable of the level, a DistanceField of the map if None (default: {None})
+
+    Raises:
+        TypeError: raise if 'level' is not a Level object
+
+    Attributes:
+        field - store the field of the distances from Pacman
+        flee_field - store the FleeField frightened ghosts run away along
+        mode - store the current mode, CHASE or SCATTER
+        blinky - store the first Blinky of the level, Inky aims with it
+    """
+
+    def __init__(self, level, schedule=MODE_SCHEDULE, field=None):
+        #validate input
+        if not isinstance(level, Level):
+            raise TypeError("\'level\' must be a Level object")
+
+        self.__level = level
+        self.__schedule = schedule
+        self.field = DistanceField(level.pmap) if field is None else field
+        self.flee_field = FleeField(level.pmap)
+        self.mode = schedule[0][0]
+        self.blinky = next((ghost for ghost in level.ghosts if isinstance(ghost, Blinky)), None)
+
+    def reset(self):
+        """Start the schedule over, for a new game on the level"""
+        self.mode = self.__schedule[0][0]
+        self.flee_field.reset()
+
+    def mode_at(self, loop):
+        """Return the mode of the ghosts after a number of loops"""
+        for mode, loops in self.__schedule:
+            if loops is None or loop < loops:
+                return mode
+            loop -= loops
+        return self.__schedule[-1][0]
+
+    def corner(self, ghost):
+        """Return the corner a ghost scatters to"""
+        pmap = self.__level.pmap
+        right, bottom = SCATTER_CORNERS.get(type(ghost), (True, False))
+        return (pmap.width - 1 if right else 0), (pmap.height - 1 if bottom else 0)
+
+    def __score(self, ghost, target, dy, dx):
+        """Return how far the move (dy, dx) takes the ghost from its target, the lower the better"""
+        x, y = self.__level.pmap.neighbor(ghost.x, ghost.y, dy, dx)
+        if target is None:
+            return self.field.distance(x, y)
+        return (target[0] - x)**2 + (target[1] - y)**2
+
+    def move(self, ghosts, loop, direction):
+        """Move ghosts one step toward their target
+
+        Arguments:
+            ghosts {list} -- the ghosts to move
+            loop {int} -- number of loops since the ghosts left the cage
+            direction {tuple} -- (dy, dx) direction Pacman is moving to
+        """
+        level = self.__level
+        self.field.set_source(level.pacman.x, level.pacman.y)
+
+        #the way back is open when the mode changes
+        mode = self.mode_at(loop)
+        if mode != self.mode:
+            self.mode = mode
+            for ghost in ghosts:
+                ghost.heading = None
+
+        for ghost in ghosts:
+            choices = ghost.choices(level)
+            if len(choices) < 2: #no choice to score in a corridor
+                if choices:
+                    ghost.take_exit(level, *choices[0])
+                continue
+            if mode == SCATTER:
+                target = self.corner(ghost)
+            else:
+                target = CHASE_TARGETS.get(type(ghost), _pacman_target)(self, ghost, level, direction)
+            ghost.take_exit(level, *min(choices, key=lambda move: self.__score(ghost, target, *move)))
+
+    def flee(self, ghosts):
+        """Move frightened ghosts one step away from Pacman
+
+        Each ghost takes the exit of the lowest potential of the flee field,
+        and a random one of them if they are even. A frightened ghost may
+        turn back, so that it does not keep running into Pacman.
+
+        Arguments:
+            ghosts {list} -- the ghosts to move
+        """
+        level = self.__level
+        pmap = level.pmap
+        self.flee_field.update(level.pacman.x, level.pacman.y)
+
+        for ghost in ghosts:
+            ghost.heading = None
+            choices = ghost.choices(level)
+            if not choices:
+                continue
+
+            def potential(move):
+                return self.flee_field.potential(*pmap.neighbor(ghost.x, ghost.y, *move)), ghost.rng.random()
+            ghost.take_exit(level, *min(choices, key=potential))
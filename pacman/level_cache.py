@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import hashlib
+import mmap
+import os
+import struct
+from distance_table import *
+
+CACHE_VERSION = 2 #bump when the layout of the cache or the compiled data changes
+CACHE_MAGIC = b"PACMANLC"
+CACHE_EXTENSION = ".cache"
+
+#magic, version, digest of the sources, width, height, byte length of the symbols, walkable cells
+HEADER = struct.Struct("<8sH32sIIII")
+
+
+def _align(offset, size=8):
+    """Return the offset rounded up to a multiple of size"""
+    return (offset + size - 1)//size*size
+
+def source_digest(map_level):
+    """Return the SHA-256 digest of the .rle and .json sources of a level
+
+    Arguments:
+        map_level {str} -- path of the level files without extension, e.g. ./map/level1
+    """
+    digest = hashlib.sha256()
+    for extension in [".rle", ".json"]:
+        with open(map_level + extension, "rb") as file:
+            digest.update(file.read())
+        digest.update(b"\0")
+    return digest.digest()
+
+
+class CompiledLevel:
+    """A Level with its map and distance tables loaded from a compiled cache
+
+    The prettified grid and the distance tables of levelN are stored in
+    map/levelN.cache next to the sources. The cache is keyed by the digest
+    of levelN.rle and levelN.json and by CACHE_VERSION, it is rebuilt when
+    one of them changes. The tables are memory mapped, so that processes
+    loading the same level share them through the page cache. The cell and
+    node graphs are built again from the grid on first access, which takes
+    a few milliseconds.
+
+    Arguments:
+        number {int} - level of the game
+
+    Keyword Arguments:
+        root_path_name {str} - directory holding the map directory (default: {"./"})
+        use_cache {bool} - read and write the cache, compile the level every time if False (default: {True})
+
+    Attributes:
+        level - store the Level object
+        distance_table - store the DistanceTable of the level
+        from_cache - True if the level has been read from the cache
+    """
+
+    def __init__(self, number, root_path_name="./", use_cache=True):
+        map_level = root_path_name + "/map/level" + str(number)
+        cache_pathname = map_level + CACHE_EXTENSION
+        digest = source_digest(map_level)
+
+        self.from_cache = False
+        if use_cache:
+            self.from_cache = self.__read(number, root_path_name, cache_pathname, digest)
+
+        if not self.from_cache:
+            self.level = Level.load(number, root_path_name)
+            self.distance_table = DistanceTable(self.level)
+            if use_cache:
+                self.__write(cache_pathname, digest)
+
+    def __read(self, number, root_path_name, cache_pathname, digest):
+        """Load the level from the cache, return False if it is missing or out of date"""
+        try:
+            with open(cache_pathname, "rb") as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+
+        #the mapping is closed unless the level is read from it
+        matches = False
+        try:
+            magic, version, digest_, width, height, symbols_size, cells = HEADER.unpack_from(buffer)
+            if magic != CACHE_MAGIC or version != CACHE_VERSION or digest_ != digest:
+                return False
+
+            #section offsets
+            tiles = HEADER.size + symbols_size
+            distance = _align(tiles + width*height)
+            next_hop = distance + 2*cells*cells
+            if len(buffer) != next_hop + cells*cells:
+                return False
+            matches = True
+        except struct.error:
+            return False
+        finally:
+            if not matches:
+                buffer.close()
+
+        view = memoryview(buffer)
+        symbols = list(bytes(view[HEADER.size:tiles]).decode("utf-8"))
+        pmap = Map.from_tiles(width, height, symbols, view[tiles:tiles + width*height])
+        self.level = Level.load(number, root_path_name, pmap)
+        self.distance_table = DistanceTable(self.level,
+            (view[distance:next_hop].cast("H"), view[next_hop:].cast("B")))
+        return True
+
+    def __write(self, cache_pathname, digest):
+        """Write the level into the cache, keep going without it if the directory is read only"""
+        pmap = self.level.pmap
+        symbols = "".join(pmap.symbols).encode("utf-8")
+        distance, next_hop = self.distance_table.tables
+        header = HEADER.pack(CACHE_MAGIC, CACHE_VERSION, digest, pmap.width, pmap.height,
+            len(symbols), len(self.distance_table.cells))
+        tiles = len(header) + len(symbols)
+
+        #write a temporary file and move it, so that a reader never sees half a cache
+        temporary_pathname = cache_pathname + "." + str(os.getpid())
+        try:
+            with open(temporary_pathname, "wb") as file:
+                file.write(header)
+                file.write(symbols)
+                file.write(pmap.tiles)
+                file.write(bytes(_align(tiles + len(pmap.tiles)) - tiles - len(pmap.tiles)))
+                file.write(distance)
+                file.write(next_hop)
+            os.replace(temporary_pathname, cache_pathname)
+        except OSError:
+            if os.path.exists(temporary_pathname):
+                os.remove(temporary_pathname)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import mmap
+import struct
+from model import *
+
+LEVEL_FILE_MAGIC = b"PACLEVEL"
+LEVEL_FILE_VERSION = 1
+LEVEL_FILE_EXTENSION = ".level"
+
+#magic, version, width, height, byte length of the symbols, byte length of the spawn points,
+#dots, power capsules, offset of the tiles
+LEVEL_FILE_HEADER = struct.Struct("<8sHIIIIIIQ")
+
+
+def save_level_file(pmap, spawns, file_pathname):
+    """Write a map and its spawn points into a binary level file
+
+    The level file holds a fixed header, the symbol of each tile code in
+    UTF-8, the spawn points in JSON and the raw tile codes of the map line
+    after line. The tiles start on a multiple of mmap.ALLOCATIONGRANULARITY
+    so that they can be mapped in place.
+
+    Arguments:
+        pmap {Map} -- map of the level
+        spawns {dict} -- spawn points of the characters and bonuses, as in the levelN.json files
+        file_pathname {str} -- pathname of the level file
+
+    Raises:
+        TypeError: raise if 'pmap' is not a Map object
+    """
+    if not isinstance(pmap, Map):
+        raise TypeError("\'pmap\' must be a Map object")
+
+    symbols = "".join(pmap.symbols).encode("utf-8")
+    spawns = json.dumps(spawns).encode("utf-8")
+    tiles_offset = LEVEL_FILE_HEADER.size + len(symbols) + len(spawns)
+    tiles_offset += -tiles_offset % mmap.ALLOCATIONGRANULARITY
+
+    with open(file_pathname, "wb") as file:
+        file.write(LEVEL_FILE_HEADER.pack(LEVEL_FILE_MAGIC, LEVEL_FILE_VERSION, pmap.width, pmap.height,
+            len(symbols), len(spawns), pmap.dots_left, pmap.power_capsules_left, tiles_offset))
+        file.write(symbols)
+        file.write(spawns)
+        file.write(bytes(tiles_offset - file.tell()))
+        file.write(pmap.tiles)
+
+def load_level_file(file_pathname, number=0):
+    """Return the Level of a binary level file
+
+    The tiles are mapped copy on write and wrapped by the Map in place, so
+    that loading takes the same time whatever the size of the map, only the
+    pages of the map that are read become resident and the moves of the
+    game never reach the file.
+
+    Arguments:
+        file_pathname {str} -- pathname of the level file
+
+    Keyword Arguments:
+        number {int} -- level of the game (default: {0})
+
+    Raises:
+        ValueError: raise if 'file_pathname' is not a level file of a known version
+
+    Returns:
+        Level -- the Level instance
+    """
+    with open(file_pathname, "rb") as file:
+        header = file.read(LEVEL_FILE_HEADER.size)
+        if len(header) != LEVEL_FILE_HEADER.size:
+            raise ValueError("\'file_pathname\' must be a level file")
+        magic, version, width, height, symbols_size, spawns_size, dots, power_capsules, tiles_offset = \
+            LEVEL_FILE_HEADER.unpack(header)
+        if magic != LEVEL_FILE_MAGIC or version != LEVEL_FILE_VERSION:
+            raise ValueError("\'file_pathname\' must be a level file of version " + str(LEVEL_FILE_VERSION))
+
+        symbols = list(file.read(symbols_size).decode("utf-8"))
+        spawns = json.loads(file.read(spawns_size).decode("utf-8"))
+        if width*height == 0:
+            tiles = bytearray()
+        else:
+            tiles = mmap.mmap(file.fileno(), width*height, access=mmap.ACCESS_COPY, offset=tiles_offset)
+
+    pmap = Map.from_tiles(width, height, symbols, tiles, copy=False,
+        pellet_counts={DOT: dots, POWER_CAPSULE: power_capsules})
+    return Level.from_data(number, pmap, spawns)
+
+def compile_level_file(number, root_path_name="./"):
+    """Write map/levelN.level from the map/levelN.rle and map/levelN.json sources
+
+    Arguments:
+        number {int} -- level of the game
+
+    Keyword Arguments:
+        root_path_name {str} -- directory holding the map directory (default: {"./"})
+
+    Returns:
+        str -- pathname of the level file
+    """
+    map_level = root_path_name + "/map/level" + str(number)
+    with open(map_level + ".json") as file:
+        spawns = json.load(file)
+
+    save_level_file(Map.load_map(map_level + ".rle"), spawns, map_level + LEVEL_FILE_EXTENSION)
+    return map_level + LEVEL_FILE_EXTENSION
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile levels into binary level files.")
+    parser.add_argument("levels", nargs="+", type=int, help="numbers of the levels to compile")
+    parser.add_argument("--root", default="./", help="directory holding the map directory")
+    args = parser.parse_args()
+
+    for number in args.levels:
+        print(compile_level_file(number, args.root))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import mmap
+import struct
+from model import *
+
+LEVEL_PACK_MAGIC = b"PACMANLP"
+LEVEL_PACK_VERSION = 1
+LEVEL_PACK_EXTENSION = ".pack"
+
+#magic, version, number of levels
+LEVEL_PACK_HEADER = struct.Struct("<8sHI")
+#level number, offset of the level, byte length of the RLE map, byte length of the spawn points
+LEVEL_PACK_ENTRY = struct.Struct("<IQII")
+
+
+def save_level_pack(levels, file_pathname):
+    """Write levels into a level pack file
+
+    A level pack holds a header, an index of the number and the offset of
+    each level, then the RLE map and the spawn points JSON of each level in
+    UTF-8. The maps are compressed with compress_map_with_rle and written
+    one line per line as save_map does.
+
+    Arguments:
+        levels {list} -- (number, simplified map, spawn points) of each level, the simplified
+            map as a list of string line and the spawn points as in the levelN.json files
+        file_pathname {str} -- pathname of the level pack file
+
+    Raises:
+        ValueError: raise if a level number is given twice
+    """
+    levels = list(levels)
+    numbers = [number for number, _, _ in levels]
+    if len(set(numbers)) != len(numbers):
+        raise ValueError("\'levels\' must have different numbers")
+
+    with open(file_pathname, "wb") as file:
+        #leave room for the index, filled once the offsets are known
+        file.write(bytes(LEVEL_PACK_HEADER.size + LEVEL_PACK_ENTRY.size*len(levels)))
+
+        index = []
+        for number, simplified_map, spawns in levels:
+            rle = "".join([line + "\n" for line in compress_map_with_rle(simplified_map)]).encode("utf-8")
+            spawns = json.dumps(spawns).encode("utf-8")
+            index.append(LEVEL_PACK_ENTRY.pack(number, file.tell(), len(rle), len(spawns)))
+            file.write(rle)
+            file.write(spawns)
+
+        file.seek(0)
+        file.write(LEVEL_PACK_HEADER.pack(LEVEL_PACK_MAGIC, LEVEL_PACK_VERSION, len(levels)))
+        file.write(b"".join(index))
+
+
+class LevelPack:
+    """Reader of a level pack file
+
+    Only the header and the index are read when the pack is opened, the
+    file is memory mapped and a level is decoded when it is asked for.
+
+    Arguments:
+        file_pathname {str} - pathname of the level pack file
+
+    Raises:
+        ValueError: raise if 'file_pathname' is not a level pack of a known version
+
+    Attributes:
+        __buffer - store the memory mapped file
+        __index - store the offset and the sizes of each level by number
+    """
+
+    def __init__(self, file_pathname):
+        with open(file_pathname, "rb") as file:
+            self.__buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.__buffer) < LEVEL_PACK_HEADER.size:
+            raise ValueError("\'file_pathname\' must be a level pack")
+        magic, version, count = LEVEL_PACK_HEADER.unpack_from(self.__buffer)
+        if magic != LEVEL_PACK_MAGIC or version != LEVEL_PACK_VERSION:
+            raise ValueError("\'file_pathname\' must be a level pack of version " + str(LEVEL_PACK_VERSION))
+
+        self.__index = {}
+        for entry in range(count):
+            number, offset, rle_size, spawns_size = LEVEL_PACK_ENTRY.unpack_from(self.__buffer,
+                LEVEL_PACK_HEADER.size + entry*LEVEL_PACK_ENTRY.size)
+            self.__index[number] = (offset, rle_size, spawns_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.__index)
+
+    def __contains__(self, number):
+        return number in self.__index
+
+    def __iter__(self):
+        """Iterate over the levels in the order of the pack"""
+        for number in self.__index:
+            yield self.load(number)
+
+    def close(self):
+        self.__buffer.close()
+
+    def numbers(self):
+        """Return the level numbers in the order of the pack"""
+        return list(self.__index)
+
+    def read(self, number):
+        """Return the simplified map and the spawn points of a level
+
+        Raises:
+            KeyError: raise if there is no level 'number' in the pack
+        """
+        offset, rle_size, spawns_size = self.__index[number]
+        rle = self.__buffer[offset:offset + rle_size].decode("utf-8").split("\n")[:-1]
+        spawns = json.loads(self.__buffer[offset + rle_size:offset + rle_size + spawns_size].decode("utf-8"))
+        return uncompress_map_with_rle(rle), spawns
+
+    def load(self, number):
+        """Return the Level of a number
+
+        Raises:
+            KeyError: raise if there is no level 'number' in the pack
+        """
+        simplified_map, spawns = self.read(number)
+        return Level.from_data(number, Map(prettify_map(simplified_map)), spawns)
+
+
+def pack_levels(numbers, file_pathname, root_path_name="./"):
+    """Write the levels of the map directory into a level pack file
+
+    Arguments:
+        numbers {list} -- numbers of the levels
+        file_pathname {str} -- pathname of the level pack file
+
+    Keyword Arguments:
+        root_path_name {str} -- directory holding the map directory (default: {"./"})
+    """
+    def levels():
+        for number in numbers:
+            map_level = root_path_name + "/map/level" + str(number)
+            with open(map_level + ".json") as file:
+                spawns = json.load(file)
+            rle = load_map(map_level + ".rle")
+            if rle[-1] == "": #end of the last line
+                rle.pop()
+            yield number, uncompress_map_with_rle(rle), spawns
+
+    save_level_pack(levels(), file_pathname)
+
+def unpack_levels(file_pathname, directory_pathname):
+    """Write the levels of a level pack file as levelN.rle and levelN.json files
+
+    Arguments:
+        file_pathname {str} -- pathname of the level pack file
+        directory_pathname {str} -- directory the level files are written into
+
+    Raises:
+        ValueError: raise if a levelN.rle file exists already
+        FileExistsError: raise if a levelN.json file exists already
+    """
+    with LevelPack(file_pathname) as pack:
+        #no level is written if one of them is there already
+        for number in pack.numbers():
+            Level.check_new(directory_pathname + "/level" + str(number))
+
+        for number in pack.numbers():
+            simplified_map, spawns = pack.read(number)
+            Level.save(simplified_map, spawns, directory_pathname + "/level" + str(number))
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack levels into a level pack file, or list or unpack one.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="pack map/levelN.rle and map/levelN.json files")
+    pack.add_argument("file", help="level pack file to write")
+    pack.add_argument("levels", nargs="+", type=int, help="numbers of the levels to pack")
+    pack.add_argument("--root", default="./", help="directory holding the map directory")
+    list_ = commands.add_parser("list", help="list the levels of a level pack")
+    list_.add_argument("file", help="level pack file to read")
+    unpack = commands.add_parser("unpack", help="write the levels of a level pack as levelN.rle and levelN.json files")
+    unpack.add_argument("file", help="level pack file to read")
+    unpack.add_argument("directory", help="directory to write the level files into")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        pack_levels(args.levels, args.file, args.root)
+    elif args.command == "list":
+        with LevelPack(args.file) as pack:
+            for number in pack.numbers():
+                print(number)
+    else:
+        unpack_levels(args.file, args.directory)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 
+import array
 import pathlib
+import re
+import struct
+import sys
 
 BORDER_SYMBOL = ["═", "║", "╔", "╗", "╚", "╝", "*"]
 BORDERS = ['═', '║', '╔', '╗', '╚', '╝']
+BINARY_RLE_MAGIC = b"PRLE"
+BINARY_RLE_VERSION = 1
+#magic, version, number of lines, number of runs, byte length of the symbols
+BINARY_RLE_HEADER = struct.Struct("<4sBIII")
 
 def load_map(file_pathname):
     """Return a list of each line of the target map in the map file
@@ -63,330 +71,162 @@ def simplify_map(pacman_map):
     
     return simplified_pacman_map
 
-def prettify_map(pacman_map):
-
-    if not isinstance(pacman_map, list):
-        raise TypeError("\'pacman_map\' must be a list")
-    
-    #dictionary of border line
-    border_line = {
-        "topleft" : "╝",
-        "topright" : "╚",
-        "bottomleft" : "╗",
-        "bottomright" : "╔",
-        "leftright" : "═",
-        "topbottom" : "║"
-    }
-
-    #generate the fist stage of prettifying the simplified map
-    _1st_stage_map = []
+#symbol of a '*' border point by its '*' neighbors, as bits top, bottom, left, right
+_BORDER_LINES = {
+    (1, 0, 1, 0): "╝",
+    (1, 0, 0, 1): "╚",
+    (0, 1, 1, 0): "╗",
+    (0, 1, 0, 1): "╔",
+    (0, 0, 1, 1): "═",
+    (1, 1, 0, 0): "║"
+}
+
+#symbol of a '*' border point left over by _BORDER_LINES by the border symbols around it,
+#the digits are the neighbors seen from top-left '1' clockwise to left '8'
+_BORDER_VISIONS = {
+    "═": ["4", "8", "12348", "45678", "123458", "123478", "345678", "145678"],
+    "║": ["123456", "123678", "23456", "12678", "125678", "234567", "6"],
+    "╔": ["4678", "1234678", "2346"],
+    "╗": ["4568", "1234568", "1268"],
+    "╚": ["1245678", "2456", "1248"],
+    "╝": ["2345678", "2678", "2348"]
+}
+
+#bit of each neighbor digit in the index of _BORDER_VISION_TABLE, bits 0-2 are the
+#top-left, top and top-right cells, 3 and 5 left and right, 6-8 the bottom-left,
+#bottom and bottom-right cells
+_VISION_BITS = {"1": 0, "2": 1, "3": 2, "4": 5, "5": 8, "6": 7, "7": 6, "8": 3}
+
+def _build_border_tables():
+    """Return the lookup tables of the border symbols by neighbor bitmask"""
+    lines = [None]*16
+    for (top, bottom, left, right), symbol in _BORDER_LINES.items():
+        lines[top | bottom << 1 | left << 2 | right << 3] = symbol
+
+    #unknown visions drop the border point
+    visions = [""]*512
+    for symbol, visions_ in _BORDER_VISIONS.items():
+        for vision in visions_:
+            mask = 0
+            for digit in vision:
+                mask |= 1 << _VISION_BITS[digit]
+            visions[mask] = symbol
+
+    return lines, visions
+
+_BORDER_LINE_TABLE, _BORDER_VISION_TABLE = _build_border_tables()
+_NOT_BORDER = re.compile("[^" + "".join(BORDER_SYMBOL) + "]")
+_NOT_STAR = re.compile("[^*]")
+_FLAGS = str.maketrans({symbol: "\1" for symbol in BORDER_SYMBOL})
+_PELLETS = str.maketrans({".": "·", "o": "•"})
+_RUN = re.compile(r"((.)\2*)", re.DOTALL) #a run and its symbol
+_ENCODED_RUN = re.compile(r"[0-9]*[^0-9]") #a length and its symbol
+
+#symbol of an edge border point by the border symbols around it, the third and
+#the fourth stage of prettifying
+_OPEN_EDGES = {"╔╗": "═", "╗═": "═", "╔║╗": "╔", "╚║╗": "╔", "║╗": "╔", "╚╗": "╔",
+    "╗║═": "╗", "╝║═": "╗", "║═": "╗", "╝═": "╗"}
+_CLOSE_EDGES = {"╚╝": "═", "╝═": "═", "║╚╝": "╚", "║╔╝": "╚", "║╝": "╚", "╔╝": "╚",
+    "║╝═": "╝", "║╗═": "╝", "║═": "╝", "╗═": "╝"}
+
+def _flags(line, pattern, width):
+    """Return a byte per symbol of the line, 1 if it does not match the pattern, padded with 0
+    with a byte on the left and up to the width plus a byte on the right"""
+    flags = pattern.sub("\0", line).translate(_FLAGS).encode("latin-1")
+    return b"\0" + flags + bytes(width + 1 - len(flags))
+
+def _fix_edges(pacman_map, symbols, table):
+    """Return the map with the symbols of the first and last column replaced by the table
+    of the symbols around them, a symbol missing from the table is removed"""
+    fixed_map = []
     for line in range(len(pacman_map)):
-        if not isinstance(pacman_map[line], str):
-            raise TypeError("\'pacman_map\' must be a list of string line of pacman map")
-
-        newline = ""
-        for pos in range(len(pacman_map[line])):
-            if pacman_map[line][pos] == ".":
-                newline += "·"
-            elif pacman_map[line][pos] == "o":
-                newline += "•"
-            elif pacman_map[line][pos] == "*":
-                border_type = ""
-                #look up the top of the border point
-                try:
-                    pacman_map[line-1][pos]
-                    if line - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if pacman_map[line-1][pos] in ["*"]:
-                        border_type += "top"
-
-                #look up the bottom of the border point
-                try:
-                    pacman_map[line+1][pos]
-                except:
-                    pass
-                else:
-                    if pacman_map[line+1][pos] in ["*"]:
-                        border_type += "bottom"
-
-                #look up the left of the border point
-                try:
-                    pacman_map[line][pos-1]
-                    if pos - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if pacman_map[line][pos-1] in ["*"]:
-                        border_type += "left"
-
-                #look up the right of the border point
-                try:
-                    pacman_map[line][pos+1]
-                except:
-                    pass
-                else:
-                    if pacman_map[line][pos+1] in ["*"]:
-                        border_type += "right"
-
-                if border_type in border_line:
-                    newline += border_line[border_type]
-                else:
-                    newline += pacman_map[line][pos]
-            else:
-                newline += pacman_map[line][pos]
+        newline = pacman_map[line]
+        for pos in sorted({0, len(newline) - 1}, reverse=True):
+            if newline[pos] not in symbols:
+                continue
+
+            #store symbol that seen, top, bottom, left and the left one again for the right
+            vision = ""
+            if line > 0 and pos < len(pacman_map[line-1]) and pacman_map[line-1][pos] in BORDER_SYMBOL:
+                vision += pacman_map[line-1][pos]
+            if line + 1 < len(pacman_map) and pos < len(pacman_map[line+1]) and pacman_map[line+1][pos] in BORDER_SYMBOL:
+                vision += pacman_map[line+1][pos]
+            if pos > 0 and pacman_map[line][pos-1] in BORDER_SYMBOL:
+                vision += pacman_map[line][pos-1]
+            if pos + 1 < len(pacman_map[line]) and pacman_map[line][pos+1] in BORDER_SYMBOL:
+                vision += pacman_map[line][pos-1]
+
+            newline = newline[:pos] + table.get(vision, "") + newline[pos+1:]
 
         if newline != "":
-            _1st_stage_map.append(newline)
+            fixed_map.append(newline)
 
-    #generate the second stage of prettifying the simplified map
-    _2nd_stage_map = []
-    for line in range(len(_1st_stage_map)):
-        newline = ""
-        for pos in range(len(_1st_stage_map[line])):
-            if _1st_stage_map[line][pos] != "*":
-                newline += _1st_stage_map[line][pos]
-            else:
-                #assign a variable which will represent border symbol found as '12345678'
-                # as top-left, top, top-right, right, ...etc, left. 
-                vision = ""
-
-                #look up top-left 
-                try:
-                    _1st_stage_map[line-1][pos-1]
-                    if line - 1 < 0 or pos - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _1st_stage_map[line-1][pos-1] in BORDER_SYMBOL:
-                        vision += "1"
-
-                #look up top
-                try:
-                    _1st_stage_map[line-1][pos]
-                    if line - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _1st_stage_map[line-1][pos] in BORDER_SYMBOL:
-                        vision += "2"
-
-                #look up top-right 
-                try:
-                    _1st_stage_map[line-1][pos+1]
-                    if line - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _1st_stage_map[line-1][pos+1] in BORDER_SYMBOL:
-                        vision += "3"
-
-                #look up right 
-                try:
-                    _1st_stage_map[line][pos+1]
-                except:
-                    pass
-                else:
-                    if _1st_stage_map[line][pos+1] in BORDER_SYMBOL:
-                        vision += "4"
-
-                #look up bottom-right 
-                try:
-                    _1st_stage_map[line+1][pos+1]
-                except:
-                    pass
-                else:
-                    if _1st_stage_map[line+1][pos+1] in BORDER_SYMBOL:
-                        vision += "5"
-
-                #look up bottom
-                try:
-                    _1st_stage_map[line+1][pos]
-                except:
-                    pass
-                else:
-                    if _1st_stage_map[line+1][pos] in BORDER_SYMBOL:
-                        vision += "6"
-                        
-                #look up bottom-left 
-                try:
-                    _1st_stage_map[line+1][pos-1]
-                    if pos - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _1st_stage_map[line+1][pos-1] in BORDER_SYMBOL:
-                        vision += "7"
-
-                #look up left 
-                try:
-                    _1st_stage_map[line][pos-1]
-                    if pos - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _1st_stage_map[line][pos-1] in BORDER_SYMBOL:
-                        vision += "8"
-
-                if vision in ["4", "8", "12348", "45678", "123458", "123478", "345678", "145678"]:
-                    newline += "═"
-                elif vision in ["123456", "123678", "23456", "12678", "125678", "234567", "6"]:
-                    newline += "║"
-                elif vision in ["4678", "1234678", "2346"]:
-                    newline += "╔"
-                elif vision in ["4568", "1234568", "1268"]:
-                    newline += "╗"
-                elif vision in ["1245678", "2456", "1248"]:
-                    newline += "╚"
-                elif vision in ["2345678", "2678", "2348"]:
-                    newline += "╝"
-                else:
-                    print(line, pos, vision)   
-                
-        if newline != "":
-            _2nd_stage_map.append(newline)
-                
-    #generate the third stage of the map
-    _3rd_stage_map = []
-    for line in range(len(_2nd_stage_map)):
-        newline = ""
-        for pos in range(len(_2nd_stage_map[line])):
-            if (pos == 0 or pos == len(_2nd_stage_map[line])-1) and\
-                 _2nd_stage_map[line][pos] in ["╗", "╔"]:
-                
-                #store symbol that seen
-                vision = ""
-
-                #look up the top postition
-                try:
-                    _2nd_stage_map[line-1][pos]
-                    if line - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _2nd_stage_map[line-1][pos] in BORDER_SYMBOL:
-                        vision += _2nd_stage_map[line-1][pos]
-
-                #look up the bottom of the border point
-                try:
-                    _2nd_stage_map[line+1][pos]
-                except:
-                    pass
-                else:
-                    if _2nd_stage_map[line+1][pos] in BORDER_SYMBOL:
-                        vision += _2nd_stage_map[line+1][pos]
-
-                #look up the left of the border point
-                try:
-                    _2nd_stage_map[line][pos-1]
-                    if pos - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _2nd_stage_map[line][pos-1] in BORDER_SYMBOL:
-                        vision += _2nd_stage_map[line][pos-1]
-
-                #look up the right of the border point
-                try:
-                    _2nd_stage_map[line][pos+1]
-                except:
-                    pass
-                else:
-                    if _2nd_stage_map[line][pos+1] in BORDER_SYMBOL:
-                        vision += _2nd_stage_map[line][pos-1]
-
-                if vision in ["╔╗", "╗═"]:
-                    newline += "═"
-                elif vision in ["╔║╗", "╚║╗", "║╗", "╚╗"]:
-                    newline += "╔"
-                elif vision in ["╗║═", "╝║═", "║═", "╝═"]:
-                    newline += "╗"
+    return fixed_map
 
-            else:
-                newline += _2nd_stage_map[line][pos]
+def prettify_map(pacman_map):
+    """Return the pacman map with box drawing borders instead of '*', '·' dots and '•' power capsules
 
-        if newline != "":
-            _3rd_stage_map.append(newline)
+    Each '*' border point gets the symbol of the bitmask of the '*' points
+    next to it, or of the border points all around it, from precomputed
+    tables in a single pass over the map. Then the border points on the
+    first and last column are fixed up. Empty lines are removed.
 
-    #generate the fourth stage of the map 
-    #generate the third stage of the map
-    _4th_stage_map = []
-    for line in range(len(_3rd_stage_map)):
-        newline = ""
-        for pos in range(len(_3rd_stage_map[line])):
-            if (pos == 0 or pos == len(_3rd_stage_map[line])-1) and\
-                 _3rd_stage_map[line][pos] in ["╝", "╚"]:
-                
-                #store symbol that seen
-                vision = ""
-
-                #look up the top postition
-                try:
-                    _3rd_stage_map[line-1][pos]
-                    if line - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _3rd_stage_map[line-1][pos] in BORDER_SYMBOL:
-                        vision += _3rd_stage_map[line-1][pos]
-
-                #look up the bottom of the border point
-                try:
-                    _3rd_stage_map[line+1][pos]
-                except:
-                    pass
-                else:
-                    if _3rd_stage_map[line+1][pos] in BORDER_SYMBOL:
-                        vision += _3rd_stage_map[line+1][pos]
-
-                #look up the left of the border point
-                try:
-                    _3rd_stage_map[line][pos-1]
-                    if pos - 1 < 0:
-                        raise Exception
-                except:
-                    pass
-                else:
-                    if _3rd_stage_map[line][pos-1] in BORDER_SYMBOL:
-                        vision += _3rd_stage_map[line][pos-1]
-
-                #look up the right of the border point
-                try:
-                    _3rd_stage_map[line][pos+1]
-                except:
-                    pass
-                else:
-                    if _3rd_stage_map[line][pos+1] in BORDER_SYMBOL:
-                        vision += _3rd_stage_map[line][pos-1]
-
-                if vision in ["╚╝", "╝═"]:
-                    newline += "═"
-                elif vision in ["║╚╝", "║╔╝", "║╝", "╔╝"]:
-                    newline += "╚"
-                elif vision in ["║╝═", "║╗═", "║═", "╗═"]:
-                    newline += "╝"
+    Arguments:
+        pacman_map {list} -- list of string line of the simplified map
 
-            else:
-                newline += _3rd_stage_map[line][pos]
+    Raises:
+        TypeError: raise if 'pacman_map' is not a list
+        TypeError: raise if 'pacman_map' is not a list of string line
+
+    Returns:
+        list -- list of string line of the prettified map
+    """
+    if not isinstance(pacman_map, list):
+        raise TypeError("\'pacman_map\' must be a list")
+    for line in pacman_map:
+        if not isinstance(line, str):
+            raise TypeError("\'pacman_map\' must be a list of string line of pacman map")
 
+    width = max([len(line) for line in pacman_map], default=0)
+    empty = bytes(width + 2)
+
+    #'*' points next to each other on the lines of the map, empty lines included
+    stars = [_flags(line, _NOT_STAR, width) for line in pacman_map]
+    #border points around each other on the lines of the map, empty lines skipped
+    lines = [line for line in range(len(pacman_map)) if pacman_map[line] != ""]
+    borders = [_flags(pacman_map[line], _NOT_BORDER, width) for line in lines]
+
+    pretty_map = []
+    for i, line in enumerate(lines):
+        top = stars[line-1] if line > 0 else empty
+        middle = stars[line]
+        bottom = stars[line+1] if line + 1 < len(pacman_map) else empty
+        top_ = borders[i-1] if i > 0 else empty
+        middle_ = borders[i]
+        bottom_ = borders[i+1] if i + 1 < len(lines) else empty
+
+        newline = list(pacman_map[line].translate(_PELLETS))
+        pos = pacman_map[line].find("*")
+        while pos != -1:
+            symbol = _BORDER_LINE_TABLE[top[pos+1] | bottom[pos+1] << 1 | middle[pos] << 2 | middle[pos+2] << 3]
+            if symbol is None:
+                symbol = _BORDER_VISION_TABLE[top_[pos] | top_[pos+1] << 1 | top_[pos+2] << 2
+                    | middle_[pos] << 3 | middle_[pos+2] << 5
+                    | bottom_[pos] << 6 | bottom_[pos+1] << 7 | bottom_[pos+2] << 8]
+            newline[pos] = symbol
+            pos = pacman_map[line].find("*", pos + 1)
+
+        newline = "".join(newline)
         if newline != "":
-            _4th_stage_map.append(newline)
+            pretty_map.append(newline)
 
-    return _4th_stage_map
+    return _fix_edges(_fix_edges(pretty_map, ["╗", "╔"], _OPEN_EDGES), ["╝", "╚"], _CLOSE_EDGES)
 
 def compress_map_with_rle(pacman_map):
     """Return a RLE map of the simplified map
+
+    Each run of a same symbol is written as its length followed by the
+    symbol, e.g. '***..' is written '3*2.', so the symbols can not be digits.
     
     Arguments:
         pacman_map {list} -- list of string line of the map
@@ -402,32 +242,13 @@ def compress_map_with_rle(pacman_map):
         raise TypeError("\'pacman_map\' must be a list")
 
     rle_map = []
+    encoded_runs = {} #runs already encoded, maps repeat the same runs a lot
     for line in pacman_map:
-
         if not isinstance(line, str):
             raise TypeError("\'pacman_map\' must be a list of string line of the map")
 
-        newline = ""
-        current_symbol = ""
-        same_sym_amount = 0
-        saved = False
-
-        for pos in line:
-            if current_symbol == pos:
-                same_sym_amount += 1
-            elif current_symbol == "":
-                current_symbol = pos
-                same_sym_amount += 1
-            elif current_symbol != pos:
-                newline += str(same_sym_amount) + current_symbol
-                current_symbol = pos
-                same_sym_amount = 1
-                saved = True
-
-        if not saved and same_sym_amount != 0:
-            newline += str(same_sym_amount) + current_symbol
-
-        rle_map.append(newline)
+        rle_map.append("".join([encoded_runs[run] if run in encoded_runs else
+            encoded_runs.setdefault(run, str(len(run)) + symbol) for run, symbol in _RUN.findall(line)]))
     
     return rle_map
 
@@ -468,6 +289,7 @@ def uncompress_map_with_rle(compress_map):
     Raises:
         TypeError: raise if 'compress_map' is not a list 
         TypeError: raise if 'compress_mao' is not a list of string line
+        ValueError: raise if a symbol of 'compress_map' has no length
       
     Returns:
         list -- simplified version of the pacman map
@@ -476,18 +298,185 @@ def uncompress_map_with_rle(compress_map):
         raise TypeError("\'compress_map\' must be a list")
     
     uncompress_map = []
+    runs = {} #runs already decoded, maps repeat the same runs a lot
     for line in compress_map:
         if not isinstance(line, str):
             raise TypeError("\'compress_map\' must be a list of string line of the map")
-        
-        newline = ""
-        last_sym_pos = -1
 
-        for pos in range(len(line)):
-            if line[pos] not in "0123456789":
-                newline += int(line[last_sym_pos+1:pos])*line[pos]
-                last_sym_pos = pos
-
-        uncompress_map.append(newline)
+        uncompress_map.append("".join([runs[encoded_run] if encoded_run in runs else
+            runs.setdefault(encoded_run, int(encoded_run[:-1])*encoded_run[-1]) for encoded_run in _ENCODED_RUN.findall(line)]))
     
     return uncompress_map
+
+def compress_map_with_binary_rle(pacman_map):
+    """Return the binary RLE version of the map
+
+    The binary RLE holds a header, the symbols of the map in UTF-8, the
+    offset of the first run of each line and the runs as an array of
+    lengths and an array of symbol codes, so that a line or a region can be
+    decoded without decoding the whole map. Numbers are little endian and
+    the arrays are aligned on 4 bytes, so that they can be cast in place.
+
+    Arguments:
+        pacman_map {list} -- list of string line of the map
+
+    Raises:
+        TypeError: raise if 'pacman_map' is not a list
+        TypeError: raise if 'pacman_map' is not a list of string line
+        ValueError: raise if the map has more than 256 different symbols
+
+    Returns:
+        bytes -- the binary RLE map
+    """
+    if not isinstance(pacman_map, list):
+        raise TypeError("\'pacman_map\' must be a list")
+
+    codes = {}
+    offsets = array.array("I", [0])
+    lengths = array.array("H")
+    symbols = array.array("B")
+
+    for line in pacman_map:
+        if not isinstance(line, str):
+            raise TypeError("\'pacman_map\' must be a list of string line of the map")
+
+        for run, symbol in _RUN.findall(line):
+            if symbol not in codes:
+                if len(codes) == 256:
+                    raise ValueError("\'pacman_map\' can not have more than 256 different symbols")
+                codes[symbol] = len(codes)
+
+            #split the runs longer than a length can hold
+            length = len(run)
+            while length > 0:
+                lengths.append(min(length, 0xFFFF))
+                symbols.append(codes[symbol])
+                length -= lengths[-1]
+
+        offsets.append(len(lengths))
+
+    symbol_bytes = "".join(codes).encode("utf-8")
+    header = BINARY_RLE_HEADER.pack(BINARY_RLE_MAGIC, BINARY_RLE_VERSION, len(pacman_map), len(lengths), len(symbol_bytes))
+    data = bytearray(header + symbol_bytes)
+    for numbers in [offsets, lengths, symbols]:
+        data += bytes(-len(data) % 4)
+        data += _little_endian(numbers)
+
+    return bytes(data)
+
+def uncompress_map_with_binary_rle(data):
+    """Return an uncompress map of the binary RLE version of the map
+
+    Arguments:
+        data {bytes} -- the binary RLE map
+
+    Returns:
+        list -- list of string line of the map
+    """
+    return BinaryRleMap(data).lines()
+
+def _little_endian(numbers):
+    """Return the bytes of an array as little endian numbers"""
+    if sys.byteorder == "big":
+        numbers = array.array(numbers.typecode, numbers)
+        numbers.byteswap()
+    return numbers.tobytes()
+
+
+class BinaryRleMap:
+    """Random access reader of a binary RLE map
+
+    The arrays of the binary RLE are read in place, a line is decoded from
+    its own runs only.
+
+    Arguments:
+        data {bytes} - a binary RLE map, or any buffer holding one e.g. a mmap
+
+    Raises:
+        ValueError: raise if 'data' is not a binary RLE map of a known version
+
+    Attributes:
+        __symbols - store the symbol of each code
+        __offsets - store the index of the first run of each line, and the number of runs
+        __lengths - store the length of each run
+        __codes - store the symbol code of each run
+    """
+
+    def __init__(self, data):
+        data = memoryview(data).cast("B")
+        if len(data) < BINARY_RLE_HEADER.size:
+            raise ValueError("\'data\' must be a binary RLE map")
+        magic, version, height, runs, symbol_size = BINARY_RLE_HEADER.unpack_from(data)
+        if magic != BINARY_RLE_MAGIC or version != BINARY_RLE_VERSION:
+            raise ValueError("\'data\' must be a binary RLE map of version " + str(BINARY_RLE_VERSION))
+
+        position = BINARY_RLE_HEADER.size
+        self.__symbols = list(bytes(data[position:position + symbol_size]).decode("utf-8"))
+        position += symbol_size
+
+        sections = []
+        for typecode, count in [("I", height + 1), ("H", runs), ("B", runs)]:
+            position += -position % 4
+            size = array.array(typecode).itemsize*count
+            if position + size > len(data):
+                raise ValueError("\'data\' must be a binary RLE map")
+            if sys.byteorder == "big":
+                section = array.array(typecode, data[position:position + size].tobytes())
+                section.byteswap()
+            else:
+                section = data[position:position + size].cast(typecode)
+            sections.append(section)
+            position += size
+        self.__offsets, self.__lengths, self.__codes = sections
+
+    @property
+    def height(self):
+        return len(self.__offsets) - 1
+
+    @property
+    def symbols(self):
+        return self.__symbols
+
+    def line(self, y):
+        """Return the line y of the map
+
+        Raises:
+            IndexError: raise if 'y' is not a line of the map
+        """
+        if y < 0 or y >= self.height:
+            raise IndexError("\'y\' must be a line of the map")
+        first, last = self.__offsets[y], self.__offsets[y + 1]
+        symbols = self.__symbols
+        return "".join([symbols[code]*length for length, code in zip(self.__lengths[first:last], self.__codes[first:last])])
+
+    def region(self, x, y, width, height):
+        """Return the lines of the rectangle of the map at (x, y), the lines are cut at the end of the map
+
+        Only the runs overlapping the rectangle are decoded.
+
+        Raises:
+            ValueError: raise if 'x', 'y', 'width' or 'height' is negative
+        """
+        if x < 0 or y < 0 or width < 0 or height < 0:
+            raise ValueError("\'x\', \'y\', \'width\' and \'height\' must be zero or positive integers")
+
+        symbols = self.__symbols
+        region = []
+        for y_ in range(y, min(y + height, self.height)):
+            newline = []
+            start = 0 #position of the current run on the line
+            for run in range(self.__offsets[y_], self.__offsets[y_ + 1]):
+                end = start + self.__lengths[run]
+                if end > x:
+                    newline.append(symbols[self.__codes[run]]*(min(end, x + width) - max(start, x)))
+                if end >= x + width:
+                    break
+                start = end
+            region.append("".join(newline))
+
+        return region
+
+    def lines(self):
+        """Return the list of the lines of the map"""
+        return [self.line(y) for y in range(self.height)]
+
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import random
+from model import *
+
+NO_SYMMETRY = "none"
+HORIZONTAL_SYMMETRY = "horizontal" #left half mirrored on the right half, as the classic maze
+VERTICAL_SYMMETRY = "vertical" #top half mirrored on the bottom half
+FULL_SYMMETRY = "both"
+SYMMETRIES = [NO_SYMMETRY, HORIZONTAL_SYMMETRY, VERTICAL_SYMMETRY, FULL_SYMMETRY]
+CENTER = "center"
+RANDOM = "random"
+GHOST_HOUSE_PLACEMENTS = [CENTER, RANDOM]
+
+#ghost house of the classic maze, the ghosts leave it through the '-' gate
+GHOST_HOUSE = [
+    "***--***",
+    "*xxxxxx*",
+    "*xxxxxx*",
+    "********"
+]
+#spawn points relative to the top left corner of the ghost house, as in level1.json
+GHOST_HOUSE_SPAWNS = {
+    BLINKY: (2, 1),
+    PINKY: (5, 1),
+    INKY: (2, 2),
+    CLYDE: (5, 2),
+    CHERRY: (3, 4),
+    STANDING_START_ANNOUNCEMENT: (4, 4)
+}
+CHERRY_SYMBOL = "\U0001F352"
+CHERRY_POINTS = 100
+MIN_WIDTH = 14
+MIN_HEIGHT = 12
+PLACEMENT_TRIES = 200 #failed tries in a row to place a wall at random before filling the room left
+DEFAULT_DENSITY = 0.6
+DENSITY_TOLERANCE = 0.05 #share of the inside of the frame the corridors may exceed the density by
+
+
+class MazeGenerator:
+    """Generator of simplified maps and their spawn points
+
+    The maze is a frame of '*' holding rectangular walls, each of them with
+    a corridor all around it, so that every corridor is connected and every
+    '*' has a box drawing symbol once prettified. Walls of 2 cells wide are
+    filled, larger ones are hollow, as in the classic maze. Tunnels are
+    openings of the frame on both sides of a line. Dots '.' fill the
+    corridors Pacman can reach, power capsules 'o' are put in the corners.
+    The same seed and settings always give the same maze.
+
+    The density is reached within DENSITY_TOLERANCE. The lowest density
+    reachable depends on the size, since the frame, the ghost house and the
+    corridor around each wall take room: about 0.6 at 28x31, 0.4 at 60x60
+    and 0.2 at 120x90.
+
+    Arguments:
+        width {int} - width of the maze
+        height {int} - height of the maze
+
+    Keyword Arguments:
+        seed {int} - seed of the random generator (default: {None})
+        density {float} - share of the inside of the frame kept as corridors, between 0 and 1 (default: {DEFAULT_DENSITY})
+        symmetry {str} - one of SYMMETRIES (default: {HORIZONTAL_SYMMETRY})
+        tunnels {int} - number of lines with a tunnel (default: {1})
+        ghost_house {str} - placement of the ghost house, one of GHOST_HOUSE_PLACEMENTS (default: {CENTER})
+
+    Raises:
+        ValueError: raise if 'width' or 'height' is smaller than MIN_WIDTH or MIN_HEIGHT
+        ValueError: raise if 'density' is not between 0 and 1
+        ValueError: raise if 'symmetry' or 'ghost_house' is unknown
+        ValueError: raise if 'tunnels' is negative or there is no room for them
+        ValueError: raise if the walls can not bring the corridors down to 'density', on generate
+
+    Attributes:
+        __grid - store the lines of the maze as lists of symbols
+        __reserved - store the cells that must stay corridors
+        __house - store the (x, y) top left corner of the ghost house
+    """
+
+    def __init__(self, width, height, seed=None, density=DEFAULT_DENSITY, symmetry=HORIZONTAL_SYMMETRY, tunnels=1,
+            ghost_house=CENTER):
+        #validate input
+        if width < MIN_WIDTH or height < MIN_HEIGHT:
+            raise ValueError("\'width\' and \'height\' must be at least " + str(MIN_WIDTH) + " and " + str(MIN_HEIGHT))
+        if not 0 <= density <= 1:
+            raise ValueError("\'density\' must be between 0 and 1")
+        if symmetry not in SYMMETRIES:
+            raise ValueError("\'symmetry\' must be one of " + ", ".join(SYMMETRIES))
+        if ghost_house not in GHOST_HOUSE_PLACEMENTS:
+            raise ValueError("\'ghost_house\' must be one of " + ", ".join(GHOST_HOUSE_PLACEMENTS))
+        if tunnels < 0:
+            raise ValueError("\'tunnels\' must be zero or a positive integer")
+
+        self.__width = width
+        self.__height = height
+        self.__random = random.Random(seed)
+        self.__density = density
+        self.__symmetry = symmetry
+        self.__tunnels = tunnels
+        self.__ghost_house = ghost_house
+
+    def __is_free(self, x0, y0, x1, y1):
+        """Return True if a wall can fill the rectangle from (x0, y0) to (x1, y1)
+
+        The rectangle must be inside the frame, away from any reserved cell,
+        and have no '*' in it nor all around it.
+        """
+        if x0 < 2 or y0 < 2 or x1 > self.__width - 3 or y1 > self.__height - 3:
+            return False
+        for y in range(y0 - 1, y1 + 2):
+            line = self.__grid[y]
+            for x in range(x0 - 1, x1 + 2):
+                if line[x] == "*":
+                    return False
+                if x0 <= x <= x1 and y0 <= y <= y1 and (x, y) in self.__reserved:
+                    return False
+        return True
+
+    def __mirrors(self, x0, y0, x1, y1):
+        """Return the rectangles of a wall and of its mirrors, merging the ones that overlap"""
+        rectangles = [(x0, y0, x1, y1)]
+        if self.__symmetry in [HORIZONTAL_SYMMETRY, FULL_SYMMETRY]:
+            rectangles += [(self.__width - 1 - x1_, y0_, self.__width - 1 - x0_, y1_) for x0_, y0_, x1_, y1_ in rectangles]
+        if self.__symmetry in [VERTICAL_SYMMETRY, FULL_SYMMETRY]:
+            rectangles += [(x0_, self.__height - 1 - y1_, x1_, self.__height - 1 - y0_) for x0_, y0_, x1_, y1_ in rectangles]
+
+        merged = []
+        for rectangle in rectangles:
+            for i, other in enumerate(merged):
+                if rectangle[0] <= other[2] and other[0] <= rectangle[2] and rectangle[1] <= other[3] and other[1] <= rectangle[3]:
+                    merged[i] = (min(rectangle[0], other[0]), min(rectangle[1], other[1]),
+                        max(rectangle[2], other[2]), max(rectangle[3], other[3]))
+                    break
+            else:
+                merged.append(rectangle)
+        return merged
+
+    def __add_wall(self, x0, y0, x1, y1):
+        """Draw a filled wall 2 cells wide or a hollow one, return the number of cells it covers"""
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                border = y in [y0, y1] or x in [x0, x1]
+                self.__grid[y][x] = "*" if border or x1 - x0 < 2 or y1 - y0 < 2 else " "
+                if self.__grid[y][x] == " ": #no wall inside a hollow one
+                    self.__reserved.add((x, y))
+        return (x1 - x0 + 1)*(y1 - y0 + 1)
+
+    def __add_tunnels(self):
+        """Open the frame on both sides of the tunnel lines"""
+        lines = list(range(3, self.__height - 3))
+        self.__random.shuffle(lines)
+        tunnels = []
+        for y in lines:
+            if len(tunnels) == self.__tunnels:
+                break
+            #tunnels are 4 lines apart at least, so that the frame between them is drawn, and away
+            #from the ghost house
+            if all(abs(y - y_) >= 4 for y_ in tunnels) and all(self.__grid[y_][x] == "." for y_ in range(y - 2, y + 3)
+                    for x in [1, 2, 3, self.__width - 4, self.__width - 3, self.__width - 2]):
+                tunnels.append(y)
+        if len(tunnels) < self.__tunnels:
+            raise ValueError("there is no room for " + str(self.__tunnels) + " tunnels")
+
+        for y in tunnels:
+            for x in [0, self.__width - 1]:
+                self.__grid[y][x] = " "
+            #walls on both sides of the tunnel
+            for x in [1, 2, self.__width - 3, self.__width - 2]:
+                self.__grid[y-1][x] = "*"
+                self.__grid[y+1][x] = "*"
+            for x in [1, 2, 3, self.__width - 4, self.__width - 3, self.__width - 2]:
+                self.__reserved.add((x, y))
+
+    def __add_ghost_house(self):
+        """Put the ghost house with a corridor all around it and room above to leave it"""
+        width, height = len(GHOST_HOUSE[0]), len(GHOST_HOUSE)
+        if self.__ghost_house == CENTER:
+            corners = [((self.__width - width)//2, (self.__height - height)//2)]
+        else:
+            corners = [(x, y) for y in range(3, self.__height - height - 2) for x in range(2, self.__width - width - 1)]
+            self.__random.shuffle(corners)
+
+        for x0, y0 in corners:
+            if self.__is_free(x0, y0 - 1, x0 + width - 1, y0 + height - 1):
+                break
+        else:
+            raise ValueError("there is no room for the ghost house")
+
+        for y in range(height):
+            for x in range(width):
+                self.__grid[y0 + y][x0 + x] = GHOST_HOUSE[y][x]
+        #corridors around the house are kept free of dots as in the classic maze
+        for y in range(y0 - 2, y0 + height + 1):
+            for x in range(x0 - 1, x0 + width + 1):
+                if self.__grid[y][x] == ".":
+                    self.__grid[y][x] = " "
+                    self.__reserved.add((x, y))
+        self.__house = (x0, y0)
+
+    def __try_wall(self, x0, y0, x1, y1):
+        """Return the rectangles of a wall and of its mirrors if they can all be put, None otherwise"""
+        rectangles = self.__mirrors(x0, y0, x1, y1)
+
+        #mirrors must be apart from each other as well
+        apart = all(a[2] + 1 < b[0] or b[2] + 1 < a[0] or a[3] + 1 < b[1] or b[3] + 1 < a[1]
+            for i, a in enumerate(rectangles) for b in rectangles[i+1:])
+        if apart and all(self.__is_free(*rectangle) for rectangle in rectangles):
+            return rectangles
+        return None
+
+    def __largest_wall(self, x0, y0, cells):
+        """Return the rectangles of the largest wall from (x0, y0) and its mirrors covering about 'cells' cells at most
+
+        The wall starts 2 cells wide and high, and grows to the right and
+        to the bottom in turn while it still fits.
+        """
+        x1, y1 = x0 + 1, y0 + 1
+        rectangles = self.__try_wall(x0, y0, x1, y1)
+        grown = rectangles is not None
+        while grown:
+            grown = False
+            for x1_, y1_ in [(x1 + 1, y1), (x1, y1 + 1)]:
+                larger = self.__try_wall(x0, y0, x1_, y1_)
+                if larger is not None and sum((b[2] - b[0] + 1)*(b[3] - b[1] + 1) for b in larger) <= cells:
+                    rectangles, x1, y1, grown = larger, x1_, y1_, True
+        return rectangles
+
+    def __add_walls(self):
+        """Put walls until the corridors are down to the density
+
+        Walls of random sizes are put at random places first. Once they do
+        not fit any more, the largest walls that fit are put at the places
+        left line after line, as large as the walls still missing, so that
+        the low densities are reached as well.
+
+        Raises:
+            ValueError: raise if the walls can not bring the corridors down to the density
+        """
+        inside = (self.__width - 2)*(self.__height - 2)
+        target = (1 - self.__density)*inside
+        #the ghost house and the walls of the tunnels are walls already
+        walls = sum(symbol not in ". " for line in self.__grid[1:-1] for symbol in line[1:-1])
+        failures = 0
+        #the lower the density, the larger the walls, the corridors around them take less room
+        scale = max(1, (1 - self.__density)/(1 - DEFAULT_DENSITY))
+        while walls < target and failures < PLACEMENT_TRIES:
+            failures += 1
+            width = self.__random.randint(2, max(2, int(self.__width/4*scale)))
+            height = self.__random.randint(2, max(2, int(self.__height/5*scale)))
+            x0 = self.__random.randint(2, self.__width - 2 - width)
+            y0 = self.__random.randint(2, self.__height - 2 - height)
+            rectangles = self.__try_wall(x0, y0, x0 + width - 1, y0 + height - 1)
+            if rectangles is not None:
+                for rectangle in rectangles:
+                    walls += self.__add_wall(*rectangle)
+                failures = 0
+
+        #fill the room left with the largest walls that fit, line after line
+        places = [(x, y) for y in range(2, self.__height - 3) for x in range(2, self.__width - 3)]
+        for x0, y0 in places:
+            if walls >= target:
+                break
+            rectangles = self.__largest_wall(x0, y0, max(target - walls, 4))
+            if rectangles is not None:
+                for rectangle in rectangles:
+                    walls += self.__add_wall(*rectangle)
+
+        if 1 - walls/inside > self.__density + DENSITY_TOLERANCE:
+            raise ValueError("there is no room for walls down to a density of " + str(self.__density))
+
+    def __spawns(self):
+        """Return the spawn points of the characters and bonuses, as in the levelN.json files"""
+        x0, y0 = self.__house
+        spawns = {}
+        for name, (x, y) in GHOST_HOUSE_SPAWNS.items():
+            spawns[name] = {X: x0 + x, Y: y0 + y}
+        spawns[CHERRY] = [dict(spawns[CHERRY], **{SYMBOL: CHERRY_SYMBOL, POINTS: CHERRY_POINTS})]
+
+        #Pacman starts on the corridor closest to the middle below the house
+        target_x, target_y = x0 + 3, (y0 + len(GHOST_HOUSE) + self.__height)//2
+        x, y = min(((x, y) for y in range(y0 + len(GHOST_HOUSE) + 1, self.__height - 1) for x in range(1, self.__width - 1)
+            if self.__grid[y][x] == "."), key=lambda cell: (abs(cell[0] - target_x) + abs(cell[1] - target_y), cell))
+        spawns[PACMAN] = {X: x, Y: y}
+        return spawns
+
+    def __remove_unreachable_dots(self, x, y):
+        """Remove the dots Pacman can not reach from (x, y)"""
+        reached = {(x, y)}
+        cells = collections.deque([(x, y)])
+        while cells:
+            x, y = cells.popleft()
+            for x_, y_ in [(x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)]:
+                if 0 <= x_ < self.__width and 0 <= y_ < self.__height and (x_, y_) not in reached \
+                        and self.__grid[y_][x_] in [".", " "]:
+                    reached.add((x_, y_))
+                    cells.append((x_, y_))
+
+        for y, line in enumerate(self.__grid):
+            for x, symbol in enumerate(line):
+                if symbol == "." and (x, y) not in reached:
+                    line[x] = " "
+
+    def generate(self):
+        """Return a new maze
+
+        Returns:
+            tuple -- the simplified map as a list of string line and the spawn points as in the
+                levelN.json files
+        """
+        width, height = self.__width, self.__height
+        self.__grid = [["*"]*width] + [["*"] + ["."]*(width - 2) + ["*"] for _ in range(height - 2)] + [["*"]*width]
+        self.__reserved = set()
+
+        self.__add_ghost_house()
+        self.__add_tunnels()
+        self.__add_walls()
+
+        spawns = self.__spawns()
+        self.__remove_unreachable_dots(spawns[PACMAN][X], spawns[PACMAN][Y])
+        for x, y in [(1, 1), (width - 2, 1), (1, height - 2), (width - 2, height - 2)]:
+            if self.__grid[y][x] == ".":
+                self.__grid[y][x] = "o"
+
+        return ["".join(line) for line in self.__grid], spawns
+
+
+def save_maze(simplified_map, spawns, number, root_path_name="./"):
+    """Write a maze as map/levelN.rle and map/levelN.json
+
+    Arguments:
+        simplified_map {list} -- list of string line of the simplified map
+        spawns {dict} -- spawn points of the characters and bonuses
+        number {int} -- level number of the maze
+
+    Keyword Arguments:
+        root_path_name {str} -- directory holding the map directory (default: {"./"})
+
+    Raises:
+        ValueError: raise if the levelN.rle file exists already
+        FileExistsError: raise if the levelN.json file exists already
+    """
+    Level.save(simplified_map, spawns, root_path_name + "/map/level" + str(number))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a maze as map/levelN.rle and map/levelN.json.")
+    parser.add_argument("number", type=int, help="level number of the maze")
+    parser.add_argument("--width", type=int, default=28)
+    parser.add_argument("--height", type=int, default=31)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY, help="share of the maze kept as corridors")
+    parser.add_argument("--symmetry", choices=SYMMETRIES, default=HORIZONTAL_SYMMETRY)
+    parser.add_argument("--tunnels", type=int, default=1)
+    parser.add_argument("--ghost-house", choices=GHOST_HOUSE_PLACEMENTS, default=CENTER)
+    parser.add_argument("--root", default="./", help="directory holding the map directory")
+    args = parser.parse_args()
+
+    simplified_map, spawns = MazeGenerator(args.width, args.height, args.seed, args.density, args.symmetry,
+        args.tunnels, args.ghost_house).generate()
+    save_maze(simplified_map, spawns, args.number, args.root)
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 
+import collections
+import heapq
+import itertools
 import json
 import pathlib
-import curses
 import math
+import os
 import random
+import threading
 from map_utils import *
 
 PACMAN = "pacman"
@@ -17,6 +21,12 @@ CHERRY = "cherry"
 POINTS = "points"
 EYES = '👀'
 STANDING_START_ANNOUNCEMENT = "standing_start_announcement"
+GHOSTS = "ghosts" #optional list of the ghosts of a level, in place of the four named ones
+BONUSES = "bonuses" #optional list of more bonuses of a level
+KIND = "kind"
+PORTALS = "portals" #optional list of the pairs of portal mouths of a level, in place of the open edges of the map
+DX = "dx"
+DY = "dy"
 COLOR_RGB_PACMAN = (255, 255, 0)
 COLOR_RGB_BLINKY = (255, 0, 0)
 COLOR_RGB_PINKY = (255, 184, 255)
@@ -28,12 +38,47 @@ COLOR_RGB_BLUE = (0, 0, 128)
 COLOR_RGB_BRIGHT_BLUE = (24, 24, 255)
 BORDER_SYMBOL = ['═', '║', '╔', '╗', '╚', '╝']
 NOT_WALKABLE = ['═', '║', '╔', '╗', '╚', '╝', '-', 'x']
+DOT = '·'
+POWER_CAPSULE = '•'
+PELLETS = [DOT, POWER_CAPSULE]
+TILE_SYMBOLS = [' ', DOT, POWER_CAPSULE, '═', '║', '╔', '╗', '╚', '╝', '-', 'x'] #first tile codes of every map
 PACMAN_SYMBOL = "ᗧ"
+COVERED = None #position covered by the wide symbol on its left
+#(dy, dx) moves out of a cell, the bit i of an exit mask stands for EXITS[i] and the bit 4 + i is set as
+#well if the move goes through a portal
+EXITS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+EXIT_CHOICES = [[exit_ for i, exit_ in enumerate(EXITS) if mask >> i & 1] for mask in range(1 << 2*len(EXITS))]
+EXIT_BIT = {exit_: 1 << i for i, exit_ in enumerate(EXITS)} #bit of the exit of a move
+PORTAL_EXITS = 0xF0 #bits of an exit mask set by the exits through a portal
+REVERSE_EXIT = {(-dy, -dx): 1 << i for i, (dy, dx) in enumerate(EXITS)} #bit of the exit going back by a move
+PELLET_SCAN_SIZE = 1 << 16 #bytes of tiles copied at once when looking for the pellets
+FLASH_FRAME_TIME = 0.1 #seconds ghosts stay white or blue while flashing
+DEATH_FRAME_TIME = 0.1 #seconds the skull or the explosion stays of the death scene
 READY = "READY!"
 EXPLODING = '💥'
 SKULL = '💀'
 X = "x"
 Y = "y"
+WALL = "wall"
+PELLET = "pellet"
+EMPTY = "empty"
+TEXT = "text"
+FRIGHTENED = "frightened"
+FLASH = "flash"
+COLORS = {
+    PACMAN: COLOR_RGB_PACMAN,
+    BLINKY: COLOR_RGB_BLINKY,
+    PINKY: COLOR_RGB_PINKY,
+    INKY: COLOR_RGB_INKY,
+    CLYDE: COLOR_RGB_CLYDE,
+    WALL: COLOR_RGB_BLUE,
+    EMPTY: COLOR_RGB_BLUE,
+    CHERRY: COLOR_RGB_BLUE,
+    PELLET: COLOR_RGB_ORANGE,
+    TEXT: COLOR_RGB_WHITE,
+    FLASH: COLOR_RGB_WHITE,
+    FRIGHTENED: COLOR_RGB_BRIGHT_BLUE
+}
 
 
 class Object:
@@ -52,6 +97,8 @@ class Object:
         __color - color of the symbol
     """
 
+    __slots__ = ("_x", "_y", "__symbol", "__color")
+
     def __init__(self, x, y, symbol, color):
         #validate input
         if not isinstance(x, int):
@@ -97,16 +144,20 @@ class Object:
         return self.__color
 
 class AnimatedCharacter(Object):
+    __slots__ = ()
 
     def __init__(self, x, y, symbol, color):
         super().__init__(x, y, symbol, color)
 
-    def set_direction(self, dy, dx):
+    def set_direction(self, dy, dx, pmap=None):
         """Function set new direction for the object
         
         Arguments:
             dx {int} -- the amount of step x ordinate move
             dy {int} -- the amount of step y ordinate move
+
+        Keyword Arguments:
+            pmap {Map} -- map whose portals the move may go through (default: {None})
         
         Raises:
             TypeError: raise if 'dx' is not an integer
@@ -121,21 +172,12 @@ class AnimatedCharacter(Object):
         if dx < -1 or dx > 1 or dy < -1 or dy > 1:
             raise ValueError("\'dx\' and \'dy\' must be an integer between -1 and 1")
         
-        #set direction
-        if dx == -1:
-            if self._y == 14 and self._x == 1:
-                self._x = 27
-            else:
-                self._x -= 1
-        if dx == 1:
-            if self._y == 14 and self._x == 26:
-                self._x = 0
-            else:
-                self._x += 1
-        if dy == -1:
-            self._y -= 1
-        if dy == 1:
-            self._y += 1
+        #set direction, through a portal of the map if the move enters one
+        if pmap is None:
+            self._x += dx
+            self._y += dy
+        else:
+            self._x, self._y = pmap.neighbor(self._x, self._y, dy, dx)
 
     def play(self, scene):
         """Function that control the direction of Pacman
@@ -147,7 +189,8 @@ class AnimatedCharacter(Object):
         Raises:
             TypeError: raise if 'scene' is not a Scene object
         """
-        #validate input
+        #validate input, the scene module is only imported by the front ends since it needs curses
+        from scene import Scene
         if not isinstance(scene, Scene):
             raise TypeError("\'scene\' must be an Scene object")
         
@@ -155,10 +198,13 @@ class AnimatedCharacter(Object):
         scene.render()
 
 class Pacman(AnimatedCharacter):
+    __slots__ = ()
+
     def __init__(self, x, y, symbol, color):
         super().__init__(x, y, symbol, color)
 
 class Bonus(Object):
+    __slots__ = ("points",)
 
     def __init__(self, x, y, symbol, points):
         super().__init__(x, y, symbol, (0, 0, 0))
@@ -170,93 +216,129 @@ class Bonus(Object):
         self.points = points
 
 class Ghost(AnimatedCharacter):
+    """Ghost moving at random through the corridors
+
+    Attributes:
+        last_x - x ordinate of the cell the ghost comes from
+        last_y - y ordinate of the cell the ghost comes from
+        heading - (dy, dx) last move of the ghost, None if it may turn back
+        rng - random generator of the moves of the ghost, see Level.seed_ghosts
+    """
+
+    __slots__ = ("last_x", "last_y", "heading", "rng")
     
     def __init__(self, x, y, color):
         super().__init__(x, y, 'ᗣ', color)
         self.last_y = 0
         self.last_x = 0
+        self.heading = None
+        self.rng = random.Random()
+
+    def choices(self, level):
+        """Return the (dy, dx) moves the ghost can make
+
+        The moves are the exits of its cell in Map.exits, other than the way
+        back and the cells of the other ghosts. The way back is the only move
+        at a dead end, there are none if all the exits are taken.
+
+        Arguments:
+            level {Level} -- a Level object that stores the map and the ghosts
+        """
+        pmap = level.pmap
+        exits = pmap.exits[self._y*pmap.width + self._x]
+        reverse = exits & REVERSE_EXIT.get(self.heading, 0)
+
+        #exits that are not taken by the other ghosts
+        occupancy = level.occupancy
+        choices = [(dy, dx) for dy, dx in EXIT_CHOICES[exits & ~reverse]
+            if not occupancy.count(*pmap.neighbor(self._x, self._y, dy, dx))]
+        return choices or EXIT_CHOICES[reverse]
+
+    def take_exit(self, level, dy, dx):
+        """Move the ghost one step, through a portal of the map if any, and remember the cell it comes from
+
+        Arguments:
+            level {Level} -- a Level object that stores the map and the occupancy of the ghosts
+            dy {int} -- the amount of step y ordinate move
+            dx {int} -- the amount of step x ordinate move
+        """
+        x, y = level.pmap.neighbor(self._x, self._y, dy, dx)
+        level.occupancy.move(self, x, y)
+        self.last_y = self._y
+        self.last_x = self._x
+        self.heading = (dy, dx)
+        self._x = x
+        self._y = y
+
+    def move(self, level):
+        """Move the ghost one step in a random direction without rendering
+
+        The ghost picks one of its choices at random with its own generator,
+        and stays in place if it has none.
+
+        Arguments:
+            level {Level} -- a Level object that stores the map and the ghosts
+
+        Raises:
+            TypeError: raise if 'level' is not a Level object
+        """
+        #validate input
+        if not isinstance(level, Level):
+            raise TypeError("\'level\' must be a Level object")
+
+        choices = self.choices(level)
+        if choices:
+            self.take_exit(level, *self.rng.choice(choices))
 
     def play(self, scene, level):
         """Ghosts move randomly
         """
-        #validate input
+        #validate input, the scene module is only imported by the front ends since it needs curses
+        from scene import Scene
         if not isinstance(scene, Scene):
             raise TypeError("\'scene\' must be a Scene object")
         if not isinstance(level, Level):
             raise TypeError("\'level\' must be a Level object")
-        
-        #loop counter
-        loop = 0
-
-        while True:
-
-            #loop counter
-            loop += 1
-
-            #radom direction
-            direction_y = random.randint(-1, 1)
-            if direction_y == 0:
-                direction_x = random.randrange(-5, 5, 2)
-                if direction_x < 0:
-                    direction_x = -1
-                else:
-                    direction_x = 1
-            else:
-                if direction_y < 0:
-                    direction_y = -1
-                else:
-                    direction_y = 1
-                direction_x = 0
-            
-            #check if direction is different from last pos and other ghosts
-            if (self._x + direction_x != self.last_x or self._y + direction_y != self.last_y) and \
-                (self._x + direction_x != level.ghosts[0].x or self._y + direction_y != level.ghosts[0].y) and \
-                (self._x + direction_x != level.ghosts[1].x or self._y + direction_y != level.ghosts[1].y) and \
-                (self._x + direction_x != level.ghosts[2].x or self._y + direction_y != level.ghosts[2].y) and \
-                (self._x + direction_x != level.ghosts[3].x or self._y + direction_y != level.ghosts[3].y):               
-                #try the new position
-                try:
-                    if self._y+direction_y < 0:
-                        raise Exception
-                    if self._x+direction_x < 0:
-                        raise Exception
-                    level.pmap.grid[self._y+direction_y][self._x+direction_x]
-                except:
-                    pass
-                else:
-                    #check if new direction hit wall or not 
-                    if level.pmap.grid[self._y+direction_y][self._x+direction_x] not in NOT_WALKABLE:
-                        self.last_y = self._y
-                        self.last_x = self._x
-                        self._x += direction_x
-                        self._y += direction_y
-                        break
-                        
-            #prevent infinite loop
-            if loop == 10:
-                self._x = self.last_x
-                self._y = self.last_y
-                break
+
+        self.move(level)
 
         scene.render()
     
 class Blinky(Ghost):
+    __slots__ = ()
+
     def __init__(self, x, y):
         super().__init__(x, y, (0, 0, 0))
 
 class Pinky(Ghost):
+    __slots__ = ()
+
     def __init__(self, x, y):
         super().__init__(x, y, (0, 0, 0))
 
 class Inky(Ghost):
+    __slots__ = ()
+
     def __init__(self, x, y):
         super().__init__(x, y, (0, 0, 0))
 
 class Clyde(Ghost):
+    __slots__ = ()
+
     def __init__(self, x, y):
         super().__init__(x, y, (0, 0, 0))
 
+#class of each kind of ghost of the levelN.json files
+GHOST_KINDS = {
+    BLINKY: Blinky,
+    PINKY: Pinky,
+    INKY: Inky,
+    CLYDE: Clyde
+}
+
 class StandingStartAnnouncement:
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         if not isinstance(x, int):
             raise TypeError("\'x\' must be an integer.")
@@ -270,21 +352,133 @@ class StandingStartAnnouncement:
         self.x = x
         self.y = y
 
+class OccupancyGrid:
+    """Number of characters on each cell of a map
+
+    A cell is checked in constant time, so that finding the characters a
+    character runs into costs as much as the characters that move instead
+    of comparing every pair of them. The counts are a spatial hash of the
+    cells taken only, so that the grid takes as much memory as the
+    characters whatever the size of the map.
+
+    Arguments:
+        width {int} - width of the map
+        height {int} - height of the map
+
+    Attributes:
+        __counts - store the number of characters by cell id, for the cells taken only
+        __cells - store the cell id of each character of the last placement
+    """
+    __slots__ = ("__width", "__height", "__counts", "__cells")
+
+    def __init__(self, width, height):
+        self.__width = width
+        self.__height = height
+        self.__counts = collections.Counter()
+        self.__cells = {}
+
+    def place(self, characters):
+        """Count the characters on their cells, in place of the last placement"""
+        self.__cells = {character: character.y*self.__width + character.x for character in characters}
+        self.__counts = collections.Counter(self.__cells.values())
+
+    def move(self, character, x, y):
+        """Move a character of the last placement to the cell (x, y)"""
+        id_ = y*self.__width + x
+        counts = self.__counts
+        last = self.__cells[character]
+        if last == id_:
+            return
+        counts[last] -= 1
+        if not counts[last]:
+            del counts[last]
+        counts[id_] += 1
+        self.__cells[character] = id_
+
+    def count(self, x, y):
+        """Return the number of characters on the cell (x, y), 0 if it is off the map"""
+        if x < 0 or y < 0 or x >= self.__width or y >= self.__height:
+            return 0
+        return self.__counts.get(y*self.__width + x, 0)
+
+class GridRow:
+    """View of a line of a Map grid as a list of symbols
+
+    Arguments:
+        pmap {Map} - the Map the line belongs to
+        y {int} - y ordinate of the line
+
+    Attributes:
+        __pmap - store the Map
+        __offset - store the position of the line in the tiles of the Map
+    """
+    __slots__ = ("__pmap", "__offset")
+
+    def __init__(self, pmap, y):
+        self.__pmap = pmap
+        self.__offset = y*pmap.width
+
+    def __len__(self):
+        return self.__pmap.width
+
+    def __index(self, x):
+        """Return the position of the x ordinate in the tiles of the Map"""
+        width = self.__pmap.width
+        if x < 0:
+            x += width
+        if x < 0 or x >= width:
+            raise IndexError("grid line index out of range")
+        return self.__offset + x
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            return [self[x_] for x_ in range(*x.indices(len(self)))]
+        return self.__pmap.symbols[self.__pmap.tiles[self.__index(x)]]
+
+    def __setitem__(self, x, symbol):
+        if isinstance(x, slice):
+            for x_, symbol_ in zip(range(*x.indices(len(self))), symbol):
+                self[x_] = symbol_
+            return
+        self.__pmap.tiles[self.__index(x)] = self.__pmap.code(symbol)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def copy(self):
+        return self[:]
+
 class Map:
     """class Map of pacman game map
+
+    The grid is stored as a bytearray of one tile code per cell, line after
+    line, 'grid' is a view of it as lines of symbols.
     
     Arguments:
         data - argument that take data of pacman map
 
     Attributes:
-        __data - store a pacman map
         __height - height of the pacman map grid
         __width - width of the pacman map grid
-        __grid - pacman map grid
+        __tiles - tile code of each cell of the pacman map grid
+        __symbols - store the symbol of each tile code
+        __codes - store the tile code of each symbol
+        __walkable - store for each tile code if it can be walked on
+        __grid - pacman map grid view
+        __pellets - store the positions of the dots and power capsules left by symbol, None until first use
+        __pellet_counts - store the number of dots and power capsules left by symbol
+        __cell_graph - store the walkable Cells, built on first access
+        __node_graph - store the Nodes, built on first access
+        __exits - store the exit mask of each cell, built on first access
+        __steps - store the per-cell neighbor table of the exits, built on first access
+        __portals - store the cell (x, y) each portal mouth (x, y, dy, dx) leads to, found on first access
+        __build_lock - store the lock the lazy tables and graphs are built under, once
     """
 
     def __init__(self, data):
-        self.__data = data
         self.__height = len(data)
 
         #compute map width
@@ -296,21 +490,74 @@ class Map:
                 width = len(line)
         self.__width = width
 
-        #generate grid
-        grid = []
-        for x in range(len(data)):
-            grid_line = []
-            for y in range(width):
-                try:
-                    data[x][y]
-                except:
-                    grid_line.append(" ")
-                else:
-                    grid_line.append(data[x][y])
-            grid.append(grid_line)
-        self.__grid = grid
-        self.__cell_graph = []
-        self.__node_graph = []
+        #register tile codes
+        self.__symbols = []
+        self.__codes = {}
+        self.__walkable = bytearray()
+        for symbol in TILE_SYMBOLS:
+            self.code(symbol)
+
+        #generate grid, short lines are filled up with the code of ' '
+        self.__tiles = bytearray(self.__height*width)
+        for y, line in enumerate(data):
+            for symbol in set(line):
+                self.code(symbol)
+            self.__tiles[y*width:y*width+len(line)] = line.translate(self.__translation).encode("latin-1")
+        self.__grid = [GridRow(self, y) for y in range(self.__height)]
+        self.__build_lock = threading.RLock()
+        self.__cell_graph = None
+        self.__node_graph = None
+        self.__portals = None
+        self.__exits = None
+        self.__steps = None
+        self.index_pellets()
+
+    @classmethod
+    def from_tiles(cls, width, height, symbols, tiles, copy=True, pellet_counts=None):
+        """Return a Map of a grid already made of tile codes, e.g. read from a level cache
+
+        Arguments:
+            width {int} -- width of the pacman map grid
+            height {int} -- height of the pacman map grid
+            symbols {list} -- symbol of each tile code
+            tiles {bytes} -- tile code of each cell, line after line
+
+        Keyword Arguments:
+            copy {bool} -- copy the tiles into a bytearray, or wrap them in place if False, they
+                must then be a writable buffer, e.g. a copy on write mmap, and their codes are
+                trusted (default: {True})
+            pellet_counts {dict} -- number of pellets by symbol if already known, see
+                index_pellets (default: {None})
+
+        Raises:
+            ValueError: raise if 'tiles' does not hold a known tile code per cell of the grid
+
+        Returns:
+            Map -- a Map instance
+        """
+        if len(tiles) != width*height:
+            raise ValueError("\'tiles\' must hold width*height tile codes")
+        if copy and len(tiles) > 0 and max(tiles) >= len(symbols):
+            raise ValueError("\'tiles\' must hold codes of \'symbols\'")
+
+        pmap = cls.__new__(cls)
+        pmap.__height = height
+        pmap.__width = width
+        pmap.__symbols = []
+        pmap.__codes = {}
+        pmap.__walkable = bytearray()
+        for symbol in symbols:
+            pmap.code(symbol)
+        pmap.__tiles = bytearray(tiles) if copy else memoryview(tiles).cast("B")
+        pmap.__grid = [GridRow(pmap, y) for y in range(height)]
+        pmap.__build_lock = threading.RLock()
+        pmap.__cell_graph = None
+        pmap.__node_graph = None
+        pmap.__portals = None
+        pmap.__exits = None
+        pmap.__steps = None
+        pmap.index_pellets(pellet_counts)
+        return pmap
 
     @property
     def height(self):
@@ -323,13 +570,378 @@ class Map:
     @property
     def grid(self):
         return self.__grid
+
+    @property
+    def tiles(self):
+        return self.__tiles
+
+    @property
+    def symbols(self):
+        return self.__symbols
+
+    def code(self, symbol):
+        """Return the tile code of a symbol, registering it if it is a new one
+
+        Raises:
+            ValueError: raise if there are more than 256 different symbols on the map
+        """
+        if symbol not in self.__codes:
+            if len(self.__symbols) == 256:
+                raise ValueError("a map can not hold more than 256 different symbols")
+            self.__codes[symbol] = len(self.__symbols)
+            self.__symbols.append(symbol)
+            self.__walkable.append(symbol not in NOT_WALKABLE)
+            self.__translation = {ord(symbol_): code for symbol_, code in self.__codes.items()}
+        return self.__codes[symbol]
+
+    def symbol(self, x, y):
+        """Return the symbol of the cell (x, y)"""
+        return self.__symbols[self.__tiles[y*self.__width + x]]
+
+    def is_walkable(self, x, y):
+        """Return True if the cell (x, y) is on the map and can be walked on"""
+        if x < 0 or y < 0 or x >= self.__width or y >= self.__height:
+            return False
+        return self.__walkable[self.__tiles[y*self.__width + x]] == 1
+
+    def find_portals(self):
+        """Return the portals of the open edges of the map
+
+        A tunnel is a line whose first and last cells can be walked on while
+        the cells beside them along the edge can not, moving out of the map
+        from either end leads to the other one. The same goes for a column
+        and the top and bottom edges.
+
+        Returns:
+            list -- ((x, y, dy, dx), (x_, y_, dy_, dx_)) pairs of portal mouths, the cell of
+                each mouth and the move out of the map from it
+        """
+        width, height = self.__width, self.__height
+        portals = []
+        if width > 1:
+            for y in self.__find_mouths(self.__tiles[::width], self.__tiles[width - 1::width]):
+                portals.append(((0, y, 0, -1), (width - 1, y, 0, 1)))
+        if height > 1:
+            for x in self.__find_mouths(self.__tiles[:width], self.__tiles[(height - 1)*width:]):
+                portals.append(((x, 0, -1, 0), (x, height - 1, 1, 0)))
+        return portals
+
+    def __find_mouths(self, first, last):
+        """Return the positions along two opposite edges where both edges are tunnel mouths
+
+        The edges are read as one integer of a byte per cell as in
+        __build_exits, so that only the tiles of the edges are read.
+        """
+        walkable = bytes(self.__walkable).ljust(256, b"\0")
+        size = len(first)
+        first, last = (int.from_bytes(bytes(edge).translate(walkable), "little") for edge in (first, last))
+        beside = first << 8 | first >> 8 | last << 8 | last >> 8
+        mouths = (first & last & ~beside & ((1 << 8*size) - 1)).to_bytes(size, "little")
+        position = mouths.find(1)
+        while position != -1:
+            yield position
+            position = mouths.find(1, position + 1)
+
+    def set_portals(self, portals):
+        """Replace the portals of the map
+
+        Each pair of mouths is linked both ways, moving out of one mouth
+        leads to the cell of the other one. The exit masks and the graphs are
+        built again on next access.
+
+        Arguments:
+            portals {list} -- ((x, y, dy, dx), (x_, y_, dy_, dx_)) pairs of portal mouths, see find_portals
+
+        Raises:
+            ValueError: raise if a move out of a mouth is not one of EXITS
+        """
+        links = {}
+        for mouth, mouth_ in portals:
+            for (x, y, dy, dx), (x_, y_, _, _) in ((mouth, mouth_), (mouth_, mouth)):
+                if (dy, dx) not in EXIT_BIT:
+                    raise ValueError("the move out of a portal mouth must be one of " + str(EXITS))
+                links[(x, y, dy, dx)] = (x_, y_)
+        with self.__build_lock:
+            self.__portals = links
+            self.__exits = None
+            self.__steps = None
+            self.__cell_graph = None
+            self.__node_graph = None
+
+    @property
+    def portals(self):
+        """Dictionary of the cell (x, y) each portal mouth (x, y, dy, dx) leads to, read only
+
+        Unless set_portals has been called before, the portals are found on
+        the open edges of the map on first access, see find_portals, so that
+        a map whose level declares its portals never scans its edges.
+        """
+        if self.__portals is None:
+            with self.__build_lock:
+                if self.__portals is None:
+                    self.set_portals(self.find_portals())
+        return self.__portals
+
+    def neighbor(self, x, y, dy, dx):
+        """Return the cell (x, y) the move (dy, dx) from the cell (x, y) leads to, through a portal if it enters one"""
+        portals = self.__portals
+        if portals is None:
+            portals = self.portals
+        if portals:
+            return portals.get((x, y, dy, dx), (x + dx, y + dy))
+        return x + dx, y + dy
+
+    @property
+    def pellets(self):
+        """Dictionary of the sets of (x, y) positions of the pellets left by symbol, read only"""
+        if self.__pellets is None:
+            self.__pellets = self.__find_pellets()
+        return self.__pellets
+
+    @property
+    def dots_left(self):
+        return self.__pellet_counts[DOT]
+
+    @property
+    def power_capsules_left(self):
+        return self.__pellet_counts[POWER_CAPSULE]
+
+    @property
+    def pellets_left(self):
+        return self.__pellet_counts[DOT] + self.__pellet_counts[POWER_CAPSULE]
+
+    def __find_pellets(self):
+        """Return the sets of (x, y) positions of the pellets by symbol, scanning the tiles by chunks"""
+        pellets = {symbol: set() for symbol in PELLETS}
+        codes = [(bytes([self.code(symbol)]), pellets[symbol]) for symbol in PELLETS]
+        for start in range(0, len(self.__tiles), PELLET_SCAN_SIZE):
+            chunk = bytes(self.__tiles[start:start + PELLET_SCAN_SIZE])
+            for code, positions in codes:
+                position = chunk.find(code)
+                while position != -1:
+                    positions.add(((start + position) % self.__width, (start + position)//self.__width))
+                    position = chunk.find(code, position + 1)
+        return pellets
+
+    def index_pellets(self, pellet_counts=None):
+        """Build the pellet index from the grid
+
+        The index is kept up to date by eat, call it again only after the
+        grid has been written directly.
+
+        Keyword Arguments:
+            pellet_counts {dict} -- number of pellets left by symbol if already known, the
+                positions of the pellets are then only found on first use of 'pellets' (default: {None})
+        """
+        if pellet_counts is None:
+            self.__pellets = self.__find_pellets()
+            self.__pellet_counts = {symbol: len(positions) for symbol, positions in self.__pellets.items()}
+        else:
+            self.__pellets = None
+            self.__pellet_counts = {symbol: pellet_counts[symbol] for symbol in PELLETS}
+
+    def eat(self, x, y):
+        """Remove the pellet of the cell (x, y)
+
+        Arguments:
+            x {int} -- x ordinate of the cell
+            y {int} -- y ordinate of the cell
+
+        Returns:
+            str -- symbol of the eaten pellet, None if there was no pellet
+        """
+        symbol = self.symbol(x, y)
+        if symbol not in PELLETS:
+            return None
+
+        self.__tiles[y*self.__width + x] = self.__codes[' ']
+        self.__pellet_counts[symbol] -= 1
+        if self.__pellets is not None:
+            self.__pellets[symbol].discard((x, y))
+        return symbol
     
     @staticmethod
     def load_map(file_pathname):
         return Map(prettify_map(uncompress_map_with_rle(load_map(file_pathname))))
 
+    @property
+    def cell_graph(self):
+        """List of every walkable Cell ascending by id, built on first access
+
+        The first access of any thread builds the graph under a lock, the
+        other threads wait for it and share the same graph.
+        """
+        if self.__cell_graph is None:
+            with self.__build_lock:
+                if self.__cell_graph is None:
+                    self.__build_cell_graph()
+        return self.__cell_graph
+
+    @property
+    def node_graph(self):
+        """List of every Node of the walkable Cells, built on first access as cell_graph"""
+        if self.__node_graph is None:
+            with self.__build_lock:
+                if self.__node_graph is None:
+                    self.__build_node_graph()
+        return self.__node_graph
+
+    @property
+    def exits(self):
+        """Exit mask of each cell by cell id (y*width + x), built on first access
+
+        The bit i of a mask is set if the move EXITS[i] leads to a walkable
+        cell of the map, EXIT_CHOICES gives the moves of a mask. The bit 4 + i
+        is set as well if the move goes through a portal, see neighbor.
+        """
+        if self.__exits is None:
+            with self.__build_lock:
+                if self.__exits is None:
+                    self.__build_exits()
+        return self.__exits
+
+    @property
+    def steps(self):
+        """Per-cell neighbor table of the exits, built on first access
+
+        A tuple of the list of the cell id steps of the exits of each exit
+        mask, and of a dictionary of the cell id steps of the exits of each
+        cell id whose mask has exits through a portal. The neighbors of the
+        cell id_ are id_ + step for step in the steps of the cell if its
+        mask has any of PORTAL_EXITS, or else of its mask. It is built under
+        a lock as cell_graph.
+        """
+        if self.__steps is None:
+            with self.__build_lock:
+                if self.__steps is None:
+                    self.__build_steps()
+        return self.__steps
+
+    def __build_steps(self):
+        """Build the per-cell neighbor table of the exits, see steps"""
+        width, exits = self.__width, self.exits
+        steps = [[dy*width + dx for i, (dy, dx) in enumerate(EXITS) if mask >> i & 1 and not mask >> 4 + i & 1]
+            for mask in range(len(EXIT_CHOICES))]
+        portal_steps = {}
+        for x, y, _, _ in self.portals:
+            id_ = y*width + x
+            portal_steps[id_] = [y_*width + x_ - id_ for x_, y_ in
+                (self.neighbor(x, y, dy, dx) for dy, dx in EXIT_CHOICES[exits[id_]])]
+        self.__steps = (steps, portal_steps)
+
+    def __build_exits(self):
+        """Build the exit masks of the map
+
+        The walkable flags of the cells are read as one integer of a byte per
+        cell, shifting it by a line or by a byte gives the flags of the
+        neighbors of every cell at once.
+        """
+        width, size = self.__width, len(self.__tiles)
+        walkable = bytes(self.__tiles).translate(bytes(self.__walkable).ljust(256, b"\0"))
+        cells = int.from_bytes(walkable, "little")
+        not_first = int.from_bytes((b"\0" + b"\1"*(width - 1))*self.__height, "little")
+        not_last = int.from_bytes((b"\1"*(width - 1) + b"\0")*self.__height, "little")
+
+        up = cells << 8*width
+        down = cells >> 8*width
+        left = cells << 8 & not_first
+        right = cells >> 8 & not_last
+        exits = (up | down << 1 | left << 2 | right << 3) & ((1 << 8*size) - 1)
+        if not self.portals:
+            self.__exits = exits.to_bytes(size, "little")
+            return
+
+        #the few exits through a portal lead to the other mouth
+        exits = bytearray(exits.to_bytes(size, "little"))
+        for (x, y, dy, dx), (x_, y_) in self.portals.items():
+            bit = EXIT_BIT[(dy, dx)]
+            id_ = y*width + x
+            exits[id_] &= ~(bit | bit << 4)
+            if self.is_walkable(x, y) and self.is_walkable(x_, y_):
+                exits[id_] |= bit | bit << 4
+        self.__exits = bytes(exits)
+
+    def __build_cell_graph(self):
+        """Build the Cells of the map, link them and label their connected areas
+
+        The map is only read, the graph reflects the walls of the map at the
+        time it is built and is shared read-only by every caller.
+        """
+        width = self.__width
+        walkable = self.__walkable
+        exits = self.exits
+
+        #generate walkable Cell, ascending by id
+        cells = {}
+        for id_, code in enumerate(self.__tiles):
+            if walkable[code]:
+                cells[id_] = Cell(id_, id_ % width, id_//width)
+
+        #add neighbor for cells from their exits, ascending by id as well but for the portals
+        for _id, cell in cells.items():
+            mask = exits[_id]
+            for i in (0, 2, 3, 1): #up, left, right, down
+                if mask >> i & 1:
+                    x, y = self.neighbor(cell.x, cell.y, *EXITS[i])
+                    cell.add_neighbor_cell(cells[y*width + x], portal=bool(mask >> 4 + i & 1))
+
+        #flood fill the connected areas, each Cell is visited once
+        areas = [] #Cells of each connected area ascending by id
+        area_of = {} #store the area number of each Cell id
+        for cell in cells.values():
+            if cell.id in area_of:
+                continue
+            area_of[cell.id] = len(areas)
+            area = [cell]
+            walkable_cell = collections.deque([cell]) #store walkable cell that not walk through yet
+            while walkable_cell:
+                for neighbor in walkable_cell.popleft().neighbor_cell:
+                    if neighbor.id not in area_of:
+                        area_of[neighbor.id] = len(areas)
+                        area.append(neighbor)
+                        walkable_cell.append(neighbor)
+            area.sort(key=lambda cell_: cell_.id)
+            areas.append(area)
+
+        self.__areas = areas
+        self.__area_of = area_of
+        self.__cell_graph = list(cells.values())
+
+    def __build_node_graph(self):
+        """Build the Nodes of the intersection Cells and link them"""
+        node_dict = {}
+
+        #generate a node dictionary
+        for cell in self.cell_graph: # for each cell in cells
+            #if cell is intersection, cell is a Node
+            if cell.is_intersection():
+                node_dict[cell] = Node(cell)
+
+        #find neighbor node at the end of each corridor, weighted by its length
+        for cell in node_dict:
+            for neighbor in cell.neighbor_cell: # for each neighbor of the Cell
+                last_cell = cell #last cell = root Cell
+                cell_ = neighbor #current Cell
+                distance = 1
+                while len(cell_.neighbor_cell) == 2 and not cell_.is_intersection():
+                    next_cell = cell_.neighbor_cell[0]
+                    if next_cell is last_cell:
+                        next_cell = cell_.neighbor_cell[1]
+                    last_cell = cell_
+                    cell_ = next_cell
+                    distance += 1
+
+                #add neighbor node for the current node, skip dead ends and loops
+                if cell_.is_intersection() and cell_ is not cell:
+                    node_dict[cell].add_neighbor_node(node_dict[cell_], distance)
+
+        self.__nodes = node_dict
+        self.__node_graph = list(node_dict.values())
+
     def build_graph(self, x, y):
-        """Return a list of walkable Cells
+        """Return a list of the walkable Cells reachable from a Cell
+
+        The Cells are taken from the cached cell graph, the map is not modified.
         
         Arguments:
             x {int} -- x ordinate of the first Cell
@@ -352,87 +964,22 @@ class Map:
             raise ValueError("\'x\' and \'y\' must be zero or a positive integer")
         if self.__grid[y][x] in BORDER_SYMBOL:
             raise AssertionError("\'x\' and \'y\' must be the coordinate of a walkable Cell")
-        
-        #list of Cell
-        cells = {}
-        walkable_cell = [(y, x)] #store walkable cell that not walk through yet
-        grid = self.__grid.copy()
-
-        while True:
-            cell = walkable_cell.pop(0) #get a walkable cell
-            _y, _x = cell[0], cell[1] # x and y ordinate of the cell
-            
-            #compute Cell id
-            _id = _y*self.__width + _x
-
-            #generate walkable Cell
-            if grid[_y][_x] not in NOT_WALKABLE:
-                cells[_id] = Cell(_id, _x, _y)
-            
-            #look up the top cell
-            try:
-                if _y - 1 < 0:
-                    raise Exception
-                if grid[_y-1][_x] in NOT_WALKABLE:
-                    raise Exception
-            except:
-                pass
-            else:
-                walkable_cell.append((_y-1, _x))
-
-            #look up the bottom cell
-            try:
-                if grid[_y+1][_x] in NOT_WALKABLE:
-                    raise Exception
-            except:
-                pass
-            else:
-                walkable_cell.append((_y+1, _x))
-
-            #look up the right cell
-            try:
-                if grid[_y][_x+1] in NOT_WALKABLE:
-                    raise Exception
-            except:
-                pass
-            else:
-                walkable_cell.append((_y, _x+1))
-
-            #look up the left cell
-            try:
-                if _x - 1 < 0:
-                    raise Exception
-                if grid[_y][_x -1] in NOT_WALKABLE:
-                    raise Exception
-            except:
-                pass
-            else:
-                walkable_cell.append((_y, _x-1))
-
-            grid[_y][_x] = NOT_WALKABLE[0] #remove generated Cell from the clone grid
-
-            if walkable_cell == []:#break if there is no walkable Cell left
-                break
-        
-        #sort the results ascending by id
-        ids = sorted(cells) #sorted id
-        cell_list = []
-        
-        for id_ in ids:
-            cell_list.append(cells[id_])
-        
-        #add neighbor for cells
-        for cell in cell_list:
-            for other in cell_list:
-                if cell.id == other.id: #skip if the Cell meet itself
-                    continue
-                if math.sqrt(math.pow(other.x-cell.x, 2) + math.pow(other.y-cell.y, 2)) == 1:
-                    cell.add_neighbor_cell(other)
 
-        #save cell graph
-        self.__cell_graph = cell_list
+        self.cell_graph #build the graph on first use
+        width = self.__width
+        _id = y*width + x
+
+        #a Cell that can not be walked on joins the areas around it
+        if _id in self.__area_of:
+            ids = [_id]
+        else:
+            ids = [id_ for id_, inside in ((_id - width, y > 0), (_id + width, y + 1 < self.__height),
+                (_id - 1, x > 0), (_id + 1, x + 1 < width)) if inside]
+        areas = sorted({self.__area_of[id_] for id_ in ids if id_ in self.__area_of})
 
-        return cell_list
+        if len(areas) == 1:
+            return list(self.__areas[areas[0]])
+        return sorted((cell for area in areas for cell in self.__areas[area]), key=lambda cell: cell.id)
 
     def build_weighted_graph(self, x, y):
         """Return a list of Node that represents a Node graph
@@ -444,94 +991,106 @@ class Map:
         Returns:
             list -- a list of Node instance
         """
-        #build a graph
         cells = self.build_graph(x, y)
-        node_dict = {}
+        self.node_graph #build the graph on first use
+        return [self.__nodes[cell] for cell in cells if cell in self.__nodes]
 
-        #generate a node dictionary
-        for cell in cells: # for each cell in cells
-            #if cell is intersection, cell is a Node
-            if cell.is_intersection():
-                node_dict[cell] = Node(cell)
+    def __search(self, source_node, destination_node, heuristic):
+        """Return the shortest path between two Nodes and its length
 
-        #find neighbor node
-        for cell in node_dict:
-            for neighbor in cell.neighbor_cell: # for each neighbor of the Cell
-                last_cell = cell #last cell = root Cell
-                cell_  = neighbor #current Cell
-                loop = True # loop handler
-                while loop:
-                    if len(cell_.neighbor_cell) == 1:
-                        break
-                    for cell__ in cell_.neighbor_cell:
-                        if cell__ is last_cell: #if cell is last cell
-                            continue
-                        elif cell__.is_intersection() and cell__ is not cell: #if cell is interection
-                            #add neighbor node for the current node
-                            node_dict[cell].add_neighbor_node(node_dict[cell__],\
-                                int(math.sqrt(math.pow(cell.x - cell__.x, 2)+math.pow(cell.y - cell__.y, 2)))) 
-                            loop = False # end while loop
-                            break
-                        else: # if cell is not an intersectionq
-                            last_cell = cell_
-                            cell_ = cell__ 
-                            break
-        
-        #save node graph
-        self.__node_graph = list(node_dict.values())
+        Best first search of the Node graph with a binary heap, the graph is
+        not modified.
 
-        return self.__node_graph
+        Arguments:
+            source_node {Node} -- Node the path starts from
+            destination_node {Node} -- Node the path ends at
+            heuristic {function} -- lower bound of the distance from a Node to the destination Node
 
-    def find_shortest_path(self, source_node, destination_node):
-        
+        Raises:
+            TypeError: raise if 'source_node' or 'destination_node' is not a Node instance
+
+        Returns:
+            tuple -- list of Nodes from the source to the destination Node and the length of
+                the path, ([], None) if the destination Node can not be reached
+        """
         #validate input
         if not isinstance(source_node, Node):
             raise TypeError("\'source_node\' must be an Node instance")
         if not isinstance(destination_node, Node):
             raise TypeError("\'destination_node\' must be an Node instance")
 
-        #preprocessing assignment
-        distance = {} # store the distance between the node and the source node
-        prev_node = {} # store the current node and its previous node
-        for node in self.__node_graph:
-            if node is source_node:
-                distance[node] = 0 # source node == 0
-            else:
-                distance[node] = 1000 # disance node == infinite
-
-        unvisited_node = self.__node_graph #store unvisited node store from minimum distance to max distance
-        i = 0
-
-        while unvisited_node != []:
-            current_node = unvisited_node[i] # assign the current node
-
-            for node in current_node.neighbor_nodes: # for each neighbor node of current node
-                distance_ = node[0] + distance[node[1]] #compute the distance between
-                
-                if distance_ < distance[current_node]: # if computed distance less than known distance
-                    distance[current_node] = distance_
-                    prev_node[current_node] = node[1]
-                    if unvisited_node != []:
-                        unvisited_node.pop(i) 
-            
-            i += 1
-            if i >= len(unvisited_node):
-                i = 0               
-                    
+        distance = {source_node: 0} # store the distance between the node and the source node
+        prev_node = {source_node: None} # store the current node and its previous node
+        visited = set()
+        count = itertools.count() # break ties without comparing Nodes
+        unvisited_node = [(heuristic(source_node), next(count), source_node)]
+
+        while unvisited_node:
+            _, _, current_node = heapq.heappop(unvisited_node)
+            if current_node is destination_node:
+                break
+            if current_node in visited: # skip outdated entries of the heap
+                continue
+            visited.add(current_node)
+
+            for length, node in current_node.neighbor_nodes: # for each neighbor node of current node
+                distance_ = distance[current_node] + length
+                if node not in distance or distance_ < distance[node]:
+                    distance[node] = distance_
+                    prev_node[node] = current_node
+                    heapq.heappush(unvisited_node, (distance_ + heuristic(node), next(count), node))
+        else:
+            return [], None
 
         #back track the path from destination node to source node
         path = []
         current_node = destination_node
-        
-        while True:
-            path.insert(0, current_node)
+        while current_node is not None:
+            path.append(current_node)
             current_node = prev_node[current_node]
+        path.reverse()
 
-            if current_node is source_node:
-                path.insert(0, current_node)
-                break
+        return path, distance[destination_node]
+
+    def find_shortest_path(self, source_node, destination_node):
+        """Return the shortest path between two Nodes and its length with Dijkstra's algorithm
+
+        Arguments:
+            source_node {Node} -- Node the path starts from
+            destination_node {Node} -- Node the path ends at
+
+        Returns:
+            tuple -- list of Nodes from the source to the destination Node and the length of
+                the path, ([], None) if the destination Node can not be reached
+        """
+        return self.__search(source_node, destination_node, lambda node: 0)
+
+    def find_shortest_path_a_star(self, source_node, destination_node):
+        """Return the shortest path between two Nodes and its length with A* algorithm
+
+        The Manhattan distance to the destination Node guides the search, or
+        the walk to the nearest portal mouth and from the nearest one to the
+        destination Node if it is shorter.
 
-        return path
+        Arguments:
+            source_node {Node} -- Node the path starts from
+            destination_node {Node} -- Node the path ends at
+
+        Returns:
+            tuple -- list of Nodes from the source to the destination Node and the length of
+                the path, ([], None) if the destination Node can not be reached
+        """
+        if not self.portals:
+            return self.__search(source_node, destination_node,
+                lambda node: abs(node.x - destination_node.x) + abs(node.y - destination_node.y))
+
+        #a path through portals walks to a mouth, steps through and walks on from a mouth
+        mouths = {(x, y) for x, y, _, _ in self.portals}
+        from_portals = 1 + min(abs(x - destination_node.x) + abs(y - destination_node.y) for x, y in mouths)
+        def heuristic(node):
+            return min(abs(node.x - destination_node.x) + abs(node.y - destination_node.y),
+                min(abs(node.x - x) + abs(node.y - y) for x, y in mouths) + from_portals)
+        return self.__search(source_node, destination_node, heuristic)
         
   
 class Level:
@@ -546,8 +1105,21 @@ class Level:
         self.pmap = pmap
         self.objects = objects
         self.pacman = objects[0]
-        self.ghosts = objects[1:5]
-        self.bonuses = objects[5]
+        self.ghosts = [object_ for object_ in objects if isinstance(object_, Ghost)]
+        self.bonuses = [object_ for object_ in objects if isinstance(object_, Bonus)]
+        self.standing_start_announcement = next(
+            (object_ for object_ in objects if isinstance(object_, StandingStartAnnouncement)), None)
+        self.occupancy = OccupancyGrid(pmap.width, pmap.height)
+        self.occupancy.place(self.ghosts)
+
+    def seed_ghosts(self, seed=None):
+        """Seed the random generator of each ghost, so that their moves can be replayed
+
+        Keyword Arguments:
+            seed {int} -- seed of the ghosts, seeded from the system if None (default: {None})
+        """
+        for i, ghost in enumerate(self.ghosts):
+            ghost.rng.seed(None if seed is None else seed*len(self.ghosts) + i)
 
     @staticmethod
     def __build_instance(number, pmap, objects):    
@@ -557,7 +1129,19 @@ class Level:
         return LevelImpl(number, pmap, objects)
 
     @classmethod
-    def load(cls, number, root_path_name="./"):
+    def load(cls, number, root_path_name="./", pmap=None):
+        """Return the Level of a number loaded from the map directory
+
+        Arguments:
+            number {int} -- level of the game
+
+        Keyword Arguments:
+            root_path_name {str} -- directory holding the map directory (default: {"./"})
+            pmap {Map} -- map of the level already loaded, loaded from levelN.rle if None (default: {None})
+
+        Returns:
+            Level -- the Level instance
+        """
         path = pathlib.PosixPath(root_path_name)
         if root_path_name != "./":
             if  not path.is_dir():
@@ -569,318 +1153,103 @@ class Level:
         map_level = root_path_name+"/map/level"+str(number)
 
         #load data from level?.json file
-        data = json.load(open(map_level+".json"))
+        with open(map_level+".json") as file:
+            data = json.load(file)
 
-        #generate objects
-        objects = [
-            Pacman(data[PACMAN][X],data[PACMAN][Y], PACMAN_SYMBOL, (255,255,0)),
-            Pinky(data[PINKY][X], data[PINKY][Y]),
-            Inky(data[INKY][X], data[INKY][Y]),
-            Blinky(data[BLINKY][X], data[BLINKY][Y]),
-            Clyde(data[CLYDE][X], data[CLYDE][Y]),
-            Bonus(data[CHERRY][0][X], data[CHERRY][0][Y], data[CHERRY][0][SYMBOL], data[CHERRY][0][POINTS]),
-            StandingStartAnnouncement(data[STANDING_START_ANNOUNCEMENT][X],\
-                 data[STANDING_START_ANNOUNCEMENT][Y])
-        ]
-        
-        return cls.__build_instance(number, Map.load_map(map_level+".rle"), objects)
+        if pmap is None:
+            pmap = Map.load_map(map_level+".rle")
 
-class Palette:
-    """
-    Return a Palette instance to manipulate curses color library
-    """
+        return cls.from_data(number, pmap, data)
+
+    @classmethod
+    def from_data(cls, number, pmap, data):
+        """Return the Level of a map and of the spawn points of its characters
 
-    def __init__(self):
-        #store pair color in this list meaning: pair_number = indice + 2 
-        self.__color_number = []
+        The ghosts are the GHOSTS list of {KIND, X, Y} of the data if any,
+        any number of them, or else the four named ghosts. The bonuses are
+        the ones of the CHERRY list and of the optional BONUSES list. The
+        optional PORTALS list of pairs of {X, Y, DX, DY} mouths replaces the
+        portals found on the open edges of the map.
 
-    def get_composite_color(self, foreground_color, background_color=(0, 0, 0)):
-        """Return pair_number of curses pair_color
-        
         Arguments:
-            foreground_color {tuple} -- foreground color of the symbol
-        
-        Keyword Arguments:
-            background_color {tuple} -- background color of the symbol (default: {(0, 0, 0})
-        
+            number {int} -- level of the game
+            pmap {Map} -- map of the level
+            data {dict} -- spawn points of the characters and bonuses, as in the levelN.json files
+
         Raises:
-            TypeError: raise if foreground_color is not a tuple
-            AssertionError: raise if foreground_color must be a tuple of three paramenter
-            TypeError: raise if foreground_color must be a tuple of three integer
-            ValueError: raise if foreground_color must be a tuple of three integer between 0 and 255
-        
+            ValueError: raise if the kind of a ghost is not one of GHOST_KINDS
+
         Returns:
-            int -- an integer represents pair_number of a pair_color
+            Level -- the Level instance
         """
-        #validate foreground_color argument
-        if not isinstance(foreground_color, tuple):
-            raise TypeError("foreground_color must be a tuple")
-        if len(foreground_color) != 3:
-            raise AssertionError("foreground_color must be a tuple of three paramenter")
-        if not all([isinstance(i, int) for i in foreground_color]):
-            raise TypeError("foreground_color must be a tuple of three integer")
-        if (foreground_color[0] < 0 or foreground_color[0] > 255) and \
-            (foreground_color[1] < 0 or foreground_color[1] > 255) and \
-                (foreground_color[2] < 0 or foreground_color[2] > 255):
-            raise ValueError("foreground_color must be a tuple of three integer between 0 and 255")
-        
-        #validate background_color argument
-        if background_color != (0, 0, 0):
-            if not isinstance(background_color, tuple):
-                raise TypeError("background_color must be a tuple")
-            if len(background_color) != 3:
-                raise AssertionError("background_color must be a tuple of three paramenter")
-            if not all([isinstance(i, int) for i in background_color]):
-                raise TypeError("background_color must be a tuple of three integer")
-            if (background_color[0] < 0 or background_color[0] > 255) and \
-                (background_color[1] < 0 or background_color[1] > 255) and \
-                    (background_color[2] < 0 or background_color[2] > 255):
-                raise ValueError("background_color must be a tuple of three integer between 0 and 255")
-
-        #create pair_color values
-        pair_color = (foreground_color, background_color)
-
-        #if color has registered
-        if pair_color in self.__color_number:
-            return self.__color_number.index(pair_color) + 2
-
-        #if color has not registered yet
+        if GHOSTS in data:
+            ghosts = data[GHOSTS]
         else:
-            pair_number = len(self.__color_number) + 1
-            curses.init_color(pair_number*2, int(foreground_color[0]/256*1000), int(foreground_color[1]/256*1000), int(foreground_color[2]/256*1000))
-            curses.init_color(pair_number*2+1, int(background_color[0]/256*1000), int(background_color[1]/256*1000), int(background_color[2]/256*1000))
-            curses.init_pair(pair_number*2, pair_number*2, pair_number*2+1)
-            self.__color_number.append(pair_color)
-
-            return pair_number
+            ghosts = [dict(data[kind], **{KIND: kind}) for kind in [PINKY, INKY, BLINKY, CLYDE]]
+        for ghost in ghosts:
+            if ghost[KIND] not in GHOST_KINDS:
+                raise ValueError("\'kind\' of a ghost must be one of " + ", ".join(GHOST_KINDS))
 
-class Scene:
-    """The class control the output graphic of the game
-    
-    Raises:
-        TypeError: raise if 'window' is not an object
-        TypeError: raise if 'level' is not an Level object
+        #generate objects
+        objects = [Pacman(data[PACMAN][X],data[PACMAN][Y], PACMAN_SYMBOL, (255,255,0))]
+        objects += [GHOST_KINDS[ghost[KIND]](ghost[X], ghost[Y]) for ghost in ghosts]
+        objects += [Bonus(bonus[X], bonus[Y], bonus[SYMBOL], bonus[POINTS])
+            for bonus in data.get(CHERRY, []) + data.get(BONUSES, [])]
+        objects.append(StandingStartAnnouncement(data[STANDING_START_ANNOUNCEMENT][X],\
+            data[STANDING_START_ANNOUNCEMENT][Y]))
+
+        if PORTALS in data:
+            pmap.set_portals([tuple((mouth[X], mouth[Y], mouth[DY], mouth[DX]) for mouth in portal)
+                for portal in data[PORTALS]])
+        
+        return cls.__build_instance(number, pmap, objects)
 
-    Arguments:
-        window {object} - a window object of curses library
-        level {Level} - a Level object
+    @staticmethod
+    def check_new(map_level):
+        """Check that the files of a level to write are not there yet
 
-    Attributes:
-        __window - store a window object
-        __level - store a Level object    
-        points - store points gained by player
-        life - store the amount of life left
-        death - store live condition of Pacman
-        power_capsule - strigger Pacman eat capsule event
-        flash - strigger flash stage of ghosts after pacman eat power capsule
-        standing_start_announcement - strigger game is starting event
-        blinky_ate, pinky_ate, inky_ate, clyde_ate - strigger ghosts have been eaten event
-    """
-    
-    def __init__(self, window, level):
-        if not isinstance(window, object):
-            raise TypeError("\'window\' must be a window object.")
-        if not isinstance(level, Level):
-            raise TypeError("\'level\' must be a Level object.")
-        self.__window = window
-        self.__level = level
-        self.points = 0
-        self.life = 4
-        self.death = False
-        self.power_capsule = False
-        self.flash = False
-        self.standing_start_announcement = False
-        self.blinky_ate = False
-        self.pinky_ate = False
-        self.inky_ate = False
-        self.clyde_ate = False
-
-    #instance methos that control resizing
-    def __is_fully_visible(self):
-        """Check if the window is large enough
-        
-        Returns:
-            bool -- window is large enough or not
-        """
-        window_size = self.__window.getmaxyx()
-        if window_size[1] < 38 or window_size[0] < 38:
-            return True
-        return False
-    
-    #centering text
-    def __centering_text(self, y, x, text, color):
-        self.__window.addstr(y,x-int(len(text)/2), text, color)
-
-    def __display_header_and_footer(self, resize_x, resize_y):
-        """Display header and footer of the game scene"""
-        self.__window.addstr(2+resize_y, 6+resize_x, "1UP    HIGH SCORE    2UP", curses.color_pair(16))
-        self.__centering_text(3+resize_y, 7+resize_x, str(self.points), curses.color_pair(16))
-        self.__centering_text(3+resize_y, 17+resize_x, str(self.points), curses.color_pair(16))
-        self.__centering_text(3+resize_y, 28+resize_x, "0", curses.color_pair(16))
-        self.__window.addstr(34+resize_y, 6+resize_x, PACMAN_SYMBOL*self.life, curses.color_pair(2))
-
-    def __display_the_map(self, resize_x, resize_y):
-        """Display pacman map"""
-        grid = self.__level.pmap.grid
-        for y in range(self.__level.pmap.height):
-            for x in range(self.__level.pmap.width):
-                if grid[y][x] in BORDER_SYMBOL:
-                    self.__window.addch(y+4+resize_y, x+4+resize_x, grid[y][x], curses.color_pair(12))
-                elif grid[y][x] in ['·', '•']:
-                    self.__window.addch(y+4+resize_y, x+4+resize_x, grid[y][x], curses.color_pair(14))
-                elif grid[y][x] in ['x', '-']:
-                    self.__window.addch(y+4+resize_y, x+4+resize_x, ' ', curses.color_pair(12))
-                else:
-                    self.__window.addch(y+4+resize_y, x+4+resize_x, grid[y][x], curses.color_pair(12))
-
-    def __display_bonuses(self, resize_x, resize_y):
-        """Display bonuses"""
-        if self.__level.bonuses.points != 0 and  \
-        (self.__level.ghosts[0].x != self.__level.bonuses.x and self.__level.ghosts[0].y != self.__level.bonuses.y) and \
-            (self.__level.ghosts[1].x != self.__level.bonuses.x and self.__level.ghosts[1].y != self.__level.bonuses.y) and  \
-                (self.__level.ghosts[2].x != self.__level.bonuses.x and self.__level.ghosts[2].y != self.__level.bonuses.y) and \
-                    (self.__level.ghosts[3].x != self.__level.bonuses.x and self.__level.ghosts[3].y != self.__level.bonuses.y) and \
-                        (self.__level.pacman.x != self.__level.bonuses.x and self.__level.pacman.y != self.__level.bonuses.y):
-
-            self.__window.addch(self.__level.bonuses.y+4+resize_y, self.__level.bonuses.x+4+resize_x, self.__level.bonuses.symbol, curses.color_pair(12))
-            self.__window.addch(34+resize_y, 28+resize_x, self.__level.bonuses.symbol)
-
-    def __display_animated_character(self, resize_x, resize_y):
-        """Display pacman and ghosts"""
-
-        if not self.power_capsule:
-            self.__window.addch(self.__level.ghosts[0].y+4+resize_y, self.__level.ghosts[0].x+4+resize_x, self.__level.ghosts[0].symbol, curses.color_pair(4))
-            self.__window.addch(self.__level.ghosts[1].y+4+resize_y, self.__level.ghosts[1].x+4+resize_x, self.__level.ghosts[1].symbol, curses.color_pair(6))
-            self.__window.addch(self.__level.ghosts[2].y+4+resize_y, self.__level.ghosts[2].x+4+resize_x, self.__level.ghosts[2].symbol, curses.color_pair(8))
-            self.__window.addch(self.__level.ghosts[3].y+4+resize_y, self.__level.ghosts[3].x+4+resize_x, self.__level.ghosts[3].symbol, curses.color_pair(10))
-
-        #if pacman ate power capsule
-        else:
-            if not self.flash:
-                #blue ghosts
-                self.__window.addch(self.__level.ghosts[0].y+4+resize_y, self.__level.ghosts[0].x+4+resize_x, self.__level.ghosts[0].symbol, curses.color_pair(18))
-                self.__window.addch(self.__level.ghosts[1].y+4+resize_y, self.__level.ghosts[1].x+4+resize_x, self.__level.ghosts[1].symbol, curses.color_pair(18))
-                self.__window.addch(self.__level.ghosts[2].y+4+resize_y, self.__level.ghosts[2].x+4+resize_x, self.__level.ghosts[2].symbol, curses.color_pair(18))
-                self.__window.addch(self.__level.ghosts[3].y+4+resize_y, self.__level.ghosts[3].x+4+resize_x, self.__level.ghosts[3].symbol, curses.color_pair(18))
-
-            else:
-                #blue ghosts
-                self.__window.addch(self.__level.ghosts[0].y+4+resize_y, self.__level.ghosts[0].x+4+resize_x, self.__level.ghosts[0].symbol, curses.color_pair(16))
-                self.__window.addch(self.__level.ghosts[1].y+4+resize_y, self.__level.ghosts[1].x+4+resize_x, self.__level.ghosts[1].symbol, curses.color_pair(16))
-                self.__window.addch(self.__level.ghosts[2].y+4+resize_y, self.__level.ghosts[2].x+4+resize_x, self.__level.ghosts[2].symbol, curses.color_pair(16))
-                self.__window.addch(self.__level.ghosts[3].y+4+resize_y, self.__level.ghosts[3].x+4+resize_x, self.__level.ghosts[3].symbol, curses.color_pair(16))
-                
-                self.__window.refresh()
-                curses.napms(10)
-
-                #white ghosts
-                self.__window.addch(self.__level.ghosts[0].y+4+resize_y, self.__level.ghosts[0].x+4+resize_x, self.__level.ghosts[0].symbol, curses.color_pair(18))
-                self.__window.addch(self.__level.ghosts[1].y+4+resize_y, self.__level.ghosts[1].x+4+resize_x, self.__level.ghosts[1].symbol, curses.color_pair(18))
-                self.__window.addch(self.__level.ghosts[2].y+4+resize_y, self.__level.ghosts[2].x+4+resize_x, self.__level.ghosts[2].symbol, curses.color_pair(18))
-                self.__window.addch(self.__level.ghosts[3].y+4+resize_y, self.__level.ghosts[3].x+4+resize_x, self.__level.ghosts[3].symbol, curses.color_pair(18))
-            
-
-    def __display_pacman_dead(self, resize_x, resize_y):
-        """Display pacman dead scene"""
-
-        #display pacman
-        if not self.death:
-            self.__window.addch(self.__level.pacman.y+4+resize_y, self.__level.pacman.x+4+resize_x, self.__level.pacman.symbol, curses.color_pair(2))
-        else:
-            #display death scene
-            self.__window.addch(self.__level.pacman.y+4+resize_y, self.__level.pacman.x+4+resize_x, SKULL)
-            curses.napms(100)
-            self.__window.refresh()
-
-            self.__window.addch(self.__level.pacman.y+4+resize_y, self.__level.pacman.x+4+resize_x, EXPLODING)
-            curses.napms(100)
-            self.__window.refresh()
-
-    def __display_ghosts_eyes(self, resize_x, resize_y):
-        """Display ghost eyes after ghost have been eaten"""
-        if self.blinky_ate:
-            self.__window.addch(self.__level.ghosts[0].y+4+resize_y, self.__level.ghosts[0].x+4+resize_x, EYES)
-        if self.pinky_ate:
-            self.__window.addch(self.__level.ghosts[1].y+4+resize_y, self.__level.ghosts[1].x+4+resize_x, EYES)
-        if self.inky_ate:
-            self.__window.addch(self.__level.ghosts[2].y+4+resize_y, self.__level.ghosts[2].x+4+resize_x, EYES)
-        if self.clyde_ate:
-            self.__window.addch(self.__level.ghosts[3].y+4+resize_y, self.__level.ghosts[3].x+4+resize_x, EYES)
-         
-    def __display_standing_start_annoucement(self, resize_x, resize_y):
-
-        if self.standing_start_announcement:
-            #display the map
-            self.__window.refresh()
-            curses.napms(200)
-
-            #display the announcement
-            self.__window.addstr(self.__level.objects[6].y+4+resize_y, self.__level.objects[6].x+1+resize_x, READY, curses.color_pair(2))
-            self.__window.refresh()
-            curses.napms(200)
-    
-    def __display_enlarge_annoucement(self, resize_x, resize_y):
-        """Display enlarge screen annoucement"""
-        
-        self.__window.clear()
-        self.__window.addstr("Enlarge your... terminal!", curses.color_pair(16))
-        self.__window.refresh()
+        Arguments:
+            map_level {str} -- pathname of the level files without their extension, e.g. "./map/level1"
 
-    #instance method that display the game
-    def render(self):
-        """Display the graphic
-        
-        Returns:
-            int -- return an ascii value of pressed key
+        Raises:
+            ValueError: raise if the levelN.rle file exists already
+            FileExistsError: raise if the levelN.json file exists already
         """
-        #start curses color library
-        curses.start_color()
-
-        # Create a palette and register the colors.
-        palette = Palette()
-        palette.get_composite_color(COLOR_RGB_PACMAN)
-        palette.get_composite_color(COLOR_RGB_BLINKY)
-        palette.get_composite_color(COLOR_RGB_PINKY)
-        palette.get_composite_color(COLOR_RGB_INKY)
-        palette.get_composite_color(COLOR_RGB_CLYDE)
-        palette.get_composite_color(COLOR_RGB_BLUE)
-        palette.get_composite_color(COLOR_RGB_ORANGE)
-        palette.get_composite_color(COLOR_RGB_WHITE)
-        palette.get_composite_color(COLOR_RGB_BRIGHT_BLUE)
-
-        #control graphics and resizing window
-        window_size = self.__window.getmaxyx()
-        resize_y = int((window_size[0] - 36)/2)
-        resize_x = int((window_size[1] - 36)/2)
-
-        #check if map is fully visible
-        visible = self.__is_fully_visible()
-        if visible:
-            self.__display_enlarge_annoucement(resize_x, resize_y)
-        
-        else:
-            # display header and footer
-            self.__display_header_and_footer(resize_x, resize_y)
-
-            #display the map
-            self.__display_the_map(resize_x, resize_y)
-            
-            #display bonuses
-            self.__display_bonuses(resize_x, resize_y)
-            
-            #display animated character
-            self.__display_animated_character(resize_x, resize_y)
+        if os.path.exists(map_level + ".rle"):
+            raise ValueError("file_pathname already exists, please choose another file_pathname.")
+        if os.path.exists(map_level + ".json"):
+            raise FileExistsError("\'" + map_level + ".json\' exists already")
 
-            #ghost become eyes after being eaten
-            self.__display_ghosts_eyes(resize_x, resize_y)
+    @staticmethod
+    def save(simplified_map, spawns, map_level):
+        """Write a level as levelN.rle and levelN.json files, or none of them
 
-            self.__display_pacman_dead(resize_x, resize_y)
+        Both files are written under temporary names and moved in place once
+        they are complete, so that a failure leaves no levelN.rle without its
+        levelN.json.
 
-        #standing start announcement
-        self.__display_standing_start_annoucement(resize_x, resize_y)
+        Arguments:
+            simplified_map {list} -- list of string line of the simplified map
+            spawns {dict} -- spawn points of the characters and bonuses, as in the levelN.json files
+            map_level {str} -- pathname of the level files without their extension, e.g. "./map/level1"
 
-        #refresh grahics
-        self.__window.refresh()
+        Raises:
+            ValueError: raise if the levelN.rle file exists already
+            FileExistsError: raise if the levelN.json file exists already
+        """
+        Level.check_new(map_level)
+
+        temporary_level = map_level + "." + str(os.getpid())
+        try:
+            save_map(compress_map_with_rle(simplified_map), temporary_level + ".rle")
+            with open(temporary_level + ".json", "x") as file:
+                json.dump(spawns, file, indent=2)
+            os.replace(temporary_level + ".json", map_level + ".json")
+            os.replace(temporary_level + ".rle", map_level + ".rle")
+        finally:
+            for extension in (".rle", ".json"):
+                if os.path.exists(temporary_level + extension):
+                    os.remove(temporary_level + extension)
 
 class Cell:
     """Cell of a pacman map
@@ -901,6 +1270,8 @@ class Cell:
         __neighbor_cell - store address its neighbor Cell
         __intersection - store number of Cell that the Cell itself is neighbor
     """
+    __slots__ = ("__id", "__x", "__y", "__neighbor_cell", "intersection")
+
     def __init__(self, id_, x, y):
         #validate input
         if not isinstance(id_, int):
@@ -935,12 +1306,15 @@ class Cell:
     def neighbor_cell(self):
         return self.__neighbor_cell
 
-    def add_neighbor_cell(self, other):
+    def add_neighbor_cell(self, other, portal=False):
         """Add the other Cell as its neighbor Cell
         
         Arguments:
             other {obj} -- a Cell object that near the current Cell
 
+        Keyword Arguments:
+            portal {bool} -- True if the other Cell is reached through a portal, wherever it is (default: {False})
+
         Returns:
             bool -- True if intersection >= 3 else False
         """
@@ -949,7 +1323,7 @@ class Cell:
             raise TypeError("\'cell\' must be a Cell object")
 
         #find distance between two Cell
-        if int(math.sqrt(math.pow(other.x-self.x, 2) + math.pow(other.y-self.y, 2))) != 1:
+        if not portal and int(math.sqrt(math.pow(other.x-self.x, 2) + math.pow(other.y-self.y, 2))) != 1:
             raise AssertionError("other Cell must be a neighbor of the current Cell")
         
         #add neighbor Cell to the list
@@ -980,6 +1354,8 @@ class Node:
         __cell -- store an Cell instance
         __neighbor_node -- store neighbor node of the current Node
     """
+    __slots__ = ("__cell", "__neighbor_node")
+
     def __init__(self, cell):
         #validate input
         if not isinstance(cell, Cell):
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+
+import curses
+import unicodedata
+from model import *
+
+
+class Palette:
+    """
+    Return a Palette instance to manipulate curses color library
+    """
+
+    def __init__(self):
+        #store the pair_number of each registered (foreground, background) pair color
+        self.__color_number = {}
+
+    def get_composite_color(self, foreground_color, background_color=(0, 0, 0)):
+        """Return pair_number of curses pair_color
+        
+        Arguments:
+            foreground_color {tuple} -- foreground color of the symbol
+        
+        Keyword Arguments:
+            background_color {tuple} -- background color of the symbol (default: {(0, 0, 0})
+        
+        Raises:
+            TypeError: raise if foreground_color is not a tuple
+            AssertionError: raise if foreground_color must be a tuple of three paramenter
+            TypeError: raise if foreground_color must be a tuple of three integer
+            ValueError: raise if foreground_color must be a tuple of three integer between 0 and 255
+        
+        Returns:
+            int -- an integer represents pair_number of a pair_color
+        """
+        #validate foreground_color argument
+        if not isinstance(foreground_color, tuple):
+            raise TypeError("foreground_color must be a tuple")
+        if len(foreground_color) != 3:
+            raise AssertionError("foreground_color must be a tuple of three paramenter")
+        if not all([isinstance(i, int) for i in foreground_color]):
+            raise TypeError("foreground_color must be a tuple of three integer")
+        if (foreground_color[0] < 0 or foreground_color[0] > 255) and \
+            (foreground_color[1] < 0 or foreground_color[1] > 255) and \
+                (foreground_color[2] < 0 or foreground_color[2] > 255):
+            raise ValueError("foreground_color must be a tuple of three integer between 0 and 255")
+        
+        #validate background_color argument
+        if background_color != (0, 0, 0):
+            if not isinstance(background_color, tuple):
+                raise TypeError("background_color must be a tuple")
+            if len(background_color) != 3:
+                raise AssertionError("background_color must be a tuple of three paramenter")
+            if not all([isinstance(i, int) for i in background_color]):
+                raise TypeError("background_color must be a tuple of three integer")
+            if (background_color[0] < 0 or background_color[0] > 255) and \
+                (background_color[1] < 0 or background_color[1] > 255) and \
+                    (background_color[2] < 0 or background_color[2] > 255):
+                raise ValueError("background_color must be a tuple of three integer between 0 and 255")
+
+        #create pair_color values
+        pair_color = (foreground_color, background_color)
+
+        #if color has registered
+        if pair_color in self.__color_number:
+            return self.__color_number[pair_color]
+
+        #if color has not registered yet
+        else:
+            pair_number = (len(self.__color_number) + 1)*2
+            curses.init_color(pair_number, int(foreground_color[0]/256*1000), int(foreground_color[1]/256*1000), int(foreground_color[2]/256*1000))
+            curses.init_color(pair_number+1, int(background_color[0]/256*1000), int(background_color[1]/256*1000), int(background_color[2]/256*1000))
+            curses.init_pair(pair_number, pair_number, pair_number+1)
+            self.__color_number[pair_color] = pair_number
+
+            return pair_number
+
+class ColorRegistry:
+    """Registry of the curses colors of a game session
+
+    The colors are registered once when the registry is created, then the
+    registry hands out the precomputed curses attribute of each entity and
+    map cell type so that rendering makes no color setup call.
+
+    Attributes:
+        __palette - store the Palette the colors are registered in
+        __attributes - store the curses attribute by entity or map cell type name
+    """
+
+    def __init__(self):
+        #start curses color library
+        curses.start_color()
+
+        self.__palette = Palette()
+        self.__attributes = {}
+        for name, color in COLORS.items():
+            self.__attributes[name] = curses.color_pair(self.__palette.get_composite_color(color))
+
+    def __getitem__(self, name):
+        return self.__attributes[name]
+
+class Scene:
+    """The class control the output graphic of the game
+
+    The scene keeps the frame it has drawn last and only draws the cells
+    that changed since: the cells of moving characters, eaten pellets,
+    score digits and life icons. The whole scene is drawn again only on
+    the first frame, after the window has been resized or after invalidate,
+    the walls are then copied from a pad they are pre-rendered in once per level.
+    
+    Raises:
+        TypeError: raise if 'window' is not an object
+        TypeError: raise if 'level' is not an Level object
+        TypeError: raise if 'colors' is not a ColorRegistry object
+
+    Arguments:
+        window {object} - a window object of curses library
+        level {Level} - a Level object
+
+    Keyword Arguments:
+        colors {ColorRegistry} - the color registry of the session, created on first render if None
+
+    Attributes:
+        __window - store a window object
+        __level - store a Level object    
+        __colors - store the ColorRegistry of the session
+        __frame - store the (symbol, attribute) drawn on each (y, x) position of the window
+        __overlay - store the positions of the last frame drawn over the map
+        __window_size - store the window size of the last frame
+        __pad - store the pad the walls of the level are pre-rendered in
+        __walls - store the (symbol, attribute) of the walls by (y, x) map position
+        points - store points gained by player
+        life - store the amount of life left
+        death - store live condition of Pacman
+        power_capsule - strigger Pacman eat capsule event
+        flash - strigger flash stage of ghosts after pacman eat power capsule
+        standing_start_announcement - strigger game is starting event
+        time - store the time of the frame in seconds, animations are driven by it
+        ghosts_eaten - strigger ghosts have been eaten event, one flag per ghost of the level
+    """
+    
+    def __init__(self, window, level, colors=None):
+        if not isinstance(window, object):
+            raise TypeError("\'window\' must be a window object.")
+        if not isinstance(level, Level):
+            raise TypeError("\'level\' must be a Level object.")
+        if colors is not None and not isinstance(colors, ColorRegistry):
+            raise TypeError("\'colors\' must be a ColorRegistry object.")
+        self.__window = window
+        self.__level = level
+        self.__colors = colors
+        self.__frame = None
+        self.__overlay = {}
+        self.__window_size = None
+        self.__pad = None
+        self.__walls = {}
+        self.points = 0
+        self.life = 4
+        self.death = False
+        self.power_capsule = False
+        self.flash = False
+        self.standing_start_announcement = False
+        self.time = 0
+        self.ghosts_eaten = [False]*len(level.ghosts)
+
+    def invalidate(self):
+        """Draw the whole scene on the next frame, e.g. after the map has been written directly"""
+        self.__frame = None
+
+    #instance methos that control resizing
+    def __is_fully_visible(self):
+        """Check if the window is large enough
+        
+        Returns:
+            bool -- window is large enough or not
+        """
+        window_size = self.__window.getmaxyx()
+        if window_size[1] < 38 or window_size[0] < 38:
+            return True
+        return False
+
+    #drawing into the frame
+    @staticmethod
+    def __put(overlay, y, x, text, color=0):
+        """Put a text over the map, a wide symbol covers the next position too
+
+        A symbol put over half of a wide symbol removes that wide symbol, the
+        window can not show both, so that the map is drawn under it instead.
+        """
+        for symbol in text:
+            wide = unicodedata.east_asian_width(symbol) in ['W', 'F']
+            for x_ in ([x, x + 1] if wide else [x]):
+                cell = overlay.get((y, x_))
+                if cell is COVERED and (y, x_) in overlay: #right half of a wide symbol
+                    overlay.pop((y, x_ - 1), None)
+                elif cell is not None and unicodedata.east_asian_width(cell[0]) in ['W', 'F']:
+                    overlay.pop((y, x_ + 1), None)
+            overlay[(y, x)] = (symbol, color)
+            x += 1
+            if wide:
+                overlay[(y, x)] = COVERED
+                x += 1
+
+    def __map_cell(self, y, x, resize_x, resize_y):
+        """Return the (symbol, attribute) of the map at the (y, x) position of the window"""
+        pmap = self.__level.pmap
+        y_, x_ = y - 4 - resize_y, x - 4 - resize_x
+        if (y_, x_) in self.__walls:
+            return self.__walls[(y_, x_)]
+        if y_ < 0 or x_ < 0 or y_ >= pmap.height or x_ >= pmap.width:
+            return (' ', 0)
+        symbol = pmap.symbol(x_, y_)
+        if symbol in PELLETS:
+            return (symbol, self.__colors[PELLET])
+        return (' ', self.__colors[EMPTY])
+
+    def __draw(self, y, x, cell):
+        """Draw a cell on the window if it differs from the drawn frame"""
+        if self.__frame.get((y, x)) == cell:
+            return
+        self.__frame[(y, x)] = cell
+        if cell is not COVERED:
+            self.__window.addstr(y, x, cell[0], cell[1])
+
+    def __build_static_layer(self):
+        """Pre-render the walls of the level into a pad, they never change during a level"""
+        pmap = self.__level.pmap
+        self.__walls = {}
+        self.__pad = curses.newpad(pmap.height, pmap.width + 1)
+        for y in range(pmap.height):
+            for x in range(pmap.width):
+                if pmap.grid[y][x] in BORDER_SYMBOL:
+                    self.__walls[(y, x)] = (pmap.grid[y][x], self.__colors[WALL])
+                    self.__pad.addstr(y, x, pmap.grid[y][x], self.__colors[WALL])
+
+    def __display_the_map(self, resize_x, resize_y):
+        """Display the whole pacman map"""
+        pmap = self.__level.pmap
+        if self.__pad is None:
+            self.__build_static_layer()
+
+        self.__window.clear()
+        self.__frame = {}
+        self.__overlay = {}
+
+        #composite the static walls, the blank cells of the pad are transparent
+        self.__pad.overlay(self.__window, 0, 0, 4+resize_y, 4+resize_x,
+            3+resize_y+pmap.height, 3+resize_x+pmap.width)
+        for (y, x), cell in self.__walls.items():
+            self.__frame[(y+4+resize_y, x+4+resize_x)] = cell
+
+        #display the pellets left
+        for symbol, positions in pmap.pellets.items():
+            for x, y in positions:
+                self.__draw(y+4+resize_y, x+4+resize_x, (symbol, self.__colors[PELLET]))
+
+    def __flush(self, overlay, resize_x, resize_y):
+        """Draw the cells that changed since the last frame and refresh the window
+
+        The cells are drawn line after line from the left, so that a wide
+        symbol is drawn after the cell on its left and before the one it covers.
+        """
+        for position in sorted(self.__overlay.keys() | overlay.keys()):
+            if position in overlay:
+                cell = overlay[position]
+            else:
+                cell = self.__map_cell(position[0], position[1], resize_x, resize_y)
+            self.__draw(position[0], position[1], cell)
+
+        self.__overlay = overlay
+        self.__window.noutrefresh()
+        curses.doupdate()
+
+    def __display_header_and_footer(self, overlay, resize_x, resize_y):
+        """Display header and footer of the game scene"""
+        self.__put(overlay, 2+resize_y, 6+resize_x, "1UP    HIGH SCORE    2UP", self.__colors[TEXT])
+        self.__put(overlay, 3+resize_y, 7+resize_x-int(len(str(self.points))/2), str(self.points), self.__colors[TEXT])
+        self.__put(overlay, 3+resize_y, 17+resize_x-int(len(str(self.points))/2), str(self.points), self.__colors[TEXT])
+        self.__put(overlay, 3+resize_y, 28+resize_x, "0", self.__colors[TEXT])
+        self.__put(overlay, 34+resize_y, 6+resize_x, PACMAN_SYMBOL*self.life, self.__colors[PACMAN])
+
+    def __display_bonuses(self, overlay, resize_x, resize_y):
+        """Display the bonuses left that no character stands on, and their symbols in the footer"""
+        level = self.__level
+        for i, bonus in enumerate(level.bonuses):
+            if bonus.points != 0 and not level.occupancy.count(bonus.x, bonus.y) and \
+                    (level.pacman.x != bonus.x or level.pacman.y != bonus.y):
+                self.__put(overlay, bonus.y+4+resize_y, bonus.x+4+resize_x, bonus.symbol, self.__colors[CHERRY])
+                self.__put(overlay, 34+resize_y, 28-2*i+resize_x, bonus.symbol)
+
+    def __display_ghosts(self, overlay, resize_x, resize_y, color=None):
+        """Display the ghosts in the given color, in their own color if None"""
+        for ghost in self.__level.ghosts:
+            attribute = self.__colors[color or type(ghost).__name__.lower()]
+            self.__put(overlay, ghost.y+4+resize_y, ghost.x+4+resize_x, ghost.symbol, attribute)
+
+    def __display_animated_character(self, overlay, resize_x, resize_y):
+        """Display pacman and ghosts"""
+
+        if not self.power_capsule:
+            self.__display_ghosts(overlay, resize_x, resize_y)
+
+        #if pacman ate power capsule
+        else:
+            if not self.flash:
+                #blue ghosts
+                self.__display_ghosts(overlay, resize_x, resize_y, FRIGHTENED)
+
+            else:
+                #ghosts flash white and blue
+                if int(self.time/FLASH_FRAME_TIME) % 2 == 0:
+                    self.__display_ghosts(overlay, resize_x, resize_y, FLASH)
+                else:
+                    self.__display_ghosts(overlay, resize_x, resize_y, FRIGHTENED)
+
+    def __display_pacman_dead(self, overlay, resize_x, resize_y, symbol=None):
+        """Display pacman, or the given symbol of its death scene"""
+        if symbol is None:
+            self.__put(overlay, self.__level.pacman.y+4+resize_y, self.__level.pacman.x+4+resize_x, self.__level.pacman.symbol, self.__colors[PACMAN])
+        else:
+            self.__put(overlay, self.__level.pacman.y+4+resize_y, self.__level.pacman.x+4+resize_x, symbol)
+
+    def __display_ghosts_eyes(self, overlay, resize_x, resize_y):
+        """Display ghost eyes after ghost have been eaten"""
+        for ghost, ate in zip(self.__level.ghosts, self.ghosts_eaten):
+            if ate:
+                self.__put(overlay, ghost.y+4+resize_y, ghost.x+4+resize_x, EYES)
+
+    def __display_death_scene(self, overlay, resize_x, resize_y):
+        """Display pacman death scene, skull and explosion in turn"""
+        if int(self.time/DEATH_FRAME_TIME) % 2 == 0:
+            self.__display_pacman_dead(overlay, resize_x, resize_y, SKULL)
+        else:
+            self.__display_pacman_dead(overlay, resize_x, resize_y, EXPLODING)
+
+    def __display_standing_start_annoucement(self, overlay, resize_x, resize_y):
+        """Display the standing start announcement"""
+        announcement = self.__level.standing_start_announcement
+        self.__put(overlay, announcement.y+4+resize_y, announcement.x+1+resize_x, READY, self.__colors[PACMAN])
+    
+    def __display_enlarge_annoucement(self, resize_x, resize_y):
+        """Display enlarge screen annoucement"""
+        
+        self.__window.clear()
+        self.__window.addstr("Enlarge your... terminal!", self.__colors[TEXT])
+        self.__window.refresh()
+
+        #draw the whole scene once the window is large enough
+        self.__frame = None
+
+    #instance method that display the game
+    def render(self):
+        """Display the graphic
+        
+        Returns:
+            int -- return an ascii value of pressed key
+        """
+        #register the colors once per session
+        if self.__colors is None:
+            self.__colors = ColorRegistry()
+
+        #control graphics and resizing window
+        window_size = self.__window.getmaxyx()
+        resize_y = int((window_size[0] - 36)/2)
+        resize_x = int((window_size[1] - 36)/2)
+
+        #check if map is fully visible
+        visible = self.__is_fully_visible()
+        if visible:
+            self.__display_enlarge_annoucement(resize_x, resize_y)
+            return
+
+        #display the whole map on first frame and after resizing
+        if self.__frame is None or window_size != self.__window_size:
+            self.__window_size = window_size
+            self.__display_the_map(resize_x, resize_y)
+
+        #cells drawn over the map
+        overlay = {}
+
+        # display header and footer
+        self.__display_header_and_footer(overlay, resize_x, resize_y)
+        
+        #display bonuses
+        self.__display_bonuses(overlay, resize_x, resize_y)
+        
+        #display animated character
+        self.__display_animated_character(overlay, resize_x, resize_y)
+
+        #ghost become eyes after being eaten
+        self.__display_ghosts_eyes(overlay, resize_x, resize_y)
+
+        #display pacman or its death scene
+        if not self.death:
+            self.__display_pacman_dead(overlay, resize_x, resize_y)
+        else:
+            self.__display_death_scene(overlay, resize_x, resize_y)
+
+        #standing start announcement
+        if self.standing_start_announcement:
+            self.__display_standing_start_annoucement(overlay, resize_x, resize_y)
+
+        #draw the changed cells
+        self.__flush(overlay, resize_x, resize_y)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import time
+
+LOGIC_RATE = 5 #game loops per second
+RENDER_RATE = 30 #frames per second
+MAX_LOGIC_STEPS = 5 #game loops run at most to catch up after an overrun
+
+
+class Timer:
+    """Timer of an animation or a timed event
+
+    Arguments:
+        duration {float} - duration of the timer in seconds
+
+    Keyword Arguments:
+        clock {function} - function returning the current time in seconds (default: {time.monotonic})
+
+    Raises:
+        TypeError: raise if 'duration' is not a number
+        ValueError: raise if 'duration' is a negative number
+
+    Attributes:
+        __duration - store the duration of the timer
+        __clock - store the clock function
+        __start - store the time the timer has been started
+    """
+
+    def __init__(self, duration, clock=time.monotonic):
+        if not isinstance(duration, (int, float)):
+            raise TypeError("\'duration\' must be a number")
+        if duration < 0:
+            raise ValueError("\'duration\' must be zero or a positive number")
+
+        self.__duration = duration
+        self.__clock = clock
+        self.__start = clock()
+
+    @property
+    def elapsed(self):
+        return self.__clock() - self.__start
+
+    @property
+    def done(self):
+        return self.elapsed >= self.__duration
+
+
+class Scheduler:
+    """Fixed timestep scheduler of the game loops and the rendered frames
+
+    Game loops run at a fixed logic rate whatever the render rate is. When
+    the program falls behind, at most max_logic_steps loops are run to catch
+    up and the rest of the backlog is dropped, late frames are skipped, so
+    that the latency stays bounded.
+
+    Keyword Arguments:
+        logic_rate {float} - game loops per second (default: {LOGIC_RATE})
+        render_rate {float} - frames per second (default: {RENDER_RATE})
+        max_logic_steps {int} - game loops run at most per call of logic_steps (default: {MAX_LOGIC_STEPS})
+        clock {function} - function returning the current time in seconds (default: {time.monotonic})
+        sleep {function} - function sleeping a number of seconds (default: {time.sleep})
+
+    Raises:
+        ValueError: raise if 'logic_rate' or 'render_rate' is not a positive number
+        ValueError: raise if 'max_logic_steps' is not a positive integer
+
+    Attributes:
+        dropped_loops - number of game loops dropped because of overruns
+        skipped_frames - number of frames skipped because of overruns
+    """
+
+    def __init__(self, logic_rate=LOGIC_RATE, render_rate=RENDER_RATE, max_logic_steps=MAX_LOGIC_STEPS,
+            clock=time.monotonic, sleep=time.sleep):
+        if logic_rate <= 0 or render_rate <= 0:
+            raise ValueError("\'logic_rate\' and \'render_rate\' must be positive numbers")
+        if not isinstance(max_logic_steps, int) or max_logic_steps <= 0:
+            raise ValueError("\'max_logic_steps\' must be a positive integer")
+
+        self.__logic_step = 1/logic_rate
+        self.__render_step = 1/render_rate
+        self.__max_logic_steps = max_logic_steps
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__start = clock()
+        self.__next_logic = self.__start + self.__logic_step
+        self.__next_render = self.__start
+        self.dropped_loops = 0
+        self.skipped_frames = 0
+
+    @property
+    def clock(self):
+        return self.__clock
+
+    @property
+    def time(self):
+        """Seconds since the scheduler has been started"""
+        return self.__clock() - self.__start
+
+    def logic_steps(self):
+        """Return the number of game loops due since the last call"""
+        now = self.__clock()
+        steps = 0
+        while self.__next_logic <= now:
+            steps += 1
+            self.__next_logic += self.__logic_step
+
+        #drop the backlog of an overrun
+        if steps > self.__max_logic_steps:
+            self.dropped_loops += steps - self.__max_logic_steps
+            steps = self.__max_logic_steps
+
+        return steps
+
+    def render_due(self):
+        """Return True if a frame must be rendered now"""
+        now = self.__clock()
+        if now < self.__next_render:
+            return False
+
+        self.__next_render += self.__render_step
+
+        #skip the frames of an overrun
+        if self.__next_render <= now:
+            skipped = int((now - self.__next_render)/self.__render_step) + 1
+            self.skipped_frames += skipped
+            self.__next_render += skipped*self.__render_step
+
+        return True
+
+    def wait(self):
+        """Sleep until the next game loop or frame is due"""
+        delay = min(self.__next_logic, self.__next_render) - self.__clock()
+        if delay > 0:
+            self.__sleep(delay)
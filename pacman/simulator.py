@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+from ghost_ai import *
+
+UP = "up"
+DOWN = "down"
+LEFT = "left"
+RIGHT = "right"
+DIRECTIONS = {
+    UP: (-1, 0),
+    DOWN: (1, 0),
+    LEFT: (0, -1),
+    RIGHT: (0, 1)
+}
+DOT_EATEN = "dot_eaten"
+POWER_CAPSULE_EATEN = "power_capsule_eaten"
+BONUS_EATEN = "bonus_eaten"
+GHOST_EATEN = "ghost_eaten"
+GHOSTS_FLASH = "ghosts_flash"
+POWER_CAPSULE_END = "power_capsule_end"
+PACMAN_DEATH = "pacman_death"
+LEVEL_CLEARED = "level_cleared"
+GAME_OVER = "game_over"
+DOT_POINTS = 10
+POWER_CAPSULE_POINTS = 20
+GHOST_POINTS = 200
+PACMAN_LIFE = 4
+POWER_CAPSULE_LOOPS = 40 #number of loops before frightened ghosts start flashing
+FLASH_LOOPS = 7 #number of loops ghosts flash before they become dangerous again
+GHOST_START_LOOPS = 5 #number of loops the ghosts need to leave the cage
+TABLE_CELLS = 1024 #walkable cells up to which the simulator builds a DistanceTable for the ghosts
+GHOST_HOUSE_SYMBOL = 'x' #symbol of the cells of the cage, the ghosts spawned on it leave it by GHOST_START_MOVES
+
+#scripted (dy, dx) moves of each ghost leaving the cage, one row per loop
+GHOST_START_MOVES = [
+    [(0, -1), (0, 1), (0, 1), (0, -1)],
+    [(-1, 0), (-1, 0), (-1, 0), (-1, 0)],
+    [(-1, 0), (-1, 0), (-1, 0), (-1, 0)],
+    [(-1, 0), (-1, 0), (0, -1), (0, 1)],
+    [(0, 1), (0, -1), (0, -1), (0, 1)]
+]
+
+
+class GameState:
+    """State of a game in progress, free of any rendering concern
+
+    Arguments:
+        level {Level} - a Level object the game is played on
+
+    Raises:
+        TypeError: raise if 'level' is not a Level object
+
+    Attributes:
+        level - store the Level object
+        points - store points gained by player
+        life - store the amount of life left
+        loop - store number of game loops gone
+        direction - store the (dy, dx) direction Pacman is moving to
+        death - Pacman has just died and waits to be put back on its start position
+        power_capsule - Pacman ate a power capsule and can eat ghosts
+        flash - ghosts flash because the power capsule is running out
+        ghosts_eaten - store for each ghost if it has been eaten
+        eaten_ghost - number of ghosts eaten since the last power capsule
+        last_loop - store the loop an event has been triggered
+        over - the game is over
+    """
+
+    def __init__(self, level):
+        if not isinstance(level, Level):
+            raise TypeError("\'level\' must be a Level object.")
+
+        self.level = level
+        self.points = 0
+        self.life = PACMAN_LIFE
+        self.loop = 0
+        self.direction = (0, 0)
+        self.death = False
+        self.power_capsule = False
+        self.flash = False
+        self.ghosts_eaten = [False]*len(level.ghosts)
+        self.eaten_ghost = 0
+        self.last_loop = 0
+        self.over = False
+        self.std_x = level.pacman.x #default pacman x ordinate
+        self.std_y = level.pacman.y #default pacman y ordinate
+
+    def reset_power_capsule(self):
+        """Stop the pacman ate power capsule event"""
+        self.power_capsule = False
+        self.flash = False
+        self.eaten_ghost = 0
+        self.last_loop = 0
+        self.ghosts_eaten = [False]*len(self.ghosts_eaten)
+
+
+class Simulator:
+    """Headless game engine applying the game rules one loop at a time
+
+    The simulator never renders, never reads the keyboard and never sleeps,
+    so it can run as fast as the rules allow. The curses front end is one
+    consumer of it, bots and regression runs are others. The ghosts read
+    their distances to Pacman from a DistanceTable of the level if it has
+    at most TABLE_CELLS walkable cells or if one is given, and search them
+    with a DistanceField otherwise.
+
+    Arguments:
+        level {Level} - a Level object the game is played on
+
+    Keyword Arguments:
+        distance_table {DistanceTable} - distance table of the level, e.g. read from a level
+            cache (default: {None})
+
+    Attributes:
+        __state - store the GameState of the game
+        __ghost_ai - store the GhostAI moving the ghosts
+        __caged - store the ghosts spawned in the cage
+        __free - store the other ghosts, they move on their own from the first loop
+    """
+
+    def __init__(self, level, distance_table=None):
+        #the distance_table module imports this one
+        from distance_table import DistanceTable, TableField
+
+        self.__state = GameState(level)
+        if distance_table is None and len(level.pmap.cell_graph) <= TABLE_CELLS:
+            distance_table = DistanceTable(level)
+        self.__ghost_ai = GhostAI(level, field=None if distance_table is None else TableField(distance_table))
+        self.__caged = [ghost for ghost in level.ghosts if level.pmap.symbol(ghost.x, ghost.y) == GHOST_HOUSE_SYMBOL]
+        self.__free = [ghost for ghost in level.ghosts if ghost not in self.__caged]
+
+        #snapshot of the level to replay it without loading it again
+        self.__start_tiles = bytes(level.pmap.tiles)
+        self.__start_positions = [(character.x, character.y) for character in [level.pacman] + level.ghosts]
+        self.__start_bonus_points = [bonus.points for bonus in level.bonuses]
+
+    @property
+    def state(self):
+        return self.__state
+
+    def reset(self):
+        """Put the level back in its starting state and start a new game
+
+        Returns:
+            GameState -- the state of the new game
+        """
+        level = self.__state.level
+
+        #restore eaten dots and power capsules in place
+        level.pmap.tiles[:] = self.__start_tiles
+        level.pmap.index_pellets()
+
+        #restore characters and bonuses
+        for character, (x, y) in zip([level.pacman] + level.ghosts, self.__start_positions):
+            character._x = x
+            character._y = y
+        for ghost in level.ghosts:
+            ghost.last_x = 0
+            ghost.last_y = 0
+            ghost.heading = None
+        level.occupancy.place(level.ghosts)
+        for bonus, points in zip(level.bonuses, self.__start_bonus_points):
+            bonus.points = points
+        self.__ghost_ai.reset()
+
+        self.__state = GameState(level)
+        return self.__state
+
+    def __can_move(self, dy, dx):
+        """Return True if Pacman can make the move (dy, dx), through a portal or not"""
+        pmap = self.__state.level.pmap
+        pacman = self.__state.level.pacman
+        return pmap.exits[pacman.y*pmap.width + pacman.x] & EXIT_BIT[(dy, dx)] != 0
+
+    def __move_pacman(self, action):
+        """Update Pacman direction from the action and move it one step"""
+        state = self.__state
+        pacman = state.level.pacman
+
+        #implement the player direction
+        if action is not None:
+            dy, dx = DIRECTIONS[action]
+            if self.__can_move(dy, dx):
+                state.direction = (dy, dx)
+
+        #auto move
+        dy, dx = state.direction
+        if (dy, dx) != (0, 0):
+            pacman.set_direction(dy, dx, state.level.pmap)
+
+            #stop if hit wall
+            if not self.__can_move(dy, dx):
+                state.direction = (0, 0)
+
+    def __eat(self, events):
+        """Implement point gains of the cell Pacman stands on"""
+        state = self.__state
+        pacman = state.level.pacman
+        pmap = state.level.pmap
+        bonuses = state.level.bonuses
+
+        #gain points per dot or power capsule
+        pellet = pmap.eat(pacman.x, pacman.y)
+        if pellet == DOT:
+            state.points += DOT_POINTS
+            events.append(DOT_EATEN)
+        elif pellet == POWER_CAPSULE:
+            state.points += POWER_CAPSULE_POINTS
+            state.power_capsule = True
+            events.append(POWER_CAPSULE_EATEN)
+
+        # pacman eats bonus event
+        for bonus in bonuses:
+            if pacman.x == bonus.x and pacman.y == bonus.y and bonus.points != 0:
+                state.points += bonus.points
+                bonus.points = 0
+                events.append(BONUS_EATEN)
+
+    def __is_level_cleared(self):
+        """Return True if there are no dots, power capsules or bonuses left"""
+        level = self.__state.level
+        return level.pmap.pellets_left == 0 and all(bonus.points == 0 for bonus in level.bonuses)
+
+    def __meet_ghosts(self, events):
+        """Implement Pacman dies or eats the ghosts it meets"""
+        state = self.__state
+        pacman = state.level.pacman
+
+        #the ghosts are only looked at if one of them is on the cell of Pacman
+        ghosts = state.level.ghosts if state.level.occupancy.count(pacman.x, pacman.y) else []
+        for i, ghost in enumerate(ghosts):
+            if pacman.x != ghost.x or pacman.y != ghost.y:
+                continue
+
+            if not state.power_capsule: #pacman death
+                if not state.death:
+                    state.death = True
+                    state.life -= 1
+                    events.append(PACMAN_DEATH)
+
+            elif not state.ghosts_eaten[i]: #pacman eats ghost
+                state.ghosts_eaten[i] = True
+                state.eaten_ghost += 1
+                state.points += state.eaten_ghost*GHOST_POINTS
+                events.append(GHOST_EATEN)
+
+        #if eaten all ghosts
+        if state.power_capsule and all(state.ghosts_eaten):
+            state.reset_power_capsule()
+            events.append(POWER_CAPSULE_END)
+
+    def __update_power_capsule(self, events):
+        """Handle the timing of the pacman ate power capsule event"""
+        state = self.__state
+        if not state.power_capsule:
+            return
+
+        if state.last_loop == 0:
+            state.last_loop = state.loop
+
+        # change to ghosts flashing scene
+        if not state.flash and state.loop - state.last_loop > POWER_CAPSULE_LOOPS:
+            state.flash = True
+            state.last_loop = state.loop
+            events.append(GHOSTS_FLASH)
+
+        #stop pacman ate capsule event
+        elif state.flash and state.loop - state.last_loop > FLASH_LOOPS:
+            state.reset_power_capsule()
+            events.append(POWER_CAPSULE_END)
+
+    def __move_ghosts(self):
+        """Move the ghosts out of the cage, then after their target or away from Pacman while frightened"""
+        state = self.__state
+        ghosts = state.level.ghosts
+
+        if state.loop <= GHOST_START_LOOPS:
+            #ghost move out the cage, the ghosts after the fourth one follow the moves again
+            moves = GHOST_START_MOVES[state.loop-1]
+            for i, ghost in enumerate(self.__caged):
+                ghost.set_direction(*moves[i % len(moves)], state.level.pmap)
+            state.level.occupancy.place(ghosts)
+            ghosts = self.__free
+            if not ghosts:
+                return
+
+        if state.power_capsule: #frightened ghosts run away
+            self.__ghost_ai.flee(ghosts)
+        else:
+            self.__ghost_ai.move(ghosts, max(0, state.loop - GHOST_START_LOOPS), state.direction)
+
+    def step(self, action=None):
+        """Advance the game by one loop
+
+        Keyword Arguments:
+            action {str} -- direction chosen by the player, one of UP, DOWN,
+                LEFT, RIGHT or None to keep the current direction (default: {None})
+
+        Raises:
+            ValueError: raise if 'action' is not a known direction
+            AssertionError: raise if the game is already over
+
+        Returns:
+            list -- events triggered during the loop
+        """
+        #validate input
+        if action is not None and action not in DIRECTIONS:
+            raise ValueError("\'action\' must be one of UP, DOWN, LEFT, RIGHT or None")
+        if self.__state.over:
+            raise AssertionError("the game is over")
+
+        state = self.__state
+        pacman = state.level.pacman
+        events = []
+
+        #return pacman to standard position after its death
+        if state.death:
+            state.death = False
+            state.direction = (0, 0)
+            pacman._x = state.std_x
+            pacman._y = state.std_y
+
+        #loop counter
+        state.loop += 1
+
+        self.__move_pacman(action)
+        self.__eat(events)
+
+        #check if game is end
+        if self.__is_level_cleared():
+            state.over = True
+            events.append(LEVEL_CLEARED)
+            return events
+
+        self.__meet_ghosts(events)
+
+        #if drain out of life, end game
+        if state.life == 0:
+            state.over = True
+            events.append(GAME_OVER)
+            return events
+
+        self.__update_power_capsule(events)
+        self.__move_ghosts()
+
+        return events
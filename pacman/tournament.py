@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import concurrent.futures
+import csv
+import json
+import random
+import time
+from level_cache import *
+
+MAX_LOOPS = 10000 #stop an episode that lasts longer than this number of loops
+
+#compact record of one episode streamed back from the workers
+EpisodeRecord = collections.namedtuple("EpisodeRecord",
+    ["policy", "level", "seed", "episode", "score", "ticks", "pellets", "ghosts", "wall_time"])
+
+
+def random_policy(state, rng):
+    """Return a random direction or None to keep going"""
+    return rng.choice([UP, DOWN, LEFT, RIGHT, None])
+
+def greedy_policy(state, rng):
+    """Return the first direction of a shortest walk to the closest dot or power capsule"""
+    pmap = state.level.pmap
+    pacman = state.level.pacman
+    table = _get_distance_table(state.level)
+
+    closest = UNREACHABLE
+    target = None
+    for pellets in pmap.pellets.values():
+        for x, y in pellets:
+            distance = table.distance(pacman.x, pacman.y, x, y)
+            if distance < closest:
+                closest = distance
+                target = (x, y)
+
+    if target is None:
+        return random_policy(state, rng)
+    return table.next_move(pacman.x, pacman.y, *target)
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy
+}
+
+#compiled levels and simulators of the levels loaded by the current worker process
+_levels = {}
+_simulators = {}
+
+def _get_level(level_number):
+    """Return the compiled level of a number, read from the level cache once per process"""
+    if level_number not in _levels:
+        _levels[level_number] = CompiledLevel(level_number)
+    return _levels[level_number]
+
+def _get_distance_table(level):
+    """Return the distance table of a level"""
+    return _get_level(level.number).distance_table
+
+def _get_simulator(level_number):
+    """Return the simulator of a level, loading the level once per process"""
+    if level_number not in _simulators:
+        level = _get_level(level_number)
+        _simulators[level_number] = Simulator(level.level, level.distance_table)
+    return _simulators[level_number]
+
+def play_episodes(policy_name, level_number, seed, episodes=1, max_loops=MAX_LOOPS):
+    """Return the records of episodes of a policy on a level
+
+    Arguments:
+        policy_name {str} -- name of the policy in POLICIES
+        level_number {int} -- level of the game
+        seed {int} -- seed of the random generators of the episodes
+
+    Keyword Arguments:
+        episodes {int} -- number of episodes to play (default: {1})
+        max_loops {int} -- maximum number of loops of an episode (default: {MAX_LOOPS})
+
+    Raises:
+        ValueError: raise if 'policy_name' is not a known policy
+
+    Returns:
+        list -- an EpisodeRecord per episode
+    """
+    if policy_name not in POLICIES:
+        raise ValueError("\'policy_name\' must be one of " + ", ".join(POLICIES))
+
+    policy = POLICIES[policy_name]
+    simulator = _get_simulator(level_number)
+    records = []
+
+    for episode in range(episodes):
+        start = time.perf_counter()
+        rng = random.Random(seed*episodes + episode)
+        state = simulator.reset()
+        state.level.seed_ghosts(seed*episodes + episode)
+        pellets = 0
+        ghosts = 0
+
+        while not state.over and state.loop < max_loops:
+            events = simulator.step(policy(state, rng))
+            pellets += events.count(DOT_EATEN) + events.count(POWER_CAPSULE_EATEN)
+            ghosts += events.count(GHOST_EATEN)
+
+        records.append(EpisodeRecord(policy_name, level_number, seed, episode,
+            state.points, state.loop, pellets, ghosts, time.perf_counter() - start))
+
+    return records
+
+def run_tournament(policies, levels, seeds, episodes=1, workers=None, max_loops=MAX_LOOPS):
+    """Play every (policy, level, seed) job over a pool of processes
+
+    Arguments:
+        policies {list} -- names of the policies in POLICIES
+        levels {list} -- level numbers
+        seeds {list} -- seeds of the jobs
+
+    Keyword Arguments:
+        episodes {int} -- number of episodes per job (default: {1})
+        workers {int} -- number of worker processes, the number of CPUs if None (default: {None})
+        max_loops {int} -- maximum number of loops of an episode (default: {MAX_LOOPS})
+
+    Yields:
+        EpisodeRecord -- records of the episodes as soon as their job is done
+    """
+    for policy_name in policies:
+        if policy_name not in POLICIES:
+            raise ValueError("\'policies\' must be names of " + ", ".join(POLICIES))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_episodes, policy_name, level_number, seed, episodes, max_loops)
+            for policy_name in policies for level_number in levels for seed in seeds]
+
+        for future in concurrent.futures.as_completed(futures):
+            for record in future.result():
+                yield record
+
+def summarize(records):
+    """Return a summary of the records per policy and level
+
+    Arguments:
+        records {iterable} -- EpisodeRecord instances
+
+    Returns:
+        list -- a dictionary of aggregated results per (policy, level)
+    """
+    groups = collections.defaultdict(list)
+    for record in records:
+        groups[(record.policy, record.level)].append(record)
+
+    summary = []
+    for (policy_name, level_number), group in sorted(groups.items()):
+        count = len(group)
+        summary.append({
+            "policy": policy_name,
+            "level": level_number,
+            "episodes": count,
+            "mean_score": sum(record.score for record in group)/count,
+            "max_score": max(record.score for record in group),
+            "mean_ticks": sum(record.ticks for record in group)/count,
+            "mean_pellets": sum(record.pellets for record in group)/count,
+            "mean_ghosts": sum(record.ghosts for record in group)/count,
+            "wall_time": sum(record.wall_time for record in group)
+        })
+
+    return summary
+
+def save_records(records, file_pathname):
+    """Write the records into a CSV file"""
+    with open(file_pathname, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(EpisodeRecord._fields)
+        writer.writerows(records)
+
+def save_summary(summary, file_pathname):
+    """Write the summary into a JSON file"""
+    with open(file_pathname, "w") as file:
+        json.dump(summary, file, indent=2)
+
+def parse_seeds(text):
+    """Return the list of seeds of a '0-99' range or a '1,5,7' list"""
+    if "-" in text:
+        first, last = text.split("-")
+        return list(range(int(first), int(last) + 1))
+    return [int(seed) for seed in text.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bot policies over levels and seeds.")
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=list(POLICIES))
+    parser.add_argument("--levels", nargs="+", type=int, default=[1])
+    parser.add_argument("--seeds", type=parse_seeds, default=parse_seeds("0-9"), help="'0-99' or '1,5,7'")
+    parser.add_argument("--episodes", type=int, default=1, help="episodes per (policy, level, seed) job")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--max-loops", type=int, default=MAX_LOOPS)
+    parser.add_argument("--csv", help="write every episode record into this CSV file")
+    parser.add_argument("--json", help="write the summary into this JSON file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    records = list(run_tournament(args.policies, args.levels, args.seeds,
+        args.episodes, args.workers, args.max_loops))
+    summary = summarize(records)
+
+    if args.csv:
+        save_records(records, args.csv)
+    if args.json:
+        save_summary(summary, args.json)
+
+    for result in summary:
+        print("{policy:>8} level {level}: {episodes} episodes, mean score {mean_score:.1f}, "
+            "max score {max_score}, mean ticks {mean_ticks:.1f}".format(**result))
+    print("{} episodes in {:.2f}s".format(len(records), time.perf_counter() - start))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+#the modules of the game import each other by their flat names from the pacman directory
+PACMAN_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pacman")
+sys.path.insert(0, PACMAN_DIRECTORY)
+
+from model import *
+
+
+def make_level(simplified_map, spawns, number=1):
+    """Return the Level of a simplified map and of its spawn points, as in the levelN.json files"""
+    return Level.from_data(number, Map(prettify_map(simplified_map)), spawns)
+
+
+@pytest.fixture
+def root_path_name():
+    """Directory holding the map directory of the game"""
+    return PACMAN_DIRECTORY
+
+
+@pytest.fixture
+def level(root_path_name):
+    """The first level of the game, loaded again for each test"""
+    return Level.load(1, root_path_name)
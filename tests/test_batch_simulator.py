@@ -0,0 +1,38 @@
+import random
+
+import numpy as np
+import pytest
+
+from batch_simulator import *
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batch_follows_the_simulator(level, seed):
+    """The games of a batch move as the simulator does until the first power capsule
+
+    The frightened ghosts break their ties with different generators, so
+    the trajectories are only compared up to then.
+    """
+    table = DistanceTable(level)
+    batch = BatchSimulator(level, 2, seed=seed, distance_table=table)
+    simulator = Simulator(level, table)
+    level.seed_ghosts(seed)
+    width = level.pmap.width
+
+    rng = random.Random(seed)
+    action = 0
+    for loop in range(2000):
+        if rng.random() < 0.2:
+            action = rng.randrange(len(ACTIONS))
+        events = simulator.step(ACTIONS[action])
+        batch.step(np.array([action, action]))
+
+        state = simulator.state
+        for game in range(batch.n):
+            assert batch.pacman[game] == level.pacman.y*width + level.pacman.x
+            assert list(batch.ghosts[game]) == [ghost.y*width + ghost.x for ghost in level.ghosts]
+            assert (batch.points[game], batch.life[game], batch.done[game]) == (state.points, state.life, state.over)
+        if POWER_CAPSULE_EATEN in events or state.over:
+            break
+
+    assert loop > 50
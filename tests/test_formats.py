@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from level_file import *
+from level_pack import *
+from maze_generator import *
+
+
+@pytest.fixture
+def simplified_map(root_path_name):
+    return uncompress_map_with_rle(load_map(root_path_name + "/map/level1.rle"))
+
+
+@pytest.fixture
+def maze():
+    return MazeGenerator(30, 21, 7, tunnels=1).generate()
+
+
+def test_rle_round_trip(simplified_map, tmp_path):
+    rle_map = compress_map_with_rle(simplified_map)
+    assert uncompress_map_with_rle(rle_map) == simplified_map
+
+    pathname = str(tmp_path / "level.rle")
+    save_map(rle_map, pathname)
+    assert bytes(Map.load_map(pathname).tiles) == bytes(Map(prettify_map(simplified_map)).tiles)
+    with pytest.raises(ValueError):
+        save_map(rle_map, pathname)
+
+
+def test_binary_rle_round_trip(simplified_map):
+    data = compress_map_with_binary_rle(simplified_map)
+    assert uncompress_map_with_binary_rle(data) == simplified_map
+
+    reader = BinaryRleMap(data)
+    assert reader.height == len(simplified_map)
+    assert reader.line(3) == simplified_map[3]
+    assert reader.region(5, 2, 10, 4) == [line[5:15] for line in simplified_map[2:6]]
+
+
+def test_binary_rle_splits_long_runs():
+    long_map = ["*"*70000, "." + " "*0x10000 + "."]
+    assert uncompress_map_with_binary_rle(compress_map_with_binary_rle(long_map)) == long_map
+
+
+def test_level_file_round_trip(level, root_path_name, tmp_path):
+    with open(root_path_name + "/map/level1.json") as file:
+        spawns = json.load(file)
+
+    pathname = str(tmp_path / ("level1" + LEVEL_FILE_EXTENSION))
+    save_level_file(level.pmap, spawns, pathname)
+    loaded = load_level_file(pathname, 1)
+
+    assert (loaded.pmap.width, loaded.pmap.height) == (level.pmap.width, level.pmap.height)
+    assert bytes(loaded.pmap.tiles) == bytes(level.pmap.tiles)
+    assert loaded.pmap.symbols[:len(level.pmap.symbols)] == level.pmap.symbols
+    assert loaded.pmap.dots_left == level.pmap.dots_left
+    assert loaded.pmap.power_capsules_left == level.pmap.power_capsules_left
+    assert [(character.x, character.y) for character in loaded.objects] == \
+        [(character.x, character.y) for character in level.objects]
+
+
+def test_level_file_version(tmp_path):
+    pathname = str(tmp_path / ("level" + LEVEL_FILE_EXTENSION))
+    with open(pathname, "wb") as file:
+        file.write(LEVEL_FILE_HEADER.pack(b"NOTLEVEL", LEVEL_FILE_VERSION, 0, 0, 0, 0, 0, 0, 0))
+    with pytest.raises(ValueError):
+        load_level_file(pathname)
+
+
+def test_level_pack_round_trip(simplified_map, maze, root_path_name, tmp_path):
+    with open(root_path_name + "/map/level1.json") as file:
+        spawns = json.load(file)
+    levels = [(1, simplified_map, spawns), (7, *maze)]
+
+    pathname = str(tmp_path / ("levels" + LEVEL_PACK_EXTENSION))
+    save_level_pack(levels, pathname)
+    with LevelPack(pathname) as pack:
+        assert pack.numbers() == [1, 7]
+        for number, simplified_map_, spawns_ in levels:
+            assert pack.read(number) == (simplified_map_, spawns_)
+        assert bytes(pack.load(1).pmap.tiles) == bytes(Level.load(1, root_path_name).pmap.tiles)
+
+
+def test_unpack_levels(maze, tmp_path):
+    pathname = str(tmp_path / ("levels" + LEVEL_PACK_EXTENSION))
+    save_level_pack([(2, *maze), (3, *maze)], pathname)
+    directory = tmp_path / "map"
+    directory.mkdir()
+
+    #no level is written if one of them is there already
+    (directory / "level3.json").write_text("{}")
+    with pytest.raises(FileExistsError):
+        unpack_levels(pathname, str(directory))
+    assert os.listdir(directory) == ["level3.json"]
+
+    (directory / "level3.json").unlink()
+    unpack_levels(pathname, str(directory))
+    assert sorted(os.listdir(directory)) == ["level2.json", "level2.rle", "level3.json", "level3.rle"]
+    level = Level.load(3, str(tmp_path))
+    assert bytes(level.pmap.tiles) == bytes(Map(prettify_map(maze[0])).tiles)
+
+
+def test_save_maze_writes_both_files_or_none(maze, tmp_path):
+    (tmp_path / "map").mkdir()
+    (tmp_path / "map" / "level4.json").write_text("{}")
+    with pytest.raises(FileExistsError):
+        save_maze(*maze, 4, str(tmp_path))
+    assert os.listdir(tmp_path / "map") == ["level4.json"]
+
+    save_maze(*maze, 5, str(tmp_path))
+    level = Level.load(5, str(tmp_path))
+    assert (level.pmap.width, level.pmap.height) == (30, 21)
@@ -0,0 +1,74 @@
+import collections
+import random
+
+import pytest
+
+from conftest import make_level
+from maze_generator import *
+
+
+def bfs_distances(pmap, portals, source):
+    """Return the number of moves from the cell source to each cell it reaches, going through
+    the (x, y, dy, dx) -> (x, y) portals"""
+    distances = {source: 0}
+    queue = collections.deque([source])
+    while queue:
+        x, y = queue.popleft()
+        for dy, dx in EXITS:
+            cell = portals.get((x, y, dy, dx), (x + dx, y + dy))
+            if pmap.is_walkable(*cell) and cell not in distances:
+                distances[cell] = distances[(x, y)] + 1
+                queue.append(cell)
+    return distances
+
+
+def check_paths(pmap, portals, pairs):
+    for source, destination in pairs:
+        distance = bfs_distances(pmap, portals, (source.x, source.y)).get((destination.x, destination.y))
+
+        for path, length in [pmap.find_shortest_path(source, destination),
+                pmap.find_shortest_path_a_star(source, destination)]:
+            assert length == distance
+            if distance is not None:
+                assert path[0] is source and path[-1] is destination
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_paths_through_tunnels(seed):
+    rng = random.Random(seed)
+    simplified_map, _ = MazeGenerator(28, 31, seed, tunnels=2).generate()
+    pmap = Map(prettify_map(simplified_map))
+
+    portals = {}
+    for mouth, mouth_ in pmap.find_portals():
+        portals[mouth] = mouth_[:2]
+        portals[mouth_] = mouth[:2]
+    assert portals
+
+    nodes = pmap.node_graph
+    check_paths(pmap, portals, [(rng.choice(nodes), rng.choice(nodes)) for _ in range(40)])
+
+
+def test_paths_through_declared_portals():
+    #the top corridors linked by a portal, the way around the walls is much longer
+    simplified_map = [
+        "************",
+        "*....**....*",
+        "*.**.**.**.*",
+        "*.**.**.**.*",
+        "*..........*",
+        "************"
+    ]
+    spawns = {
+        PACMAN: {X: 1, Y: 1},
+        GHOSTS: [],
+        STANDING_START_ANNOUNCEMENT: {X: 1, Y: 0},
+        PORTALS: [[{X: 2, Y: 1, DX: 0, DY: -1}, {X: 9, Y: 1, DX: 0, DY: -1}]]
+    }
+    pmap = make_level(simplified_map, spawns).pmap
+    portals = {(2, 1, -1, 0): (9, 1), (9, 1, -1, 0): (2, 1)}
+    assert pmap.portals == portals
+    assert bfs_distances(pmap, portals, (1, 1))[(10, 1)] == 3
+
+    nodes = pmap.node_graph
+    check_paths(pmap, portals, [(source, destination) for source in nodes for destination in nodes])
@@ -0,0 +1,118 @@
+import pytest
+
+from conftest import make_level
+from simulator import *
+
+#a power capsule at the left end of a corridor, over a dead end, and a dot keeping the level going
+DEAD_END_MAP = [
+    "*******",
+    "*o   .*",
+    "* *****",
+    "*******"
+]
+
+
+def spawns(pacman, ghosts=(), cherries=()):
+    return {
+        PACMAN: {X: pacman[0], Y: pacman[1]},
+        GHOSTS: [{KIND: BLINKY, X: x, Y: y} for x, y in ghosts],
+        CHERRY: [{X: x, Y: y, SYMBOL: "\U0001F352", POINTS: points} for x, y, points in cherries],
+        STANDING_START_ANNOUNCEMENT: {X: 1, Y: 0}
+    }
+
+
+def test_dots_and_bonus_score_and_clear_the_level():
+    level = make_level(["*******", "* .. .*", "*******"], spawns((1, 1), cherries=[(4, 1, 100)]))
+    simulator = Simulator(level)
+
+    assert simulator.step(RIGHT) == [DOT_EATEN]
+    assert simulator.step() == [DOT_EATEN]
+    assert simulator.step() == [BONUS_EATEN]
+    assert simulator.state.points == 2*DOT_POINTS + 100
+    assert not simulator.state.over
+
+    assert simulator.step() == [DOT_EATEN, LEVEL_CLEARED]
+    assert simulator.state.points == 3*DOT_POINTS + 100
+    assert simulator.state.over
+    with pytest.raises(AssertionError):
+        simulator.step()
+
+
+def test_pacman_stops_at_a_wall():
+    level = make_level(["*****", "*.. *", "*****"], spawns((3, 1)))
+    simulator = Simulator(level)
+
+    simulator.step(UP) #no way up, Pacman keeps standing
+    assert (level.pacman.x, level.pacman.y) == (3, 1)
+    simulator.step(LEFT)
+    simulator.step()
+    assert (level.pacman.x, level.pacman.y) == (1, 1)
+    assert simulator.state.points == 2*DOT_POINTS
+
+
+def test_power_capsule_frightens_the_ghosts_for_a_while():
+    level = make_level(["********", "*o    .*", "********"], spawns((2, 1), ghosts=[(5, 1)]))
+    simulator = Simulator(level)
+
+    events = simulator.step(LEFT)
+    assert POWER_CAPSULE_EATEN in events
+    assert simulator.state.points == POWER_CAPSULE_POINTS
+    assert simulator.state.power_capsule
+    start = simulator.state.loop
+
+    loops = {}
+    while POWER_CAPSULE_END not in loops:
+        for event in simulator.step():
+            loops[event] = simulator.state.loop
+    assert loops[GHOSTS_FLASH] == start + POWER_CAPSULE_LOOPS + 1
+    assert loops[POWER_CAPSULE_END] == loops[GHOSTS_FLASH] + FLASH_LOOPS + 1
+    assert not simulator.state.power_capsule and not simulator.state.flash
+
+
+def test_pacman_eats_a_frightened_ghost():
+    level = make_level(DEAD_END_MAP, spawns((2, 1), ghosts=[(1, 2)]))
+    simulator = Simulator(level)
+
+    #the ghost has no way out of the dead end but the cell of Pacman
+    simulator.step(LEFT)
+    assert (level.ghosts[0].x, level.ghosts[0].y) == (1, 1)
+
+    events = simulator.step()
+    assert GHOST_EATEN in events and POWER_CAPSULE_END in events
+    assert simulator.state.points == POWER_CAPSULE_POINTS + GHOST_POINTS
+    assert not simulator.state.power_capsule
+
+
+def test_ghosts_take_the_lives_of_pacman_until_the_game_is_over():
+    level = make_level(["*******", "*    .*", "*******"], spawns((1, 1), ghosts=[(4, 1)]))
+    simulator = Simulator(level)
+
+    deaths = 0
+    events = []
+    while GAME_OVER not in events:
+        events = simulator.step()
+        if PACMAN_DEATH in events:
+            deaths += 1
+            assert simulator.state.life == PACMAN_LIFE - deaths
+        assert simulator.state.loop < 100
+    assert deaths == PACMAN_LIFE
+    assert simulator.state.life == 0 and simulator.state.over
+
+
+def test_reset_starts_the_same_game_again(level):
+    simulator = Simulator(level)
+    level.seed_ghosts(0)
+    first = [simulator.step(action) for action in [LEFT]*30 + [UP]*30]
+    points = simulator.state.points
+
+    simulator.reset()
+    level.seed_ghosts(0)
+    assert simulator.state.points == 0 and simulator.state.life == PACMAN_LIFE
+    assert [simulator.step(action) for action in [LEFT]*30 + [UP]*30] == first
+    assert simulator.state.points == points
+
+
+def test_unknown_action():
+    level = make_level(["****", "*. *", "****"], spawns((2, 1)))
+    with pytest.raises(ValueError):
+        Simulator(level).step("jump")